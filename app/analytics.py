@@ -0,0 +1,232 @@
+"""
+analytics.py
+Engagement analytics over the users table: rollups by company/city/state/
+job_title, histograms and percentiles of hosted/attended counts, and the
+top-N users.
+
+A full (parallel, segmented) scan loads the counters into NumPy columns at
+most every ANALYTICS_REFRESH_SECONDS; the summary is computed from those
+columns with vectorized aggregation and kept as a snapshot, so requests are
+served from memory. Registrations and event creation update the columns as
+they happen, and the snapshot is recomputed from the columns (no DynamoDB
+reads) at most every ANALYTICS_RECOMPUTE_SECONDS while there are changes.
+
+Like the user index, each worker process holds its own copy; changes made by
+other processes and user edits are picked up by the next refresh.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .scanner import scan_table
+
+ANALYTICS_REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", 300))
+ANALYTICS_RECOMPUTE_SECONDS = float(os.getenv("ANALYTICS_RECOMPUTE_SECONDS", 1))
+ANALYTICS_TOP_N = int(os.getenv("ANALYTICS_TOP_N", 10))
+# Groups reported per rollup (largest first); the summary's size stays bounded
+ANALYTICS_MAX_GROUPS = int(os.getenv("ANALYTICS_MAX_GROUPS", 50))
+
+ROLLUP_ATTRIBUTES = ('company', 'city', 'state', 'job_title')
+COUNT_ATTRIBUTES = ('events_hosted', 'events_attended')
+PERCENTILES = (50, 90, 95, 99)
+# A user without the attribute falls in this group
+UNKNOWN_GROUP = None
+
+_PROJECTED = ('id', 'email', 'firstName', 'lastName') + ROLLUP_ATTRIBUTES + tuple(f'{attr}_count' for attr in COUNT_ATTRIBUTES)
+
+
+class EngagementColumns:
+    """
+    Columnar copy of the users' engagement attributes: one NumPy array per
+    counter and one array of group codes per rollup attribute.
+    """
+
+    def __init__(self, items: List[dict]):
+        self.ids = [item['id'] for item in items]
+        self.names = [(item.get('firstName'), item.get('lastName')) for item in items]
+        self.positions: Dict[str, int] = {user_id: position for position, user_id in enumerate(self.ids)}
+        self.counts = {
+            attr: np.fromiter((int(item.get(f'{attr}_count', 0)) for item in items), dtype=np.int64, count=len(items))
+            for attr in COUNT_ATTRIBUTES
+        }
+        self.groups = {}
+        self.codes = {}
+        for attr in ROLLUP_ATTRIBUTES:
+            values = [item.get(attr) or '' for item in items]
+            groups, codes = np.unique(np.array(values, dtype=object), return_inverse=True) if values else ([], np.zeros(0, dtype=np.int64))
+            self.groups[attr] = [group or UNKNOWN_GROUP for group in groups]
+            self.codes[attr] = codes
+
+    def __len__(self):
+        return len(self.ids)
+
+    def increment(self, user_id: str, attr: str, amount: int = 1) -> bool:
+        """
+        Add to a user's counter. Returns False for users not loaded yet.
+        """
+        position = self.positions.get(user_id)
+        if position is None:
+            return False
+        self.counts[attr][position] += amount
+        return True
+
+
+def _distribution(counts: np.ndarray) -> dict:
+    """
+    Mean, max, percentiles and a power-of-two histogram (0, 1, 2-3, 4-7, ...).
+    """
+    if not len(counts):
+        return {'mean': 0.0, 'max': 0, 'percentiles': {f'p{p}': 0.0 for p in PERCENTILES}, 'histogram': []}
+    top = int(counts.max())
+    edges = np.concatenate(([0], 2 ** np.arange(int(top).bit_length() + 1)))
+    users, _ = np.histogram(counts, bins=edges)
+    return {
+        'mean': round(float(counts.mean()), 3),
+        'max': top,
+        'percentiles': {f'p{p}': float(value) for p, value in zip(PERCENTILES, np.percentile(counts, PERCENTILES))},
+        'histogram': [
+            {'min': int(low), 'max': int(high) - 1, 'users': int(n)}
+            for low, high, n in zip(edges[:-1], edges[1:], users)
+        ]
+    }
+
+
+def _rollup(columns: EngagementColumns, attr: str) -> dict:
+    """
+    Users, counter totals and averages per group, the largest groups first.
+    """
+    codes, groups = columns.codes[attr], columns.groups[attr]
+    users = np.bincount(codes, minlength=len(groups))
+    totals = {name: np.bincount(codes, weights=columns.counts[name], minlength=len(groups)) for name in COUNT_ATTRIBUTES}
+    order = np.argsort(-users, kind='stable')[:ANALYTICS_MAX_GROUPS]
+    rows = []
+    for code in order:
+        row = {'value': groups[code], 'users': int(users[code])}
+        for name in COUNT_ATTRIBUTES:
+            row[name] = int(totals[name][code])
+            row[f'avg_{name}'] = round(float(totals[name][code] / users[code]), 3)
+        rows.append(row)
+    return {'groups': len(groups), 'rows': rows}
+
+
+def _top_users(columns: EngagementColumns, attr: str, n: int) -> List[dict]:
+    """
+    The n users with the highest counter (ties in load order), via argpartition.
+    """
+    counts = columns.counts[attr]
+    n = min(n, len(counts))
+    if n <= 0:
+        return []
+    candidates = np.argpartition(-counts, n - 1)[:n]
+    ranked = candidates[np.lexsort((candidates, -counts[candidates]))]
+    return [{
+        'user_id': columns.ids[position],
+        'firstName': columns.names[position][0],
+        'lastName': columns.names[position][1],
+        **{name: int(columns.counts[name][position]) for name in COUNT_ATTRIBUTES}
+    } for position in ranked]
+
+
+def summarize(columns: EngagementColumns, top_n: int = None) -> dict:
+    """
+    Compute the engagement summary from the columns.
+    """
+    top_n = ANALYTICS_TOP_N if top_n is None else top_n
+    return {
+        'users': len(columns),
+        'totals': {attr: int(columns.counts[attr].sum()) for attr in COUNT_ATTRIBUTES},
+        'distributions': {attr: _distribution(columns.counts[attr]) for attr in COUNT_ATTRIBUTES},
+        'rollups': {attr: _rollup(columns, attr) for attr in ROLLUP_ATTRIBUTES},
+        'top_users': {attr: _top_users(columns, attr, top_n) for attr in COUNT_ATTRIBUTES},
+    }
+
+
+def load_columns(db) -> EngagementColumns:
+    """
+    Read the engagement attributes of every user with a parallel segmented scan.
+    """
+    names = {f'#a{position}': name for position, name in enumerate(_PROJECTED)}
+    items = scan_table(db.Table('users'), ProjectionExpression=', '.join(names), ExpressionAttributeNames=names)
+    # Skip placeholder items created by host/attendee updates for unknown user ids
+    return EngagementColumns([item for item in items if 'email' in item])
+
+
+class EngagementAnalytics:
+    """
+    Snapshot store: the loaded columns, the last computed summary and when
+    each was produced.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._columns: Optional[EngagementColumns] = None
+        self._snapshot: Optional[dict] = None
+        self._refreshed_at = 0.0
+        self._computed_at = 0.0
+        self._dirty = False
+
+    def refresh(self, db) -> dict:
+        """
+        Reload the columns from DynamoDB and recompute the snapshot.
+        """
+        columns = load_columns(db)
+        now = self._clock()
+        with self._lock:
+            self._columns = columns
+            self._refreshed_at = now
+            self._dirty = False
+            return self._compute(now)
+
+    def _compute(self, now: float) -> dict:
+        """
+        Caller holds the lock.
+        """
+        self._snapshot = {'refreshed_at': self._refreshed_at, 'computed_at': now, **summarize(self._columns)}
+        self._computed_at = now
+        return self._snapshot
+
+    def record(self, user_id: str, attr: str, amount: int = 1):
+        """
+        Apply a counter change made by a write in this process.
+        """
+        with self._lock:
+            if self._columns is not None and self._columns.increment(user_id, attr, amount):
+                self._dirty = True
+
+    def snapshot(self, db) -> dict:
+        """
+        The current summary. Refreshes from DynamoDB when there is no snapshot
+        or it is older than ANALYTICS_REFRESH_SECONDS (one request refreshes
+        while the others keep serving the previous snapshot), and recomputes
+        from the columns when writes arrived since the last computation.
+        """
+        now = self._clock()
+        stale = self._snapshot is None or now - self._refreshed_at >= ANALYTICS_REFRESH_SECONDS
+        if stale and self._refresh_lock.acquire(blocking=self._snapshot is None):
+            try:
+                if self._snapshot is None or self._clock() - self._refreshed_at >= ANALYTICS_REFRESH_SECONDS:
+                    return self.refresh(db)
+            finally:
+                self._refresh_lock.release()
+        with self._lock:
+            if self._dirty and now - self._computed_at >= ANALYTICS_RECOMPUTE_SECONDS:
+                self._dirty = False
+                return self._compute(now)
+            return self._snapshot
+
+
+engagement = EngagementAnalytics()
+
+
+def record_engagement(user_id: str, attr: str, amount: int = 1):
+    """
+    Hook for service writes: a user hosted (events_hosted) or registered for
+    (events_attended) `amount` more events.
+    """
+    engagement.record(user_id, attr, amount)
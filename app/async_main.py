@@ -0,0 +1,163 @@
+"""
+async_main.py
+Async mode: the same API as app.main, with the hot request paths served by
+`async def` endpoints on aioboto3, so one worker is not limited to
+THREADPOOL_SIZE requests in flight.
+
+Run with:
+    uvicorn app.async_main:app
+
+Only these routes are native `async def` handlers:
+    POST /users, GET /users/{user_id}, GET /users/{user_id}/events,
+    POST /users/{user_id}/events/{event_id}/register, POST /events,
+    GET /events/{event_id}, GET /events/{event_id}/attendees
+Every other endpoint keeps its sync handler from app.main (run in the
+threadpool, on boto3), in the same route order. POST /send-emails queues the
+same background job as in sync mode; its emails go out over the async SMTP
+pool on this app's event loop (see jobs.EmailJobManager.send_on_event_loop).
+"""
+
+import asyncio
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from typing import Optional
+
+from . import async_service, database, dependencies, email_utils, jobs, main, schemas, service
+from .etags import not_modified
+from .pagination import InvalidCursor
+from .responses import ORJSONResponse
+
+router = APIRouter()
+
+
+async def _page(page_fn, *args):
+    try:
+        return await page_fn(*args)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/users", response_model=schemas.UserOut , tags=["User"])
+async def create_user(user: schemas.UserCreate, db=Depends(dependencies.get_async_db)):
+    """
+    Create a new user.
+    """
+    return await async_service.create_user(db, user)
+
+@router.get("/users/{user_id}", response_model=schemas.UserOut , tags=["User"])
+async def get_user(user_id: str, request: Request, response: Response, db=Depends(dependencies.get_async_db)):
+    """
+    Retrieve a user by user_id.
+    Returns an ETag; send it back as If-None-Match to get 304 when unchanged.
+    """
+    user = await async_service.get_user(db, user_id)
+    return not_modified(request, response, user.get('version')) or user
+
+@router.get("/users/{user_id}/events", response_model=schemas.RegistrationPage , tags=["User"])
+async def get_user_events(
+    user_id: str,
+    limit: int = Query(main.DEFAULT_PAGE_SIZE, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db=Depends(dependencies.get_async_db)
+):
+    """
+    Events a user is registered for, one page at a time (pass `next_cursor` back as `cursor`).
+    """
+    return await _page(async_service.get_user_events_page, db, user_id, limit, cursor)
+
+@router.post("/users/{user_id}/events/{event_id}/register", tags=["User"])
+async def register_user_for_event(user_id: str, event_id: str, db=Depends(dependencies.get_async_db)):
+    """
+    Register a user for an event. Registering again is a no-op ("already_registered");
+    a full event returns 409.
+    """
+    try:
+        return await async_service.register_event(db, event_id, user_id)
+    except service.NotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except service.EventFull as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/events", response_model=schemas.EventOut , tags=["Event"])
+async def create_event(event: schemas.EventCreate, db=Depends(dependencies.get_async_db)):
+    """
+    Create a new event. Slugs are unique: a slug already in use returns 409.
+    """
+    try:
+        return await async_service.create_event(db, event)
+    except service.SlugTaken as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/events/{event_id}", response_model=schemas.EventOut, responses=main.EXPANDED_EVENT_DOC , tags=["Event"])
+async def get_event(
+    event_id: str,
+    request: Request,
+    response: Response,
+    expand: Optional[str] = None,
+    db=Depends(dependencies.get_async_db)
+):
+    """
+    Retrieve an event by event_id.
+    Returns an ETag; send it back as If-None-Match to get 304 when unchanged.
+    `expand=attendees,hosts` adds attendee_users / host_users (resolved with
+    the sync batch loader in the threadpool).
+    """
+    fields = main._expand_fields(expand)
+    event = await async_service.get_event(db, event_id)
+    if fields:
+        expanded = await run_in_threadpool(service.expand_events, database.get_dynamodb_resource(), [event], fields)
+        return ORJSONResponse(schemas.EXPANDED_EVENT_SHAPE.rows(expanded)[0])
+    return not_modified(request, response, event.get('version')) or event
+
+@router.get("/events/{event_id}/attendees", response_model=schemas.RegistrationPage , tags=["Event"])
+async def get_event_attendees(
+    event_id: str,
+    limit: int = Query(main.DEFAULT_PAGE_SIZE, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db=Depends(dependencies.get_async_db)
+):
+    """
+    Users registered for an event, one page at a time (pass `next_cursor` back as `cursor`).
+    """
+    return await _page(async_service.get_event_attendees_page, db, event_id, limit, cursor)
+
+
+def _route_key(route: APIRoute):
+    return route.path, frozenset(route.methods)
+
+
+def build_app() -> FastAPI:
+    """
+    Copy app.main's routes, replacing those with an async implementation in place.
+    """
+    async_app = FastAPI(default_response_class=ORJSONResponse)
+    replacements = {_route_key(route): route for route in router.routes}
+    for route in main.app.routes:
+        if isinstance(route, APIRoute):
+            async_app.router.routes.append(replacements.pop(_route_key(route), route))
+    async_app.router.routes.extend(replacements.values())
+    return async_app
+
+
+app = build_app()
+
+
+@app.on_event("startup")
+async def open_async_clients():
+    """
+    Run app.main's startup (threadpool size, warm-up, user index, job resume),
+    open the aioboto3 resource on the serving event loop and send campaign
+    emails through the async SMTP pool on that loop.
+    """
+    jobs.get_job_manager().send_on_event_loop(asyncio.get_running_loop())
+    main.configure_runtime()
+    await database.open_async_dynamodb_resource()
+
+
+@app.on_event("shutdown")
+async def close_async_clients():
+    jobs.get_job_manager().send_on_event_loop(None)
+    await database.close_async_dynamodb_resource()
+    await email_utils.get_async_smtp_pool().close()
@@ -0,0 +1,146 @@
+"""
+async_service.py
+aioboto3 versions of the hot request paths served by app.async_main.
+Item building, transactions and error handling are shared with service.py so
+both modes read and write the same data the same way.
+"""
+
+import asyncio
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from . import service
+from .analytics import record_engagement
+from .batching import TRANSACT_WRITE_LIMIT
+from .cache import user_cache, event_cache
+from .pagination import decode_cursor, encode_cursor
+from .schemas import UserCreate
+from .user_index import get_user_index
+
+
+async def get_user(db, user_id):
+    """
+    Retrieve a user by user_id from the users table.
+    """
+    found, item = user_cache.peek(user_id)
+    if not found:
+        table = await db.Table('users')
+        item = (await table.get_item(Key={'id': user_id})).get('Item')
+        user_cache.put(user_id, item)
+    if not item:
+        raise Exception('User not found')
+    return service._user_out(item)
+
+
+async def get_event(db, event_id):
+    """
+    Retrieve an event by event_id from the events table.
+    """
+    found, item = event_cache.peek(event_id)
+    if not found:
+        table = await db.Table('events')
+        item = (await table.get_item(Key={'id': event_id})).get('Item')
+        event_cache.put(event_id, item)
+    if not item:
+        raise Exception('Event not found')
+    return service._event_out(item)
+
+
+async def create_user(db, user: UserCreate):
+    """
+    Create a new user in the users table.
+    """
+    user_dict = service.new_user_item(user)
+    table = await db.Table('users')
+    await table.put_item(Item=service._without_nulls(user_dict))
+    user_cache.invalidate(user_dict['id'])
+    index = get_user_index()
+    if index is not None:
+        index.put(user_dict)
+    return user_dict
+
+
+async def create_event(db, event):
+    """
+    Create a new event, its slug claim and its owner/host fan-out in one
+    transaction (then concurrent 100-action transactions beyond that), as
+    service.create_event.
+    """
+    event_dict, host_ids, actions = service.create_event_actions(event)
+    client = db.meta.client
+    try:
+        await client.transact_write_items(TransactItems=actions[:TRANSACT_WRITE_LIMIT])
+    except ClientError as e:
+        raise service.creation_error(e, event_dict['slug'])
+    await asyncio.gather(*(
+        client.transact_write_items(TransactItems=actions[start:start + TRANSACT_WRITE_LIMIT])
+        for start in range(TRANSACT_WRITE_LIMIT, len(actions), TRANSACT_WRITE_LIMIT)
+    ))
+    service._index_hosted(event_dict, host_ids)
+    return event_dict
+
+
+async def register_event(db, event_id, user_id, shards=None):
+    """
+    Register a user for an event, enforcing maxCapacity (see service.register_event).
+    """
+    events = await db.Table('events')
+    event = (await events.get_item(Key={'id': event_id}, ProjectionExpression='maxCapacity')).get('Item')
+    capacities, candidates = service.registration_shards(event, shards)
+    client = db.meta.client
+    attempt = 0
+    while candidates:
+        shard = candidates[0]
+        try:
+            await client.transact_write_items(
+                TransactItems=service.registration_transaction(event_id, user_id, shard, capacities[shard])
+            )
+            break
+        except ClientError as e:
+            outcome = service.registration_outcome(e)
+        if outcome == 'already_registered':
+            return {'event_id': event_id, 'user_id': user_id, 'status': 'already_registered'}
+        if outcome == 'user_missing':
+            raise service.NotFound('User not found')
+        if outcome == 'shard_full':
+            candidates.pop(0)
+            continue
+        attempt += 1
+        await asyncio.sleep(service.registration_backoff(event_id, attempt))
+    else:
+        raise service.EventFull('Event is full')
+    user_cache.invalidate(user_id)
+    event_cache.invalidate(event_id)
+    index = get_user_index()
+    if index is not None:
+        index.append_relation(user_id, 'events_attended')
+    record_engagement(user_id, 'events_attended')
+    return {'event_id': event_id, 'user_id': user_id, 'status': 'registered'}
+
+
+async def _query_page(db, limit, cursor, **query_kwargs):
+    table = await db.Table(service.REGISTRATIONS_TABLE)
+    start_key = decode_cursor(cursor)
+    if start_key:
+        query_kwargs['ExclusiveStartKey'] = start_key
+    response = await table.query(Limit=limit, **query_kwargs)
+    return {'items': response.get('Items', []), 'next_cursor': encode_cursor(response.get('LastEvaluatedKey'))}
+
+
+async def get_event_attendees_page(db, event_id, limit, cursor=None):
+    """
+    Retrieve one page of an event's registrations.
+    """
+    return await _query_page(db, limit, cursor, KeyConditionExpression=Key('event_id').eq(event_id))
+
+
+async def get_user_events_page(db, user_id, limit, cursor=None):
+    """
+    Retrieve one page of a user's registrations (reverse index).
+    """
+    return await _query_page(
+        db, limit, cursor,
+        IndexName=service.REGISTRATIONS_BY_USER_INDEX,
+        KeyConditionExpression=Key('user_id').eq(user_id)
+    )
@@ -0,0 +1,84 @@
+"""
+backfill_counters.py
+One-shot migration that sets events_hosted_count / events_attended_count on
+existing users: hosted from the length of their events_hosted list, attended
+from their registrations (plus any legacy events_attended list not yet
+migrated to the registrations table).
+
+Run after deploying the counters; counts are recomputed from the source data,
+so it is safe to re-run, also after migrate_registrations --drop-lists:
+    python -m app.backfill_counters
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from .database import get_dynamodb_resource, DYNAMODB_MAX_POOL_CONNECTIONS
+from .scanner import scan_table, iter_query_pages
+from .service import REGISTRATIONS_TABLE, REGISTRATIONS_BY_USER_INDEX
+
+USER_PROJECTION = 'id, events_hosted, events_attended, events_hosted_count, events_attended_count, version'
+
+
+def attended_event_ids(db, item) -> set:
+    """
+    Ids of the events a user is registered for: their registrations (read
+    from the user_id index) and any legacy events_attended entries.
+    """
+    event_ids = set(item.get('events_attended', []))
+    pages = iter_query_pages(
+        db.Table(REGISTRATIONS_TABLE),
+        IndexName=REGISTRATIONS_BY_USER_INDEX,
+        KeyConditionExpression=Key('user_id').eq(item['id']),
+        ProjectionExpression='event_id'
+    )
+    for page in pages:
+        event_ids.update(registration['event_id'] for registration in page.get('Items', []))
+    return event_ids
+
+
+def backfill_user(db, item) -> bool:
+    """
+    Set both counters for one user. The update only applies if the user's
+    version is still the one read (registrations and hosting changes bump
+    it), so a concurrent change is never overwritten; such users are re-read
+    and retried. Returns True if the item was updated.
+    """
+    table = db.Table('users')
+    while True:
+        hosted = len(item.get('events_hosted', []))
+        attended = len(attended_event_ids(db, item))
+        if item.get('events_hosted_count') == hosted and item.get('events_attended_count') == attended:
+            return False
+        version = item.get('version')
+        try:
+            table.update_item(
+                Key={'id': item['id']},
+                UpdateExpression='SET events_hosted_count = :h, events_attended_count = :a ADD version :one',
+                ConditionExpression='attribute_not_exists(version)' if version is None else 'version = :v',
+                ExpressionAttributeValues={':h': hosted, ':a': attended, ':one': 1,
+                                           **({} if version is None else {':v': version})}
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            item = table.get_item(Key={'id': item['id']}, ProjectionExpression=USER_PROJECTION).get('Item')
+            if item is None:
+                return False
+
+
+def backfill_counters(db) -> int:
+    """
+    Backfill every user in parallel. Returns the number of users updated.
+    """
+    items = scan_table(db.Table('users'), ProjectionExpression=USER_PROJECTION)
+    with ThreadPoolExecutor(max_workers=DYNAMODB_MAX_POOL_CONNECTIONS) as pool:
+        return sum(pool.map(lambda item: backfill_user(db, item), items))
+
+
+if __name__ == '__main__':
+    updated = backfill_counters(get_dynamodb_resource())
+    print(f"Backfilled counters on {updated} users.")
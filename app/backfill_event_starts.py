@@ -0,0 +1,54 @@
+"""
+backfill_event_starts.py
+One-shot migration that sets start_bucket / start_key (the start-time index
+keys used by GET /events?from=&to=) on existing events.
+
+Run once after deploying the start_bucket-index (safe to re-run):
+    python -m app.backfill_event_starts
+Events whose startAt cannot be parsed are left out of the index.
+"""
+
+from botocore.exceptions import ClientError
+
+from .batching import parallel_map
+from .database import get_dynamodb_resource
+from .scanner import scan_table
+from .service import event_start_keys
+
+
+def backfill_event(table, item) -> bool:
+    """
+    Set the start keys of one event from its startAt. The update only applies
+    while startAt is unchanged (a concurrent update sets the keys itself) and
+    bumps the version, so an If-Match with an older ETag no longer applies.
+    Returns True if the item was updated.
+    """
+    keys = event_start_keys(item['id'], item.get('startAt'))
+    if not keys or all(item.get(name) == value for name, value in keys.items()):
+        return False
+    try:
+        table.update_item(
+            Key={'id': item['id']},
+            UpdateExpression='SET start_bucket = :b, start_key = :k ADD version :one',
+            ConditionExpression='startAt = :s',
+            ExpressionAttributeValues={':b': keys['start_bucket'], ':k': keys['start_key'], ':s': item['startAt'], ':one': 1}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def backfill_event_starts(db) -> int:
+    """
+    Backfill every event in parallel. Returns the number of events updated.
+    """
+    table = db.Table('events')
+    items = scan_table(table, ProjectionExpression='id, startAt, start_bucket, start_key')
+    return sum(parallel_map(lambda item: backfill_event(table, item), items))
+
+
+if __name__ == '__main__':
+    updated = backfill_event_starts(get_dynamodb_resource())
+    print(f"Backfilled start keys on {updated} events.")
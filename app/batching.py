@@ -0,0 +1,214 @@
+"""
+batching.py
+BatchWriteItem / BatchGetItem / TransactWriteItems helpers: chunk requests to
+DynamoDB's limits, run chunks in parallel and retry unprocessed items/keys with
+exponential backoff.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+# DynamoDB accepts at most 25 put/delete requests per BatchWriteItem call
+BATCH_WRITE_LIMIT = 25
+# ... and at most 100 keys per BatchGetItem call
+BATCH_GET_LIMIT = 100
+# ... and at most 100 actions per TransactWriteItems call
+TRANSACT_WRITE_LIMIT = 100
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker = threading.local()
+
+
+def _get_executor():
+    """
+    Returns the thread pool shared by parallel batch requests.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=BATCH_CONCURRENCY, thread_name_prefix="batch", initializer=_mark_worker
+                )
+    return _executor
+
+
+def _mark_worker():
+    _worker.active = True
+
+
+def _map(fn: Callable, items: List) -> List:
+    """
+    fn(item) for every item on the shared pool. Called from one of the pool's
+    own tasks (e.g. a parallel_map function that batch-gets or fans out again),
+    the items run inline instead: a task waiting on tasks queued behind it
+    would deadlock the pool once every worker does the same.
+    """
+    if getattr(_worker, 'active', False):
+        return [fn(item) for item in items]
+    return list(_get_executor().map(fn, items))
+
+
+def _backoff(attempt: int, base_delay: float):
+    time.sleep(base_delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+class BatchWriteError(Exception):
+    """
+    Raised when items (or keys) are still unprocessed after all retries.
+    """
+
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def batch_write(db, table_name: str, items: Iterable[dict], max_attempts: int = 8, base_delay: float = 0.05) -> int:
+    """
+    Put `items` into `table_name` with BatchWriteItem, 25 at a time.
+    Unprocessed items are retried with exponential backoff and jitter.
+    Returns the number of BatchWriteItem calls made.
+    """
+    calls = 0
+    for chunk in _chunks(list(items), BATCH_WRITE_LIMIT):
+        request = {table_name: [{'PutRequest': {'Item': item}} for item in chunk]}
+        for attempt in range(max_attempts):
+            response = db.batch_write_item(RequestItems=request)
+            calls += 1
+            request = response.get('UnprocessedItems') or {}
+            if not request:
+                break
+            _backoff(attempt, base_delay)
+        else:
+            raise BatchWriteError(f"{len(request.get(table_name, []))} items unprocessed in {table_name}")
+    return calls
+
+
+def parallel_batch_write(db, table_name: str, items: List[dict]) -> int:
+    """
+    Like batch_write, but sends the 25-item chunks concurrently.
+    Returns the number of BatchWriteItem calls made.
+    """
+    chunks = list(_chunks(items, BATCH_WRITE_LIMIT))
+    if len(chunks) <= 1:
+        return batch_write(db, table_name, items)
+    return sum(_map(lambda chunk: batch_write(db, table_name, chunk), chunks))
+
+
+def parallel_map(fn: Callable, items: List) -> List:
+    """
+    fn(item) for every item, run on the shared batch thread pool (results in
+    order). fn may itself use the batch helpers; nested calls run inline.
+    """
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    return _map(fn, items)
+
+
+def _batch_get_chunk(db, table_name: str, keys: List[dict], projection: Optional[str], names: Optional[dict],
+                     max_attempts: int, base_delay: float) -> List[dict]:
+    request = {'Keys': keys}
+    if projection:
+        request['ProjectionExpression'] = projection
+    if names:
+        request['ExpressionAttributeNames'] = names
+    items = []
+    pending = {table_name: request}
+    for attempt in range(max_attempts):
+        response = db.batch_get_item(RequestItems=pending)
+        items.extend(response.get('Responses', {}).get(table_name, []))
+        pending = response.get('UnprocessedKeys') or {}
+        if not pending:
+            return items
+        _backoff(attempt, base_delay)
+    raise BatchWriteError(f"{len(pending[table_name]['Keys'])} keys unprocessed in {table_name}")
+
+
+def batch_get(
+    db,
+    table_name: str,
+    ids: Iterable[str],
+    key_name: str = 'id',
+    projection: Optional[str] = None,
+    names: Optional[dict] = None,
+    max_attempts: int = 8,
+    base_delay: float = 0.05
+) -> dict:
+    """
+    Fetch many items by id with BatchGetItem: ids are de-duplicated, split into
+    100-key requests that run in parallel, and UnprocessedKeys are retried.
+    Returns {id: item} for the ids that exist.
+    """
+    unique = list(dict.fromkeys(ids))
+    chunks = [[{key_name: i} for i in chunk] for chunk in _chunks(unique, BATCH_GET_LIMIT)]
+    fetch = lambda chunk: _batch_get_chunk(db, table_name, chunk, projection, names, max_attempts, base_delay)
+    if len(chunks) <= 1:
+        results = [fetch(chunk) for chunk in chunks]
+    else:
+        results = _map(fetch, chunks)
+    return {item[key_name]: item for items in results for item in items}
+
+
+def transact_write(db, actions: List[dict]) -> int:
+    """
+    Apply TransactWriteItems actions (low-level {'Put': ...} / {'Update': ...}
+    dicts with TableName). Up to 100 actions are applied atomically in one call;
+    longer lists are split into 100-action transactions sent concurrently, so
+    each chunk is atomic but the chunks are not atomic together.
+    Returns the number of TransactWriteItems calls made.
+    """
+    client = db.meta.client
+    chunks = list(_chunks(actions, TRANSACT_WRITE_LIMIT))
+    if len(chunks) <= 1:
+        for chunk in chunks:
+            client.transact_write_items(TransactItems=chunk)
+        return len(chunks)
+    _map(lambda chunk: client.transact_write_items(TransactItems=chunk), chunks)
+    return len(chunks)
+
+
+class BatchWriter:
+    """
+    Thread-safe buffer that writes items in 25-item BatchWriteItem calls as it
+    fills up. Call flush() (or use it as a context manager) to write the rest.
+    """
+
+    def __init__(self, db, table_name: str):
+        self.db = db
+        self.table_name = table_name
+        self.calls = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def add(self, item: dict):
+        with self._lock:
+            self._buffer.append(item)
+            if len(self._buffer) < BATCH_WRITE_LIMIT:
+                return
+            chunk, self._buffer = self._buffer, []
+        self._write(chunk)
+
+    def flush(self):
+        with self._lock:
+            chunk, self._buffer = self._buffer, []
+        if chunk:
+            self._write(chunk)
+
+    def _write(self, chunk: List[dict]):
+        calls = batch_write(self.db, self.table_name, chunk)
+        with self._lock:
+            self.calls += calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
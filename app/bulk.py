@@ -0,0 +1,242 @@
+"""
+bulk.py
+Bulk import and export of users and events.
+
+Uploads (CSV with a header row, or NDJSON) are parsed incrementally as the
+request body arrives, validated in batches of BULK_BATCH_SIZE rows and written
+with parallel BatchWriteItem chunks. While one batch is being written the next
+one is parsed, so the upload, parsing and DynamoDB writes overlap.
+"""
+
+import asyncio
+import codecs
+import csv
+import io
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+from . import service
+from .batching import parallel_batch_write, parallel_map
+from .database import DYNAMODB_MAX_POOL_CONNECTIONS
+from .pagination import json_default, ndjson_stream
+from .schemas import EventCreate, UserCreate
+from .search_index import index_event
+from .user_index import get_user_index
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 500))
+# Per-row errors returned in the import summary (the counts are always complete)
+MAX_REPORTED_ERRORS = 100
+
+# CSV cells holding lists use this separator, e.g. "hosts" = "u1;u2"
+CSV_LIST_SEPARATOR = ';'
+CSV_LIST_FIELDS = ('hosts', 'attendees', 'events_hosted', 'events_attended')
+
+USER_EXPORT_FIELDS = [
+    'id', 'firstName', 'lastName', 'email', 'job_title', 'company', 'city', 'state',
+    'events_hosted', 'events_attended',
+    'events_hosted_count', 'events_attended_count'
+]
+EVENT_EXPORT_FIELDS = [
+    'id', 'slug', 'title', 'description', 'startAt', 'endAt', 'venue', 'maxCapacity',
+    'owner', 'hosts', 'attendees'
+]
+
+
+def detect_format(content_type: Optional[str], format: Optional[str] = None) -> str:
+    """
+    "csv" or "ndjson", from an explicit format or the upload's Content-Type.
+    """
+    if format:
+        return format
+    return 'csv' if content_type and 'csv' in content_type else 'ndjson'
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]):
+    """
+    Re-split an async stream of byte chunks into complete text lines.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()  # chunks may split a multi-byte character
+    buffer = ''
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b'', final=True)
+    if buffer:
+        yield buffer
+
+
+def _csv_row(header: List[str], values: List[str]) -> dict:
+    row = {}
+    for name, value in zip(header, values):
+        if value == '':
+            continue  # empty cells are missing values
+        if name in CSV_LIST_FIELDS:
+            value = [part for part in value.split(CSV_LIST_SEPARATOR) if part]
+        row[name] = value
+    return row
+
+
+async def iter_records(chunks: AsyncIterator[bytes], format: str):
+    """
+    Yield one dict per record of an NDJSON or CSV upload without buffering the
+    whole body. Malformed NDJSON lines are yielded as ValueError instances so
+    the caller can report them against their row number.
+    """
+    if format == 'csv':
+        header, pending = None, ''
+        async for line in _iter_lines(chunks):
+            # A quoted cell may contain newlines: keep reading until the quotes balance
+            pending = f'{pending}\n{line}' if pending else line
+            if pending.count('"') % 2:
+                continue
+            record, pending = pending.rstrip('\r'), ''
+            if not record:
+                continue
+            values = next(csv.reader([record]))
+            if header is None:
+                header = [name.strip() for name in values]
+            else:
+                yield _csv_row(header, values)
+        if pending:
+            yield ValueError('Unterminated quoted CSV field')
+        return
+    async for line in _iter_lines(chunks):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f'Invalid JSON: {e}')
+
+
+def _validate(rows: List, first_row: int, model) -> tuple:
+    """
+    Validate a batch of raw rows against `model`.
+    Returns (valid models, [{'row': n, 'error': ...}] for the rest).
+    """
+    valid, errors = [], []
+    for row_number, row in enumerate(rows, start=first_row):
+        if isinstance(row, Exception):
+            errors.append({'row': row_number, 'error': str(row)})
+            continue
+        try:
+            valid.append(model(**row))
+        except (ValidationError, TypeError) as e:
+            errors.append({'row': row_number, 'error': str(e)})
+    return valid, errors
+
+
+def import_users(db, rows: List, first_row: int = 1) -> dict:
+    """
+    Validate and write one batch of users. Returns the batch summary.
+    """
+    users, errors = _validate(rows, first_row, UserCreate)
+    items = [service.new_user_item(user) for user in users]
+    parallel_batch_write(db, 'users', [service._without_nulls(item) for item in items])
+    index = get_user_index()
+    if index is not None:
+        for item in items:
+            index.put(item)
+    return {'created': len(items), 'failed': len(errors), 'errors': errors}
+
+
+def import_events(db, rows: List, first_row: int = 1) -> dict:
+    """
+    Validate and write one batch of events, then record them on their owners'
+    and hosts' events_hosted lists with a single update per host. Slugs are
+    claimed (in parallel) before the write; rows whose slug is taken fail.
+    """
+    events, errors = _validate(rows, first_row, EventCreate)
+    failed_rows = {error['row'] for error in errors}
+    row_numbers = [n for n in range(first_row, first_row + len(rows)) if n not in failed_rows]
+    items = [service.new_event_item(event) for event in events]
+
+    def claim(item):
+        try:
+            return service.claim_slug(db, item['slug'], item['id'])
+        except service.SlugTaken as e:
+            return e
+
+    claims = parallel_map(claim, items)
+    errors += [{'row': n, 'error': str(claimed)} for n, claimed in zip(row_numbers, claims) if isinstance(claimed, Exception)]
+    errors.sort(key=lambda error: error['row'])
+    kept = [position for position, claimed in enumerate(claims) if not isinstance(claimed, Exception)]
+    events, items = [events[position] for position in kept], [items[position] for position in kept]
+    parallel_batch_write(db, 'events', items)
+    for item in items:
+        index_event(item)
+    hosted = defaultdict(list)
+    for event, item in zip(events, items):
+        for host_id in dict.fromkeys([event.owner] + event.hosts):
+            hosted[host_id].append(item['id'])
+    with ThreadPoolExecutor(max_workers=DYNAMODB_MAX_POOL_CONNECTIONS) as pool:
+        list(pool.map(lambda host: service.add_hosted_events(db, host[0], host[1]), hosted.items()))
+    return {'created': len(items), 'failed': len(errors), 'errors': errors}
+
+
+async def import_stream(db, chunks: AsyncIterator[bytes], format: str, importer: Callable) -> dict:
+    """
+    Parse an upload and feed it to `importer` (import_users / import_events)
+    BULK_BATCH_SIZE rows at a time, parsing the next batch while the previous
+    one is written.
+    """
+    summary = {'created': 0, 'failed': 0, 'errors': []}
+    writing = None
+
+    async def collect(batch_task):
+        result = await batch_task
+        summary['created'] += result['created']
+        summary['failed'] += result['failed']
+        summary['errors'].extend(result['errors'][:MAX_REPORTED_ERRORS - len(summary['errors'])])
+
+    batch, first_row, row_number = [], 1, 0
+    async for record in iter_records(chunks, format):
+        row_number += 1
+        batch.append(record)
+        if len(batch) < BULK_BATCH_SIZE:
+            continue
+        if writing is not None:
+            await collect(writing)
+        writing = asyncio.ensure_future(run_in_threadpool(importer, db, batch, first_row))
+        batch, first_row = [], row_number + 1
+    if writing is not None:
+        await collect(writing)
+    if batch:
+        await collect(run_in_threadpool(importer, db, batch, first_row))
+    return summary
+
+
+def _csv_cell(value):
+    if isinstance(value, (list, set)):
+        return CSV_LIST_SEPARATOR.join(str(part) for part in value)
+    return json_default(value) if isinstance(value, Decimal) else value
+
+
+def export_lines(pages: Iterable[List[dict]], format: str, fields: List[str]):
+    """
+    Yield an export as chunks, one per scanned page.
+    CSV exports have a header row and join list cells with ';'.
+    """
+    if format != 'csv':
+        yield from ndjson_stream(pages)
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    yield buffer.getvalue()
+    for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows({name: _csv_cell(item.get(name)) for name in fields} for item in page)
+        if buffer.tell():
+            yield buffer.getvalue()
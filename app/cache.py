@@ -0,0 +1,185 @@
+"""
+cache.py
+Bounded, thread-safe read-through cache for single-item reads (get_user /
+get_event): LRU eviction, a TTL per entry, negative caching of missing ids and
+request coalescing, so concurrent misses for one key trigger a single fetch.
+
+The cache is per process; writes made through this process invalidate their
+entries, while the TTL bounds how stale another worker's copy can get.
+"""
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", 10000))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 30))
+CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", 5))
+
+# Cached value of a key that does not exist
+MISSING = None
+
+
+class _Pending:
+    """
+    A fetch in progress that concurrent readers of the same key wait on.
+    """
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ReadThroughCache:
+    """
+    Caches loader(key) results. Values are deep-copied in and out, so callers
+    may mutate what they get back. A loader result of None (item not found) is
+    cached for `negative_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = None,
+        ttl: float = None,
+        negative_ttl: float = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.maxsize = CACHE_MAXSIZE if maxsize is None else maxsize
+        self.ttl = CACHE_TTL_SECONDS if ttl is None else ttl
+        self.negative_ttl = CACHE_NEGATIVE_TTL_SECONDS if negative_ttl is None else negative_ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = self.evictions = self.expirations = 0
+
+    def _lookup(self, key):
+        """
+        (True, value) for a fresh entry, else (False, None). Caller holds the lock.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[1]
+
+    def _store(self, key, value):
+        """
+        Caller holds the lock.
+        """
+        ttl = self.ttl if value is not MISSING else self.negative_ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        self._entries[key] = (self._clock() + ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, loader: Callable):
+        """
+        Return the cached value for key, calling loader(key) on a miss. Only one
+        thread loads a given key at a time; the others wait for its result.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return copy.deepcopy(value)
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                self.misses += 1
+                pending = self._pending[key] = _Pending()
+            else:
+                self.coalesced += 1
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return copy.deepcopy(pending.value)
+        try:
+            pending.value = loader(key)
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                # An invalidation during the load detached this fetch: don't cache its result
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+                    if pending.error is None:
+                        self._store(key, pending.value)
+            pending.done.set()
+        return copy.deepcopy(pending.value)
+
+    def peek(self, key):
+        """
+        (True, value) if key is cached and fresh, else (False, None); counts as a hit or miss.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return True, copy.deepcopy(value)
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        """
+        Cache a value fetched outside get() (e.g. by an async reader).
+        """
+        with self._lock:
+            if key not in self._pending:
+                self._store(key, value)
+
+    def invalidate(self, *keys):
+        """
+        Drop entries (and detach in-flight fetches) after a write.
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._pending.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+user_cache = ReadThroughCache('users', maxsize=CACHE_MAXSIZE if CACHE_ENABLED else 0)
+event_cache = ReadThroughCache('events', maxsize=CACHE_MAXSIZE if CACHE_ENABLED else 0)
+
+
+def cache_stats() -> dict:
+    """
+    Counters of every read-through cache, by name.
+    """
+    return {cache.name: cache.stats() for cache in (user_cache, event_cache)}
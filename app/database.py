@@ -6,21 +6,153 @@ Handles DynamoDB connection setup and provides resource access.
 
 import boto3
 import os
+import threading
+from contextlib import AsyncExitStack
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from dotenv import load_dotenv
 
+from . import metrics
+
 load_dotenv()
 
 DYNAMODB_LOCAL_URL = os.environ["DYNAMODB_LOCAL_URL"]
 AWS_REGION = os.environ["AWS_DEFAULT_REGION"]
 
-def get_dynamodb_resource():
+# Size of the worker threadpool that runs sync endpoints (Starlette's default is 40).
+# The botocore connection pool is sized to match so no request waits for a socket.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", 40))
+DYNAMODB_MAX_POOL_CONNECTIONS = int(os.getenv("DYNAMODB_MAX_POOL_CONNECTIONS", THREADPOOL_SIZE))
+DYNAMODB_CONNECT_TIMEOUT = float(os.getenv("DYNAMODB_CONNECT_TIMEOUT", 2))
+DYNAMODB_READ_TIMEOUT = float(os.getenv("DYNAMODB_READ_TIMEOUT", 10))
+DYNAMODB_MAX_ATTEMPTS = int(os.getenv("DYNAMODB_MAX_ATTEMPTS", 3))
+DYNAMODB_TCP_KEEPALIVE = os.getenv("DYNAMODB_TCP_KEEPALIVE", "true").lower() in ("1", "true", "yes")
+DYNAMODB_WARMUP = os.getenv("DYNAMODB_WARMUP", "false").lower() in ("1", "true", "yes")
+
+# Async mode (app.async_main) keeps far more requests in flight than there are
+# threads, so its connection pool is sized separately.
+DYNAMODB_ASYNC_MAX_POOL_CONNECTIONS = int(os.getenv("DYNAMODB_ASYNC_MAX_POOL_CONNECTIONS", 200))
+
+_resource = None
+_resource_lock = threading.Lock()
+_async_resource = None
+_async_stack = None
+
+
+def _client_config(config_class=Config, max_pool_connections=None):
     """
-    Returns a DynamoDB resource instance (local or AWS).
+    Builds the botocore config shared by every DynamoDB call in this process.
     """
-    return boto3.resource(
+    return config_class(
+        max_pool_connections=max_pool_connections or DYNAMODB_MAX_POOL_CONNECTIONS,
+        connect_timeout=DYNAMODB_CONNECT_TIMEOUT,
+        read_timeout=DYNAMODB_READ_TIMEOUT,
+        retries={'max_attempts': DYNAMODB_MAX_ATTEMPTS, 'mode': 'standard'},
+        tcp_keepalive=DYNAMODB_TCP_KEEPALIVE,
+    )
+
+
+def create_dynamodb_resource():
+    """
+    Builds a new DynamoDB resource with its own session and connection pool.
+    Prefer get_dynamodb_resource(), which reuses one resource per process.
+    """
+    session = boto3.session.Session()
+    resource = session.resource(
         'dynamodb',
         region_name=AWS_REGION,
         endpoint_url=DYNAMODB_LOCAL_URL,
         aws_access_key_id='dummy',  # Any value for local
-        aws_secret_access_key='dummy'  # Any value for local
+        aws_secret_access_key='dummy',  # Any value for local
+        config=_client_config()
     )
+    metrics.instrument(resource.meta.client)
+    return resource
+
+
+def get_dynamodb_resource():
+    """
+    Returns the process-wide DynamoDB resource instance (local or AWS).
+
+    The resource is created once and shared by all threads. Callers only use it
+    to build Table objects per call, so the shared state is the underlying
+    low-level client, which is thread-safe and owns the keep-alive connection pool.
+    """
+    global _resource
+    if _resource is None:
+        with _resource_lock:
+            if _resource is None:
+                _resource = create_dynamodb_resource()
+    return _resource
+
+
+def get_dynamodb_client():
+    """
+    Returns the low-level client behind the shared resource.
+    """
+    return get_dynamodb_resource().meta.client
+
+
+def warm_up(connections: int = None):
+    """
+    Opens pooled connections ahead of the first request by issuing cheap
+    concurrent ListTables calls, so credential resolution and TCP setup
+    are paid at startup rather than on the first user requests.
+    """
+    client = get_dynamodb_client()
+    connections = connections or DYNAMODB_MAX_POOL_CONNECTIONS
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        list(pool.map(lambda _: client.list_tables(Limit=1), range(connections)))
+
+
+def reset_dynamodb_resource():
+    """
+    Drops the shared resource so the next call builds a new one (e.g. after fork).
+    """
+    global _resource
+    with _resource_lock:
+        _resource = None
+
+
+async def open_async_dynamodb_resource():
+    """
+    Opens the process-wide aioboto3 DynamoDB resource used by async mode.
+    Call once at startup (from the event loop that serves requests).
+    """
+    global _async_resource, _async_stack
+    import aioboto3
+    from aiobotocore.config import AioConfig
+
+    if _async_resource is not None:
+        return _async_resource
+    stack = AsyncExitStack()
+    _async_resource = await stack.enter_async_context(aioboto3.Session().resource(
+        'dynamodb',
+        region_name=AWS_REGION,
+        endpoint_url=DYNAMODB_LOCAL_URL,
+        aws_access_key_id='dummy',  # Any value for local
+        aws_secret_access_key='dummy',  # Any value for local
+        config=_client_config(AioConfig, DYNAMODB_ASYNC_MAX_POOL_CONNECTIONS)
+    ))
+    metrics.instrument(_async_resource.meta.client)
+    _async_stack = stack
+    return _async_resource
+
+
+def get_async_dynamodb_resource():
+    """
+    Returns the aioboto3 resource opened by open_async_dynamodb_resource().
+    """
+    if _async_resource is None:
+        raise RuntimeError("Async DynamoDB resource is not open; run the app.async_main application")
+    return _async_resource
+
+
+async def close_async_dynamodb_resource():
+    """
+    Closes the async resource and its connection pool.
+    """
+    global _async_resource, _async_stack
+    if _async_stack is not None:
+        await _async_stack.aclose()
+    _async_resource = _async_stack = None
@@ -11,10 +11,17 @@ without having to repeat it in each route.
 """
 
 from fastapi import Depends
-from .database import get_dynamodb_resource
+from .database import get_dynamodb_resource, get_async_dynamodb_resource
 
 def get_db():
     """
-    Dependency that provides a DynamoDB resource instance.
+    Dependency that provides the shared DynamoDB resource instance.
+    The resource (and its connection pool) is reused across requests.
     """
     return get_dynamodb_resource()
+
+async def get_async_db():
+    """
+    Dependency that provides the shared aioboto3 DynamoDB resource (async mode).
+    """
+    return get_async_dynamodb_resource()
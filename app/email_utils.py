@@ -1,13 +1,22 @@
 """
 email_utils.py
 Utility functions for sending real emails using SMTP.
+Messages go through a pool of authenticated SMTP sessions that are reused across
+messages instead of opening a connection (and TLS handshake) per email.
+AsyncSMTPPool is the asyncio (aiosmtplib) counterpart used in async mode.
 """
 
+import asyncio
 import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 import logging
+from typing import Iterable, List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,6 +26,11 @@ SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 SENDER_EMAIL = os.getenv("SENDER_EMAIL", SMTP_USER)
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 4))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", 60))
+SMTP_MAX_MESSAGES_PER_SESSION = int(os.getenv("SMTP_MAX_MESSAGES_PER_SESSION", 100))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 30))
 
 # Configure logging
 logger = logging.getLogger("event_crm.email")
@@ -27,25 +41,397 @@ handler.setFormatter(formatter)
 if not logger.hasHandlers():
     logger.addHandler(handler)
 
+# Errors after which a session is discarded and the message retried on a new one
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
 
-def send_email(to_email: str, subject: str, body: str):
+
+def build_message(to_email: str, subject: str, body: str, sender: str = None) -> MIMEMultipart:
     """
-    Send a real email using SMTP server credentials from environment variables.
+    Build a plain-text email message.
     """
     msg = MIMEMultipart()
-    msg["From"] = SENDER_EMAIL
+    msg["From"] = sender or SENDER_EMAIL
     msg["To"] = to_email
     msg["Subject"] = subject
     msg.attach(MIMEText(body, "plain"))
+    return msg
+
+
+class _Session:
+    """
+    One open SMTP connection plus its usage bookkeeping.
+    """
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """
+    Pool of up to `size` authenticated SMTP sessions.
+
+    Sessions are opened on demand (connect, STARTTLS, login once), reused for up
+    to `max_messages_per_session` messages, replaced when the server drops them,
+    and closed after `idle_timeout` seconds without use.
+    """
+
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        sender: Optional[str] = None,
+        size: int = None,
+        starttls: bool = None,
+        idle_timeout: float = None,
+        max_messages_per_session: int = None,
+        timeout: float = None
+    ):
+        self.host = host or SMTP_HOST
+        self.port = port or SMTP_PORT
+        self.user = user
+        self.password = password
+        self.sender = sender or SENDER_EMAIL or user
+        self.size = size or SMTP_POOL_SIZE
+        self.starttls = SMTP_STARTTLS if starttls is None else starttls
+        self.idle_timeout = SMTP_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.max_messages_per_session = max_messages_per_session or SMTP_MAX_MESSAGES_PER_SESSION
+        self.timeout = timeout or SMTP_TIMEOUT
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._reaper = None
+        self.sessions_opened = 0
+
+    def _connect(self) -> _Session:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.user:
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        with self._cond:
+            self.sessions_opened += 1
+        return _Session(smtp)
+
+    @staticmethod
+    def _quit(session: _Session):
+        try:
+            session.smtp.quit()
+        except Exception:
+            session.smtp.close()
+
+    def _start_reaper(self):
+        if self._reaper is None and self.idle_timeout > 0:
+            self._reaper = threading.Thread(target=self._reap_idle, name="smtp-reaper", daemon=True)
+            self._reaper.start()
 
-    try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.sendmail(SENDER_EMAIL, to_email, msg.as_string())
-        logger.info(f"Email sent to {to_email}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send email to {to_email}: {e}")
+    def _reap_idle(self):
+        while not self._closed:
+            time.sleep(max(self.idle_timeout / 2, 0.05))
+            self.close_idle()
+
+    def _acquire(self) -> _Session:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("SMTP pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._open < self.size:
+                    self._open += 1
+                    self._start_reaper()
+                    break
+                self._cond.wait()
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, session: _Session, healthy: bool = True):
+        session.last_used = time.monotonic()
+        if healthy and session.sent >= self.max_messages_per_session:
+            self._quit(session)
+            healthy = False
+        elif not healthy:
+            session.smtp.close()
+        with self._cond:
+            if healthy and not self._closed:
+                self._idle.append(session)
+            else:
+                self._open -= 1
+                if healthy:
+                    self._quit(session)
+            self._cond.notify()
+
+    def _send_on(self, session: _Session, to_email: str, subject: str, body: str):
+        msg = build_message(to_email, subject, body, self.sender)
+        session.smtp.sendmail(self.sender, to_email, msg.as_string())
+        session.sent += 1
+
+    def send(self, to_email: str, subject: str, body: str) -> bool:
+        """
+        Send one message on a pooled session, retrying once on a fresh session
+        if the pooled one turns out to be disconnected.
+        """
+        for attempt in range(2):
+            try:
+                session = self._acquire()
+            except Exception as e:
+                logger.error(f"Failed to send email to {to_email}: {e}")
+                return False
+            try:
+                self._send_on(session, to_email, subject, body)
+            except _CONNECTION_ERRORS as e:
+                self._release(session, healthy=False)
+                if attempt == 0:
+                    continue
+                logger.error(f"Failed to send email to {to_email}: {e}")
+                return False
+            except smtplib.SMTPException as e:
+                # Rejected message (e.g. bad recipient): the session itself is still usable
+                self._release(session)
+                logger.error(f"Failed to send email to {to_email}: {e}")
+                return False
+            except Exception as e:
+                self._release(session, healthy=False)
+                logger.error(f"Failed to send email to {to_email}: {e}")
+                return False
+            self._release(session)
+            logger.info(f"Email sent to {to_email}")
+            return True
         return False
 
+    def send_batch(self, recipients: Iterable[str], subject: str, body: str) -> List[bool]:
+        """
+        Send the same message to many recipients, spreading them over up to
+        `size` sessions that each send many messages back to back.
+        Returns one success flag per recipient, in order.
+        """
+        recipients = list(recipients)
+        if not recipients:
+            return []
+        workers = min(self.size, len(recipients))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smtp") as pool:
+            return list(pool.map(lambda to_email: self.send(to_email, subject, body), recipients))
+
+    def close_idle(self, max_idle: float = None):
+        """
+        Close sessions that have been idle longer than max_idle (default idle_timeout).
+        """
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        stale = []
+        with self._cond:
+            keep = deque()
+            for session in self._idle:
+                (stale if now - session.last_used >= max_idle else keep).append(session)
+            self._idle = keep
+            self._open -= len(stale)
+            self._cond.notify_all()
+        for session in stale:
+            self._quit(session)
+
+    def close(self):
+        """
+        Close every idle session and refuse further sends.
+        """
+        with self._cond:
+            self._closed = True
+            sessions = list(self._idle)
+            self._idle.clear()
+            self._open -= len(sessions)
+            self._cond.notify_all()
+        for session in sessions:
+            self._quit(session)
+
+
+class AsyncSMTPPool:
+    """
+    asyncio pool of up to `size` authenticated aiosmtplib sessions, with the
+    same reuse rules as SMTPPool: sessions are reused for up to
+    `max_messages_per_session` messages, replaced when the server drops them,
+    and reopened when they sat idle longer than `idle_timeout`.
+    """
+
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        sender: Optional[str] = None,
+        size: int = None,
+        starttls: bool = None,
+        idle_timeout: float = None,
+        max_messages_per_session: int = None,
+        timeout: float = None
+    ):
+        self.host = host or SMTP_HOST
+        self.port = port or SMTP_PORT
+        self.user = user
+        self.password = password
+        self.sender = sender or SENDER_EMAIL or user
+        self.size = size or SMTP_POOL_SIZE
+        self.starttls = SMTP_STARTTLS if starttls is None else starttls
+        self.idle_timeout = SMTP_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.max_messages_per_session = max_messages_per_session or SMTP_MAX_MESSAGES_PER_SESSION
+        self.timeout = timeout or SMTP_TIMEOUT
+        self._idle = []
+        self._slots = None
+        self.sessions_opened = 0
+
+    async def _connect(self) -> _Session:
+        import aiosmtplib
+
+        smtp = aiosmtplib.SMTP(hostname=self.host, port=self.port, timeout=self.timeout, start_tls=self.starttls)
+        await smtp.connect()
+        try:
+            if self.user:
+                await smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.sessions_opened += 1
+        return _Session(smtp)
+
+    async def _acquire(self) -> _Session:
+        while self._idle:
+            session = self._idle.pop()
+            if self.idle_timeout <= 0 or time.monotonic() - session.last_used < self.idle_timeout:
+                return session
+            session.smtp.close()
+        return await self._connect()
+
+    async def _release(self, session: _Session):
+        session.last_used = time.monotonic()
+        if session.sent >= self.max_messages_per_session:
+            try:
+                await session.smtp.quit()
+            except Exception:
+                session.smtp.close()
+        else:
+            self._idle.append(session)
+
+    async def send(self, to_email: str, subject: str, body: str) -> bool:
+        """
+        Send one message on a pooled session, retrying once on a fresh session
+        if the pooled one turns out to be disconnected.
+        """
+        import aiosmtplib
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            for attempt in range(2):
+                try:
+                    session = await self._acquire()
+                except Exception as e:
+                    logger.error(f"Failed to send email to {to_email}: {e}")
+                    return False
+                try:
+                    msg = build_message(to_email, subject, body, self.sender)
+                    await session.smtp.send_message(msg, sender=self.sender, recipients=[to_email])
+                    session.sent += 1
+                except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, ConnectionError, TimeoutError) as e:
+                    session.smtp.close()
+                    if attempt == 0:
+                        continue
+                    logger.error(f"Failed to send email to {to_email}: {e}")
+                    return False
+                except aiosmtplib.SMTPException as e:
+                    # Rejected message (e.g. bad recipient): the session itself is still usable
+                    await self._release(session)
+                    logger.error(f"Failed to send email to {to_email}: {e}")
+                    return False
+                await self._release(session)
+                logger.info(f"Email sent to {to_email}")
+                return True
+        return False
+
+    async def send_batch(self, recipients: Iterable[str], subject: str, body: str) -> List[bool]:
+        """
+        Send the same message to many recipients concurrently over up to `size`
+        sessions. Returns one success flag per recipient, in order.
+        """
+        return list(await asyncio.gather(*(self.send(to_email, subject, body) for to_email in recipients)))
+
+    async def close(self):
+        """
+        Close every idle session.
+        """
+        sessions, self._idle = self._idle, []
+        for session in sessions:
+            try:
+                await session.smtp.quit()
+            except Exception:
+                session.smtp.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPPool:
+    """
+    Returns the process-wide SMTP pool configured from environment variables.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SMTPPool(SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SENDER_EMAIL)
+    return _pool
+
+
+def send_email(to_email: str, subject: str, body: str):
+    """
+    Send a real email using SMTP server credentials from environment variables.
+    """
+    return get_smtp_pool().send(to_email, subject, body)
+
+
+def send_emails(recipients: Iterable[str], subject: str, body: str) -> List[bool]:
+    """
+    Send the same email to a batch of recipients over the shared SMTP pool.
+    """
+    return get_smtp_pool().send_batch(recipients, subject, body)
+
+
+_async_pool = None
+
+
+def get_async_smtp_pool() -> AsyncSMTPPool:
+    """
+    Returns the process-wide async SMTP pool configured from environment variables.
+    """
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncSMTPPool(SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SENDER_EMAIL)
+    return _async_pool
+
+
+async def send_email_async(to_email: str, subject: str, body: str) -> bool:
+    """
+    Send one email over the shared async SMTP pool.
+    """
+    return await get_async_smtp_pool().send(to_email, subject, body)
+
+
+async def send_emails_async(recipients: Iterable[str], subject: str, body: str) -> List[bool]:
+    """
+    Send the same email to a batch of recipients over the shared async SMTP pool.
+    """
+    return await get_async_smtp_pool().send_batch(recipients, subject, body)
@@ -0,0 +1,52 @@
+"""
+etags.py
+ETag helpers for versioned users and events: reads answer If-None-Match with
+304 Not Modified, and writes turn If-Match into a version condition.
+"""
+
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response
+
+
+def etag_for(version) -> str:
+    """
+    Strong ETag for an item version.
+    """
+    return f'"{int(version or 0)}"'
+
+
+def _tags(header: str):
+    for tag in header.split(','):
+        tag = tag.strip()
+        yield tag[2:] if tag.startswith('W/') else tag
+
+
+def not_modified(request: Request, response: Response, version) -> Optional[Response]:
+    """
+    Set the ETag on `response`; return a 304 response instead if the client's
+    If-None-Match already names this version.
+    """
+    etag = etag_for(version)
+    response.headers['ETag'] = etag
+    header = request.headers.get('if-none-match')
+    if header and any(tag in (etag, '*') for tag in _tags(header)):
+        return Response(status_code=304, headers={'ETag': etag})
+    return None
+
+
+def if_match_version(request: Request) -> Optional[int]:
+    """
+    The version required by an If-Match header (None when absent or "*").
+    Raises 412 for a malformed header or one naming several ETags.
+    """
+    header = request.headers.get('if-match')
+    if not header or header.strip() == '*':
+        return None
+    tags = list(_tags(header))
+    try:
+        if len(tags) != 1:
+            raise ValueError(header)
+        return int(tags[0].strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=412, detail='If-Match must name a single ETag')
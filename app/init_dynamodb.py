@@ -8,6 +8,7 @@ Script to initialize DynamoDB tables for users, events, and email logs.
 
 import boto3
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,6 +24,97 @@ dynamodb = boto3.resource(
     aws_secret_access_key='dummy'
 )
 
+
+def gsi(name, hash_key, range_key=None):
+    """
+    Definition of a global secondary index projecting all attributes.
+    """
+    key_schema = [{'AttributeName': hash_key, 'KeyType': 'HASH'}]
+    if range_key:
+        key_schema.append({'AttributeName': range_key, 'KeyType': 'RANGE'})
+    return {
+        'IndexName': name,
+        'KeySchema': key_schema,
+        'Projection': {'ProjectionType': 'ALL'},
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 1,
+            'WriteCapacityUnits': 1
+        }
+    }
+
+
+# Seconds between DescribeTable polls while a new index is backfilled
+INDEX_POLL_SECONDS = 5
+
+
+def wait_for_index(client, table_name, index_name, poll_seconds=None):
+    """
+    Block until the table and the named index are both ACTIVE. The table
+    stays ACTIVE while a new index backfills (CREATING), so the table_exists
+    waiter does not cover it, and the next UpdateTable would be rejected.
+    """
+    poll_seconds = INDEX_POLL_SECONDS if poll_seconds is None else poll_seconds
+    while True:
+        description = client.describe_table(TableName=table_name)['Table']
+        statuses = {i['IndexName']: i.get('IndexStatus') for i in description.get('GlobalSecondaryIndexes', [])}
+        if description['TableStatus'] == 'ACTIVE' and statuses.get(index_name) == 'ACTIVE':
+            return
+        time.sleep(poll_seconds)
+
+
+def ensure_indexes(table, indexes, attribute_definitions):
+    """
+    Add any missing global secondary indexes to an existing table, one at a time
+    (DynamoDB allows a single index creation per UpdateTable call), waiting
+    for each to become ACTIVE before adding the next.
+    """
+    existing = {i['IndexName'] for i in (table.global_secondary_indexes or [])}
+    for index in indexes:
+        if index['IndexName'] in existing:
+            continue
+        table.meta.client.update_table(
+            TableName=table.name,
+            AttributeDefinitions=attribute_definitions,
+            GlobalSecondaryIndexUpdates=[{'Create': index}]
+        )
+        wait_for_index(table.meta.client, table.name, index['IndexName'])
+        print(f"Index {index['IndexName']} added to {table.name}.")
+
+
+def ensure_ttl(client, table_name, attribute_name):
+    """
+    Enable TTL on `attribute_name` unless TTL is already on (or turning on):
+    UpdateTimeToLive rejects a table whose TTL is already enabled, so tables
+    created before TTL was added are upgraded and others are left alone.
+    Returns True if TTL was enabled by this call.
+    """
+    description = client.describe_time_to_live(TableName=table_name)['TimeToLiveDescription']
+    if description.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+        if description.get('AttributeName') != attribute_name:
+            print(f"TTL on {table_name} uses {description.get('AttributeName')}, not {attribute_name}.")
+        return False
+    client.update_time_to_live(
+        TableName=table_name,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': attribute_name}
+    )
+    return True
+
+
+# Secondary indexes on the selective user attributes, used by the filter_users query planner
+user_indexes = [
+    gsi('company-index', 'company'),
+    gsi('job_title-index', 'job_title'),
+    gsi('city-index', 'city'),
+    gsi('state-index', 'state'),
+]
+user_attribute_definitions = [
+    {'AttributeName': 'id', 'AttributeType': 'S'},
+    {'AttributeName': 'company', 'AttributeType': 'S'},
+    {'AttributeName': 'job_title', 'AttributeType': 'S'},
+    {'AttributeName': 'city', 'AttributeType': 'S'},
+    {'AttributeName': 'state', 'AttributeType': 'S'},
+]
+
 # Create users table if it does not exist
 table_name = 'users'
 existing_tables = [t.name for t in dynamodb.tables.all()]
@@ -32,9 +124,8 @@ if table_name not in existing_tables:
         KeySchema=[
             {'AttributeName': 'id', 'KeyType': 'HASH'}
         ],
-        AttributeDefinitions=[
-            {'AttributeName': 'id', 'AttributeType': 'S'}
-        ],
+        AttributeDefinitions=user_attribute_definitions,
+        GlobalSecondaryIndexes=user_indexes,
         ProvisionedThroughput={
             'ReadCapacityUnits': 1,
             'WriteCapacityUnits': 1
@@ -43,8 +134,22 @@ if table_name not in existing_tables:
     table.wait_until_exists()
     print("Users table created!")
 else:
+    ensure_indexes(dynamodb.Table(table_name), user_indexes, user_attribute_definitions)
     print("Users table already exists.")
 
+# Lookup of events by slug (GET /events/by-slug/{slug}) and by start time:
+# start_bucket is the UTC month of startAt, start_key "<ISO-8601 UTC start>#<id>"
+event_indexes = [
+    gsi('slug-index', 'slug'),
+    gsi('start_bucket-index', 'start_bucket', 'start_key'),
+]
+event_attribute_definitions = [
+    {'AttributeName': 'id', 'AttributeType': 'S'},
+    {'AttributeName': 'slug', 'AttributeType': 'S'},
+    {'AttributeName': 'start_bucket', 'AttributeType': 'S'},
+    {'AttributeName': 'start_key', 'AttributeType': 'S'},
+]
+
 # Create events table if it does not exist
 event_table_name = 'events'
 if event_table_name not in existing_tables:
@@ -53,9 +158,8 @@ if event_table_name not in existing_tables:
         KeySchema=[
             {'AttributeName': 'id', 'KeyType': 'HASH'}
         ],
-        AttributeDefinitions=[
-            {'AttributeName': 'id', 'AttributeType': 'S'}
-        ],
+        AttributeDefinitions=event_attribute_definitions,
+        GlobalSecondaryIndexes=event_indexes,
         ProvisionedThroughput={
             'ReadCapacityUnits': 1,
             'WriteCapacityUnits': 1
@@ -64,8 +168,31 @@ if event_table_name not in existing_tables:
     event_table.wait_until_exists()
     print("Events table created!")
 else:
+    ensure_indexes(dynamodb.Table(event_table_name), event_indexes, event_attribute_definitions)
     print("Events table already exists.")
 
+# Create event_slugs table if it does not exist: one item per slug naming the
+# event that holds it, written with conditions so slugs stay unique
+event_slug_table_name = 'event_slugs'
+if event_slug_table_name not in existing_tables:
+    event_slug_table = dynamodb.create_table(
+        TableName=event_slug_table_name,
+        KeySchema=[
+            {'AttributeName': 'slug', 'KeyType': 'HASH'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'slug', 'AttributeType': 'S'}
+        ],
+        ProvisionedThroughput={
+            'ReadCapacityUnits': 1,
+            'WriteCapacityUnits': 1
+        }
+    )
+    event_slug_table.wait_until_exists()
+    print("Event slugs table created!")
+else:
+    print("Event slugs table already exists.")
+
 # Create email_logs table if it does not exist
 email_log_table_name = 'email_logs'
 if email_log_table_name not in [t.name for t in dynamodb.tables.all()]:
@@ -86,3 +213,106 @@ if email_log_table_name not in [t.name for t in dynamodb.tables.all()]:
     print("Email logs table created!")
 else:
     print("Email logs table already exists.")
+
+# Create email_log_entries table if it does not exist: email logs keyed by
+# user and time, indexed by campaign and by day, expired through TTL
+email_log_entry_table_name = 'email_log_entries'
+if email_log_entry_table_name not in [t.name for t in dynamodb.tables.all()]:
+    email_log_entry_table = dynamodb.create_table(
+        TableName=email_log_entry_table_name,
+        KeySchema=[
+            {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'ts', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'ts', 'AttributeType': 'S'},
+            {'AttributeName': 'job_id', 'AttributeType': 'S'},
+            {'AttributeName': 'day', 'AttributeType': 'S'}
+        ],
+        GlobalSecondaryIndexes=[
+            gsi('job_id-index', 'job_id', 'ts'),
+            gsi('day-index', 'day', 'ts')
+        ],
+        ProvisionedThroughput={
+            'ReadCapacityUnits': 1,
+            'WriteCapacityUnits': 1
+        }
+    )
+    email_log_entry_table.wait_until_exists()
+    ensure_ttl(dynamodb.meta.client, email_log_entry_table_name, 'expires_at')
+    print("Email log entries table created!")
+else:
+    if ensure_ttl(dynamodb.meta.client, email_log_entry_table_name, 'expires_at'):
+        print(f"TTL enabled on {email_log_entry_table_name}.")
+    print("Email log entries table already exists.")
+
+# Create email_jobs table if it does not exist (background /send-emails campaigns)
+email_job_table_name = 'email_jobs'
+if email_job_table_name not in [t.name for t in dynamodb.tables.all()]:
+    email_job_table = dynamodb.create_table(
+        TableName=email_job_table_name,
+        KeySchema=[
+            {'AttributeName': 'id', 'KeyType': 'HASH'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'id', 'AttributeType': 'S'}
+        ],
+        ProvisionedThroughput={
+            'ReadCapacityUnits': 1,
+            'WriteCapacityUnits': 1
+        }
+    )
+    email_job_table.wait_until_exists()
+    print("Email jobs table created!")
+else:
+    print("Email jobs table already exists.")
+
+# Create registrations table if it does not exist: one item per (event, user),
+# with a reverse index to list the events of a user
+registration_table_name = 'registrations'
+if registration_table_name not in [t.name for t in dynamodb.tables.all()]:
+    registration_table = dynamodb.create_table(
+        TableName=registration_table_name,
+        KeySchema=[
+            {'AttributeName': 'event_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'user_id', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'event_id', 'AttributeType': 'S'},
+            {'AttributeName': 'user_id', 'AttributeType': 'S'}
+        ],
+        GlobalSecondaryIndexes=[gsi('user_id-index', 'user_id', 'event_id')],
+        ProvisionedThroughput={
+            'ReadCapacityUnits': 1,
+            'WriteCapacityUnits': 1
+        }
+    )
+    registration_table.wait_until_exists()
+    print("Registrations table created!")
+else:
+    print("Registrations table already exists.")
+
+# Create event_counters table if it does not exist: registration counters per
+# event, optionally split over several shard items (REGISTRATION_COUNTER_SHARDS)
+event_counter_table_name = 'event_counters'
+if event_counter_table_name not in [t.name for t in dynamodb.tables.all()]:
+    event_counter_table = dynamodb.create_table(
+        TableName=event_counter_table_name,
+        KeySchema=[
+            {'AttributeName': 'event_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'shard', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'event_id', 'AttributeType': 'S'},
+            {'AttributeName': 'shard', 'AttributeType': 'N'}
+        ],
+        ProvisionedThroughput={
+            'ReadCapacityUnits': 1,
+            'WriteCapacityUnits': 1
+        }
+    )
+    event_counter_table.wait_until_exists()
+    print("Event counters table created!")
+else:
+    print("Event counters table already exists.")
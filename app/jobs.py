@@ -0,0 +1,326 @@
+"""
+jobs.py
+Background email campaigns for POST /send-emails.
+
+A request only records an EmailJob in the email_jobs table and returns its id.
+A bounded pool of job workers resolves the recipients and sends through the
+pooled SMTP sessions with a process-wide rate limit, checkpointing progress to
+DynamoDB. A heartbeat thread renews each running job's lease; jobs left queued
+or running by a stopped process are picked up again at startup once their
+lease has expired.
+
+In async mode (app.async_main) the emails themselves go through the aiosmtplib
+pool on the serving event loop; the job threads still resolve recipients, log
+and checkpoint.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+from . import service
+from .batching import BatchWriter
+from .database import get_dynamodb_resource
+from .email_utils import get_smtp_pool, send_email_async, SMTP_POOL_SIZE
+from .scanner import scan_table
+from .schemas import UserFilter
+
+logger = logging.getLogger("event_crm")
+
+EMAIL_JOB_WORKERS = int(os.getenv("EMAIL_JOB_WORKERS", 2))
+EMAIL_SEND_CONCURRENCY = int(os.getenv("EMAIL_SEND_CONCURRENCY", SMTP_POOL_SIZE))
+EMAIL_RATE_LIMIT = float(os.getenv("EMAIL_RATE_LIMIT", 10))  # emails per second, 0 = unlimited
+EMAIL_JOB_CHECKPOINT_SECONDS = float(os.getenv("EMAIL_JOB_CHECKPOINT_SECONDS", 2))
+EMAIL_JOB_LEASE_SECONDS = int(os.getenv("EMAIL_JOB_LEASE_SECONDS", 60))
+# A running job renews its lease this often, independently of sends (a slow
+# SMTP server or a long rate-limit wait must not let another worker take over)
+LEASE_RENEWALS_PER_LEASE = 3
+
+JOB_TABLE = 'email_jobs'
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every sender thread in the process.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until one token is available.
+        """
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _number(value):
+    """
+    DynamoDB rejects floats; store them as Decimals (millisecond precision).
+    """
+    return Decimal(str(round(value, 3))) if isinstance(value, float) else value
+
+
+def _public(job: dict) -> dict:
+    """
+    Job state as returned by the API, with throughput derived from progress.
+    """
+    job = {key: value for key, value in job.items() if not key.startswith('lease_')}
+    started = job.get('started_at')
+    if started:
+        elapsed = float(job.get('finished_at') or time.time()) - float(started)
+        job['elapsed_seconds'] = round(max(elapsed, 0), 3)
+        job['throughput_per_second'] = round(int(job.get('processed', 0)) / elapsed, 2) if elapsed > 0 else None
+    return job
+
+
+class EmailJobManager:
+    """
+    Queues, runs, checkpoints and resumes email jobs.
+    """
+
+    def __init__(self, workers: int = None, send_concurrency: int = None, rate_limit: float = None):
+        self.worker_id = str(uuid.uuid4())
+        self.send_concurrency = send_concurrency or EMAIL_SEND_CONCURRENCY
+        self.rate_limiter = RateLimiter(EMAIL_RATE_LIMIT if rate_limit is None else rate_limit)
+        self._executor = ThreadPoolExecutor(max_workers=workers or EMAIL_JOB_WORKERS, thread_name_prefix="email-job")
+        self._live = {}
+        self._lock = threading.Lock()
+        self._loop = None
+
+    def send_on_event_loop(self, loop: Optional[asyncio.AbstractEventLoop]):
+        """
+        Send through email_utils' async SMTP pool on `loop` (async mode's
+        serving event loop) instead of the smtplib pool; None switches back.
+        """
+        self._loop = loop
+
+    def _send_email(self, to_email: str) -> bool:
+        loop = self._loop
+        if loop is None:
+            return get_smtp_pool().send(to_email, service.EMAIL_SUBJECT, service.EMAIL_BODY)
+        coroutine = send_email_async(to_email, service.EMAIL_SUBJECT, service.EMAIL_BODY)
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def _table(self):
+        return get_dynamodb_resource().Table(JOB_TABLE)
+
+    def submit(self, filter: UserFilter) -> dict:
+        """
+        Persist a new queued job and hand it to the worker pool.
+        """
+        now = time.time()
+        job = {
+            'id': str(uuid.uuid4()),
+            'status': 'queued',
+            'filter': filter.dict(),
+            'total': 0,
+            'processed': 0,
+            'sent': 0,
+            'failed': 0,
+            'created_at': int(now),
+            'lease_owner': self.worker_id,
+            'lease_expires_at': int(now) + EMAIL_JOB_LEASE_SECONDS,
+        }
+        self._table().put_item(Item=job)
+        accepted = _public(job)
+        with self._lock:
+            self._live[job['id']] = job
+        self._executor.submit(self._run, job)
+        return accepted
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Current state of a job: live progress if this process runs it, else the
+        last checkpoint stored in DynamoDB.
+        """
+        with self._lock:
+            job = self._live.get(job_id)
+            if job is not None:
+                return _public(dict(job))
+        item = self._table().get_item(Key={'id': job_id}).get('Item')
+        return _public(item) if item else None
+
+    def resume(self):
+        """
+        Claim and restart jobs that are still queued/running but whose owner's
+        lease has expired (e.g. the process was restarted mid-campaign).
+        """
+        table = self._table()
+        now = int(time.time())
+        for job in scan_table(table, predicate=lambda item: item.get('status') in ACTIVE_STATUSES):
+            try:
+                table.update_item(
+                    Key={'id': job['id']},
+                    UpdateExpression='SET lease_owner = :me, lease_expires_at = :exp',
+                    ConditionExpression='#s IN (:queued, :running) AND lease_expires_at < :now',
+                    ExpressionAttributeNames={'#s': 'status'},
+                    ExpressionAttributeValues={
+                        ':me': self.worker_id, ':exp': now + EMAIL_JOB_LEASE_SECONDS, ':now': now,
+                        ':queued': 'queued', ':running': 'running'
+                    }
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                    continue  # another worker owns it
+                raise
+            logger.info(f"Resuming email job {job['id']} at {job['processed']}/{job['total']}")
+            job['lease_owner'] = self.worker_id
+            with self._lock:
+                self._live[job['id']] = job
+            self._executor.submit(self._run, job)
+
+    def _renew_lease(self, job: dict) -> bool:
+        """
+        Push the job's lease forward. Returns False if another worker owns it now.
+        """
+        expires = int(time.time()) + EMAIL_JOB_LEASE_SECONDS
+        try:
+            self._table().update_item(
+                Key={'id': job['id']},
+                UpdateExpression='SET lease_expires_at = :exp',
+                ConditionExpression='lease_owner = :me',
+                ExpressionAttributeValues={':exp': expires, ':me': self.worker_id}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return False
+        job['lease_expires_at'] = expires
+        return True
+
+    def _heartbeat(self, job: dict, stop: threading.Event, lost: threading.Event):
+        """
+        Renew the lease until `stop` is set; sets `lost` if it was taken over.
+        """
+        while not stop.wait(EMAIL_JOB_LEASE_SECONDS / LEASE_RENEWALS_PER_LEASE):
+            try:
+                if not self._renew_lease(job):
+                    logger.warning(f"Email job {job['id']} was taken over by another worker")
+                    lost.set()
+                    return
+            except Exception as e:
+                logger.error(f"Lease renewal of email job {job['id']} failed: {e}")
+
+    def _checkpoint(self, job: dict, final: bool = False, log_writer: BatchWriter = None):
+        if log_writer is not None:
+            # Logs first, so a stored checkpoint never counts emails whose logs are lost
+            log_writer.flush()
+        now = int(time.time())
+        job['lease_expires_at'] = now + EMAIL_JOB_LEASE_SECONDS
+        fields = ['status', 'total', 'processed', 'sent', 'failed', 'lease_expires_at']
+        fields += [key for key in ('started_at', 'finished_at', 'error') if key in job]
+        self._table().update_item(
+            Key={'id': job['id']},
+            UpdateExpression='SET ' + ', '.join(f'#{key} = :{key}' for key in fields),
+            ExpressionAttributeNames={f'#{key}': key for key in fields},
+            ExpressionAttributeValues={f':{key}': _number(job[key]) for key in fields}
+        )
+        if final:
+            with self._lock:
+                self._live.pop(job['id'], None)
+
+    def _run(self, job: dict):
+        db = get_dynamodb_resource()
+        log_writer = BatchWriter(db, service.EMAIL_LOGS_TABLE)
+        stop, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job, stop, lost), name=f"email-lease-{job['id'][:8]}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            resumed = 'started_at' in job
+            job['status'] = 'running'
+            job.setdefault('started_at', time.time())
+            users = service.find_email_recipients(db, UserFilter(**job['filter']))
+            # Parallel senders finish out of order, so a resumed job skips the
+            # recipients already logged for it rather than a prefix of the list
+            # (which is resolved again and may have changed). Only emails sent
+            # but not yet logged when the process stopped (the log buffer and
+            # sends in flight) are sent again.
+            done = service.email_job_outcomes(db, job['id']) if resumed else {}
+            pending = [user for user in users if user['id'] not in done]
+            job['total'] = len(pending) + len(done)
+            job['processed'] = len(done)
+            job['sent'] = sum(1 for status in done.values() if status == 'sent')
+            job['failed'] = len(done) - job['sent']
+            self._checkpoint(job)
+            self._send(job, pending, log_writer, lost)
+            job['status'] = 'completed'
+        except Exception as e:
+            logger.error(f"Email job {job['id']} failed: {e}")
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            stop.set()
+        if lost.is_set():
+            # The new owner resumes from the logs; its checkpoints are the job's state
+            log_writer.flush()
+            with self._lock:
+                self._live.pop(job['id'], None)
+            return
+        job['finished_at'] = time.time()
+        self._checkpoint(job, final=True, log_writer=log_writer)
+
+    def _send(self, job: dict, users, log_writer: BatchWriter, lost: threading.Event):
+        lock = threading.Lock()
+        last_checkpoint = [time.monotonic()]
+
+        def send_one(user):
+            self.rate_limiter.acquire()
+            if lost.is_set():
+                return  # another worker owns the job and sends the rest
+            ok = self._send_email(user['email'])
+            status = "sent" if ok else "failed"
+            log_writer.add(service.email_log_item(user, status, job_id=job['id']))
+            with lock:
+                job['processed'] = int(job['processed']) + 1
+                job[status] = int(job[status]) + 1
+                due = time.monotonic() - last_checkpoint[0] >= EMAIL_JOB_CHECKPOINT_SECONDS
+                if due:
+                    last_checkpoint[0] = time.monotonic()
+            if due and not lost.is_set():
+                self._checkpoint(job, log_writer=log_writer)
+
+        with ThreadPoolExecutor(max_workers=self.send_concurrency, thread_name_prefix="email-send") as senders:
+            list(senders.map(send_one, users))
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> EmailJobManager:
+    """
+    Returns the process-wide email job manager.
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = EmailJobManager()
+    return _manager
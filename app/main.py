@@ -4,23 +4,117 @@ Defines all FastAPI endpoints for user, event, registration, email, and analytic
 """
 
 from fastapi import HTTPException
-from fastapi import FastAPI, Depends, Query
-from . import service as crud, schemas, dependencies
-from typing import List, Optional
+from fastapi import FastAPI, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from anyio import to_thread
+from . import service as crud, schemas, dependencies, database, user_index, jobs, bulk, cache, search_index, metrics
+from .etags import etag_for, if_match_version, not_modified
+from .pagination import InvalidCursor, ndjson_stream
+from .responses import ORJSONResponse, shaped_response
+from typing import List, Optional, Union
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
+DEFAULT_PAGE_SIZE = 100
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+MAX_BATCH_GET_IDS = 1000
+# OpenAPI description of the `expand` variants, which bypass response_model
+EXPANDED_EVENT_DOC = {200: {"model": schemas.EventExpanded, "description": "Successful Response"}}
+EXPANDED_EVENTS_DOC = {200: {"model": Union[List[schemas.EventExpanded], schemas.EventExpandedPage], "description": "Successful Response"}}
+
+
+@app.on_event("startup")
+def configure_runtime():
+    """
+    Size the sync endpoint threadpool to match the DynamoDB connection pool,
+    optionally open pooled connections and load the in-memory user index,
+    load the event search index and resume email jobs interrupted by a restart.
+    """
+    to_thread.current_default_thread_limiter().total_tokens = database.THREADPOOL_SIZE
+    if database.DYNAMODB_WARMUP:
+        database.warm_up()
+    if user_index.USER_INDEX_ENABLED:
+        user_index.load_user_index(database.get_dynamodb_resource())
+    search_index.load_search_index(database.get_dynamodb_resource())
+    jobs.get_job_manager().resume()
+
+
+def _page(page_fn, db, limit, cursor):
+    """
+    Run a cursor-paginated service call, turning malformed cursors into a 400.
+    """
+    try:
+        return page_fn(db, limit or DEFAULT_PAGE_SIZE, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _export(pages, format, fields):
+    """
+    Stream a table export as NDJSON or CSV.
+    """
+    media_type = CSV_MEDIA_TYPE if format == 'csv' else NDJSON_MEDIA_TYPE
+    return StreamingResponse(bulk.export_lines(pages, format, fields), media_type=media_type)
+
+
+def _precondition(write_fn, *args, **kwargs):
+    """
+    Run a conditional write, turning a version mismatch into a 412
+    (and a missing item into a 404, an invalid patch into a 400, a slug
+    used by another event into a 409).
+    """
+    try:
+        return write_fn(*args, **kwargs)
+    except crud.PreconditionFailed as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    except crud.SlugTaken as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except crud.NotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _expand_fields(expand: Optional[str]) -> List[str]:
+    """
+    Parse an `expand` query parameter ("attendees,hosts"), rejecting unknown fields.
+    """
+    fields = [field.strip() for field in expand.split(',') if field.strip()] if expand else []
+    unknown = [field for field in fields if field not in crud.EXPANDABLE_EVENT_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot expand {', '.join(unknown)}; choose from {', '.join(crud.EXPANDABLE_EVENT_FIELDS)}"
+        )
+    return fields
+
+
+def _check_batch_size(ids):
+    if len(ids) > MAX_BATCH_GET_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_GET_IDS} ids per request")
 
 
 
 
 # User Endpoints
-@app.get("/users/all", response_model=List[schemas.UserOut] , tags=["User"])
-def get_all_users(db=Depends(dependencies.get_db)):
+@app.get("/users/all", response_model=Union[List[schemas.UserOut], schemas.UserPage] , tags=["User"])
+def get_all_users(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db=Depends(dependencies.get_db)
+):
     """
     Retrieve all users.
-    """
-    return crud.get_all_users(db)
+    Pass `limit` (and the previous `next_cursor` as `cursor`) for cursor pagination,
+    or `stream=true` to receive NDJSON rows while the table is scanned.
+    """
+    if stream:
+        return StreamingResponse(ndjson_stream(crud.iter_user_pages(db)), media_type=NDJSON_MEDIA_TYPE)
+    if limit or cursor:
+        return _page(crud.get_users_page, db, limit, cursor)
+    return shaped_response(schemas.USER_SHAPE, crud.get_all_users(db))
 
 @app.post("/users", response_model=schemas.UserOut , tags=["User"])
 def create_user(user: schemas.UserCreate, db=Depends(dependencies.get_db)):
@@ -29,136 +123,464 @@ def create_user(user: schemas.UserCreate, db=Depends(dependencies.get_db)):
     """
     return crud.create_user(db, user)
 
+@app.post("/users/bulk", response_model=schemas.BulkImportResult , tags=["User"])
+async def bulk_import_users(
+    request: Request,
+    format: Optional[str] = Query(None, pattern='^(csv|ndjson)$'),
+    db=Depends(dependencies.get_db)
+):
+    """
+    Import users from a CSV (with header row) or NDJSON upload.
+    The format follows `format` or the Content-Type (text/csv, else NDJSON).
+    Rows are validated and written in batches; invalid rows are reported by row number.
+    """
+    format = bulk.detect_format(request.headers.get('content-type'), format)
+    return await bulk.import_stream(db, request.stream(), format, bulk.import_users)
+
+@app.get("/users/export" , tags=["User"])
+def export_users(format: str = Query('ndjson', pattern='^(csv|ndjson)$'), db=Depends(dependencies.get_db)):
+    """
+    Export every user as NDJSON or CSV, streamed page by page.
+    """
+    return _export(crud.iter_user_pages(db), format, bulk.USER_EXPORT_FIELDS)
+
+@app.post("/users/batch-get", response_model=schemas.UserBatch , tags=["User"])
+def batch_get_users(body: schemas.IdList, db=Depends(dependencies.get_db)):
+    """
+    Retrieve many users by id (BatchGetItem).
+    """
+    _check_batch_size(body.ids)
+    users, missing = crud.get_users_by_ids(db, body.ids)
+    return {'items': users, 'missing': missing}
+
+@app.patch("/users/batch", response_model=schemas.UserPatchResult , tags=["User"])
+def patch_users(patches: List[schemas.UserPatchItem], db=Depends(dependencies.get_db)):
+    """
+    Apply many partial user updates in one call. Each edit is applied on its
+    own; the ones that fail are listed with their status (404, 412 or 400).
+    """
+    _check_batch_size(patches)
+    return crud.patch_users(db, [
+        {'id': patch.id, 'changes': patch.changes.dict(exclude_unset=True), 'if_match': patch.if_match}
+        for patch in patches
+    ])
+
 @app.get("/users/{user_id}", response_model=schemas.UserOut , tags=["User"])
-def get_user(user_id: str, db=Depends(dependencies.get_db)):
+def get_user(user_id: str, request: Request, response: Response, db=Depends(dependencies.get_db)):
     """
     Retrieve a user by user_id.
+    Returns an ETag; send it back as If-None-Match to get 304 when unchanged.
     """
-    return crud.get_user(db, user_id)
+    user = crud.get_user(db, user_id)
+    return not_modified(request, response, user.get('version')) or user
 
 @app.put("/users/{user_id}", response_model=schemas.UserOut , tags=["User"])
-def update_user(user_id: str, user: schemas.UserCreate, db=Depends(dependencies.get_db)):
+def update_user(user_id: str, user: schemas.UserCreate, request: Request, response: Response, db=Depends(dependencies.get_db)):
     """
     Update a user's information by user_id.
+    With If-Match, the update only applies to that version (else 412).
+    """
+    updated = _precondition(crud.update_user, db, user_id, user, if_match=if_match_version(request))
+    response.headers['ETag'] = etag_for(updated['version'])
+    return updated
+
+@app.patch("/users/{user_id}", response_model=schemas.UserOut , tags=["User"])
+def patch_user(user_id: str, user: schemas.UserPatch, request: Request, response: Response, db=Depends(dependencies.get_db)):
+    """
+    Update only the fields sent (null removes an optional field); lists,
+    counters and other fields are left as stored. Honors If-Match like PUT.
     """
-    return crud.update_user(db, user_id, user)
+    updated = _precondition(crud.patch_user, db, user_id, user.dict(exclude_unset=True), if_match=if_match_version(request))
+    response.headers['ETag'] = etag_for(updated['version'])
+    return updated
 
 @app.delete("/users/{user_id}" , tags=["User"])
-def delete_user(user_id: str, db=Depends(dependencies.get_db)):
+def delete_user(user_id: str, request: Request, db=Depends(dependencies.get_db)):
     """
     Delete a user by user_id.
+    With If-Match, only that version is deleted (else 412).
     """
-    return crud.delete_user(db, user_id)
+    return _precondition(crud.delete_user, db, user_id, if_match=if_match_version(request))
 
-@app.get("/users", response_model=List[schemas.UserOut] , tags=["User"])
+@app.get("/users", response_model=Union[List[schemas.UserOut], schemas.UserFilterExplain] , tags=["User"])
 def filter_users(
+    response: Response,
     company: Optional[str] = None,
     job_title: Optional[str] = None,
     city: Optional[str] = None,
     state: Optional[str] = None,
-    events_hosted_min: Optional[int] = None,
-    events_hosted_max: Optional[int] = None,
-    events_attended_min: Optional[int] = None,
-    events_attended_max: Optional[int] = None,
+    events_hosted_min: Optional[int] = Query(None, ge=0),
+    events_hosted_max: Optional[int] = Query(None, ge=0),
+    events_attended_min: Optional[int] = Query(None, ge=0),
+    events_attended_max: Optional[int] = Query(None, ge=0),
     skip: int = 0,
     limit: int = 10,
     sort_by: Optional[str] = None,
+    sort_order: str = Query('asc', pattern='^(asc|desc)$'),
+    after: Optional[str] = None,
+    explain: bool = False,
     db=Depends(dependencies.get_db)
 ):
     """
     Filter users by various criteria (query params).
-    """
-    return crud.filter_users(
-        db,
-        company,
-        job_title,
-        city,
-        state,
-        events_hosted_min,
-        events_hosted_max,
-        events_attended_min,
-        events_attended_max,
-        skip,
-        limit,
-        sort_by
+    `sort_by` takes comma-separated fields ("-" prefix for descending), including
+    events_hosted / events_attended counts. When sorting, the X-Next-Cursor header
+    holds the keyset cursor to pass as `after` for the next page.
+    With `explain=true` the response also describes the query plan
+    (index used, items read vs returned); the X-Query-Plan header always does.
+    """
+    try:
+        result = crud.filter_users_explain(
+            db,
+            company,
+            job_title,
+            city,
+            state,
+            events_hosted_min,
+            events_hosted_max,
+            events_attended_min,
+            events_attended_max,
+            skip,
+            limit,
+            sort_by,
+            sort_order,
+            after
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result['next_cursor']:
+        response.headers["X-Next-Cursor"] = result['next_cursor']
+    plan = result['explain']
+    response.headers["X-Query-Plan"] = (
+        f"operation={plan['operation']}; index={plan['index'] or 'none'}; "
+        f"read={plan['items_read']}; returned={plan['items_returned']}"
     )
+    if explain:
+        return result
+    return result['users']
+@app.get("/users/{user_id}/events", response_model=schemas.RegistrationPage , tags=["User"])
+def get_user_events(
+    user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db=Depends(dependencies.get_db)
+):
+    """
+    Events a user is registered for, one page at a time (pass `next_cursor` back as `cursor`).
+    """
+    return _page(lambda db, limit, cursor: crud.get_user_events_page(db, user_id, limit, cursor), db, limit, cursor)
+
 @app.post("/users/{user_id}/events/{event_id}/register", tags=["User"])
 def register_user_for_event(user_id: str, event_id: str, db=Depends(dependencies.get_db)):
     """
-    Register a user for an event.
+    Register a user for an event. Registering again is a no-op ("already_registered");
+    a full event returns 409.
     """
-    return crud.register_event(db, event_id, user_id)
+    try:
+        return crud.register_event(db, event_id, user_id)
+    except crud.NotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except crud.EventFull as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 
 # Event Endpoints
 @app.post("/events", response_model=schemas.EventOut , tags=["Event"])
 def create_event(event: schemas.EventCreate, db=Depends(dependencies.get_db)):
     """
-    Create a new event.
+    Create a new event. Slugs are unique: a slug already in use returns 409.
     """
-    event_dict = crud.create_event(db, event)
+    try:
+        event_dict = crud.create_event(db, event)
+    except crud.SlugTaken as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return event_dict
 
-@app.get("/events", response_model=List[schemas.EventOut] , tags=["Event"])
-def list_events(db=Depends(dependencies.get_db)):
+@app.get("/events", response_model=Union[List[schemas.EventOut], schemas.EventPage], responses=EXPANDED_EVENTS_DOC , tags=["Event"])
+def list_events(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    expand: Optional[str] = None,
+    start_from: Optional[str] = Query(None, alias='from'),
+    start_to: Optional[str] = Query(None, alias='to'),
+    db=Depends(dependencies.get_db)
+):
     """
     Retrieve all events.
-    """
-    return crud.list_events(db)
+    Supports cursor pagination (`limit`, `cursor`) and NDJSON streaming (`stream=true`).
+    `expand=attendees,hosts` adds attendee_users / host_users, loaded for the
+    whole list in batched BatchGetItem calls.
+    `from` / `to` (ISO-8601) return the events starting in that range, in start
+    order and cursor-paginated, read from the start-time index instead of a scan.
+    """
+    fields = _expand_fields(expand)
+    if stream:
+        if fields or start_from or start_to:
+            raise HTTPException(status_code=400, detail="expand, from and to are not supported with stream=true")
+        return StreamingResponse(ndjson_stream(crud.iter_event_pages(db)), media_type=NDJSON_MEDIA_TYPE)
+    if start_from or start_to:
+        try:
+            page = _page(
+                lambda db, limit, cursor: crud.query_events_by_start(db, start_from, start_to, limit, cursor),
+                db, limit, cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif limit or cursor:
+        page = _page(crud.get_events_page, db, limit, cursor)
+    else:
+        page = None
+    if page is not None:
+        if not fields:
+            return page
+        items = crud.expand_events(db, page['items'], fields)
+        return ORJSONResponse({'items': schemas.EXPANDED_EVENT_SHAPE.rows(items), 'next_cursor': page['next_cursor']})
+    if fields:
+        return shaped_response(schemas.EXPANDED_EVENT_SHAPE, crud.expand_events(db, crud.list_events(db), fields))
+    return shaped_response(schemas.EVENT_SHAPE, crud.list_events(db))
 
-@app.get("/events/all", response_model=List[schemas.EventOut] , tags=["Event"])
-def get_all_events(db=Depends(dependencies.get_db)):
+@app.get("/events/all", response_model=Union[List[schemas.EventOut], schemas.EventPage], responses=EXPANDED_EVENTS_DOC , tags=["Event"])
+def get_all_events(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    expand: Optional[str] = None,
+    start_from: Optional[str] = Query(None, alias='from'),
+    start_to: Optional[str] = Query(None, alias='to'),
+    db=Depends(dependencies.get_db)
+):
     """
     Retrieve all events (duplicate endpoint).
     """
-    return crud.list_events(db)
+    return list_events(limit, cursor, stream, expand, start_from, start_to, db)
+
+@app.post("/events/bulk", response_model=schemas.BulkImportResult , tags=["Event"])
+async def bulk_import_events(
+    request: Request,
+    format: Optional[str] = Query(None, pattern='^(csv|ndjson)$'),
+    db=Depends(dependencies.get_db)
+):
+    """
+    Import events from a CSV (with header row, hosts separated by ';') or NDJSON upload.
+    Owners and hosts get the new events on their events_hosted lists.
+    """
+    format = bulk.detect_format(request.headers.get('content-type'), format)
+    return await bulk.import_stream(db, request.stream(), format, bulk.import_events)
 
-@app.get("/events/{event_id}", response_model=schemas.EventOut , tags=["Event"])
-def get_event(event_id: str, db=Depends(dependencies.get_db)):
+@app.get("/events/export" , tags=["Event"])
+def export_events(format: str = Query('ndjson', pattern='^(csv|ndjson)$'), db=Depends(dependencies.get_db)):
+    """
+    Export every event as NDJSON or CSV, streamed page by page.
+    """
+    return _export(crud.iter_event_pages(db), format, bulk.EVENT_EXPORT_FIELDS)
+
+@app.post("/events/batch-get", response_model=schemas.EventBatch , tags=["Event"])
+def batch_get_events(body: schemas.IdList, db=Depends(dependencies.get_db)):
+    """
+    Retrieve many events by id (BatchGetItem).
+    """
+    _check_batch_size(body.ids)
+    events, missing = crud.get_events_by_ids(db, body.ids)
+    return {'items': events, 'missing': missing}
+
+@app.patch("/events/batch", response_model=schemas.EventPatchResult , tags=["Event"])
+def patch_events(patches: List[schemas.EventPatchItem], db=Depends(dependencies.get_db)):
+    """
+    Apply many partial event updates in one call. Each edit is applied on its
+    own; the ones that fail are listed with their status (404, 412 or 400).
+    """
+    _check_batch_size(patches)
+    return crud.patch_events(db, [
+        {'id': patch.id, 'changes': patch.changes.dict(exclude_unset=True), 'if_match': patch.if_match}
+        for patch in patches
+    ])
+
+@app.get("/events/search", response_model=List[schemas.EventSearchHit] , tags=["Event"])
+def search_events(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    prefix: bool = True,
+    db=Depends(dependencies.get_db)
+):
+    """
+    Full-text search over event titles, venues and descriptions, best matches
+    first (BM25; case- and accent-insensitive). With `prefix=true` the last
+    word also matches longer words, for search-as-you-type.
+    """
+    return crud.search_events(db, q, limit, prefix)
+
+@app.get("/events/by-slug/{slug}", response_model=schemas.EventOut , tags=["Event"])
+def get_event_by_slug(slug: str, request: Request, response: Response, db=Depends(dependencies.get_db)):
+    """
+    Retrieve an event by its slug. Returns an ETag like GET /events/{event_id}.
+    """
+    try:
+        event = crud.get_event_by_slug(db, slug)
+    except crud.NotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return not_modified(request, response, event.get('version')) or event
+
+@app.get("/events/{event_id}", response_model=schemas.EventOut, responses=EXPANDED_EVENT_DOC , tags=["Event"])
+def get_event(
+    event_id: str,
+    request: Request,
+    response: Response,
+    expand: Optional[str] = None,
+    db=Depends(dependencies.get_db)
+):
     """
     Retrieve an event by event_id.
+    Returns an ETag; send it back as If-None-Match to get 304 when unchanged.
+    `expand=attendees,hosts` adds attendee_users / host_users (no ETag then,
+    since the users can change without the event changing).
+    """
+    fields = _expand_fields(expand)
+    event = crud.get_event(db, event_id)
+    if fields:
+        return ORJSONResponse(schemas.EXPANDED_EVENT_SHAPE.rows(crud.expand_events(db, [event], fields))[0])
+    return not_modified(request, response, event.get('version')) or event
+
+@app.get("/events/{event_id}/attendees", response_model=schemas.RegistrationPage , tags=["Event"])
+def get_event_attendees(
+    event_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db=Depends(dependencies.get_db)
+):
     """
-    return crud.get_event(db, event_id)
+    Users registered for an event, one page at a time (pass `next_cursor` back as `cursor`).
+    """
+    return _page(lambda db, limit, cursor: crud.get_event_attendees_page(db, event_id, limit, cursor), db, limit, cursor)
+
+@app.get("/events/{event_id}/capacity" , tags=["Event"])
+def get_event_capacity(event_id: str, db=Depends(dependencies.get_db)):
+    """
+    maxCapacity, number of registrations and seats remaining for an event.
+    """
+    try:
+        return crud.get_event_capacity(db, event_id)
+    except crud.NotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 @app.put("/events/{event_id}", response_model=schemas.EventOut , tags=["Event"])
-def update_event(event_id: str, event: schemas.EventCreate, db=Depends(dependencies.get_db)):
+def update_event(event_id: str, event: schemas.EventCreate, request: Request, response: Response, db=Depends(dependencies.get_db)):
     """
     Update an event by event_id.
+    With If-Match, the update only applies to that version (else 412).
+    Changing the slug to one used by another event returns 409.
+    """
+    updated = _precondition(crud.update_event, db, event_id, event, if_match=if_match_version(request))
+    response.headers['ETag'] = etag_for(updated['version'])
+    return updated
+
+@app.patch("/events/{event_id}", response_model=schemas.EventOut , tags=["Event"])
+def patch_event(event_id: str, event: schemas.EventPatch, request: Request, response: Response, db=Depends(dependencies.get_db)):
     """
-    return crud.update_event(db, event_id, event)
+    Update only the fields sent (null removes an optional field); attendees
+    and other fields are left as stored. Honors If-Match like PUT.
+    """
+    updated = _precondition(crud.patch_event, db, event_id, event.dict(exclude_unset=True), if_match=if_match_version(request))
+    response.headers['ETag'] = etag_for(updated['version'])
+    return updated
 
 @app.delete("/events/{event_id}" , tags=["Event"])
-def delete_event(event_id: str, db=Depends(dependencies.get_db)):
+def delete_event(event_id: str, request: Request, db=Depends(dependencies.get_db)):
     """
     Delete an event by event_id.
+    With If-Match, only that version is deleted (else 412).
     """
-    return crud.delete_event(db, event_id)
+    return _precondition(crud.delete_event, db, event_id, if_match=if_match_version(request))
 
 
 
 
 # Mail Endpoints
 @app.get("/email-logs" , tags=["Mail"])
-def get_email_logs(db=Depends(dependencies.get_db)):
+def get_email_logs(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    user_id: Optional[str] = None,
+    job_id: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[int] = Query(None, description="Epoch seconds, inclusive"),
+    until: Optional[int] = Query(None, description="Epoch seconds, inclusive"),
+    db=Depends(dependencies.get_db)
+):
     """
     Retrieve all email logs.
-    """
+    Supports cursor pagination (`limit`, `cursor`) and NDJSON streaming (`stream=true`).
+    Filtering by `user_id`, `job_id` (campaign), `status` and/or a `since`/`until`
+    time range returns cursor-paginated pages, newest first, read with Query
+    on the user key or the campaign/day indexes instead of a table scan.
+    """
+    if any(value is not None for value in (user_id, job_id, status, since, until)):
+        if stream:
+            raise HTTPException(status_code=400, detail="Filters are not supported with stream=true")
+        return _page(
+            lambda db, limit, cursor: crud.query_email_logs(db, limit, cursor, user_id, job_id, status, since, until),
+            db, limit, cursor
+        )
+    if stream:
+        return StreamingResponse(ndjson_stream(crud.iter_email_log_pages(db)), media_type=NDJSON_MEDIA_TYPE)
+    if limit or cursor:
+        return _page(crud.get_email_logs_page, db, limit, cursor)
     return crud.get_email_logs(db)
 
-@app.post("/send-emails" , tags=["Mail"])
+@app.post("/send-emails" , status_code=202, tags=["Mail"])
 def send_emails(
     filter: schemas.UserFilter,
     db=Depends(dependencies.get_db)
 ):
     """
-    Send mock emails to users matching the filter.
+    Queue an email campaign to users matching the filter.
+    Returns the job id immediately; poll GET /send-emails/{job_id} for progress.
+    """
+    return jobs.get_job_manager().submit(filter)
+
+@app.get("/send-emails/{job_id}" , tags=["Mail"])
+def get_send_emails_job(job_id: str):
+    """
+    Progress of an email campaign: status, sent/failed counts and throughput.
     """
-    return crud.send_emails_to_users(db, filter)
+    job = jobs.get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 # Analytics Endpoint
 @app.get("/analytics/user-engagement" , tags=["Analytics"])
-def user_engagement_analytics(db=Depends(dependencies.get_db)):
+def user_engagement_analytics(refresh: bool = False, db=Depends(dependencies.get_db)):
+    """
+    Get user engagement analytics: totals, distributions (percentiles and
+    histogram) of hosted/attended counts, rollups by company/city/state/job_title
+    and the top users. Served from a snapshot refreshed every
+    ANALYTICS_REFRESH_SECONDS; `refresh=true` rescans the users table first.
+    """
+    return crud.user_engagement_analytics(db, refresh)
+
+@app.get("/analytics/user-engagement/users" , tags=["Analytics"])
+def user_engagement_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db=Depends(dependencies.get_db)
+):
+    """
+    Hosted/attended counts per user, one page at a time (pass `next_cursor` back as `cursor`).
+    """
+    return _page(crud.get_user_engagement_page, db, limit, cursor)
+
+@app.get("/cache/stats" , tags=["Analytics"])
+def get_cache_stats():
+    """
+    Hit/miss/eviction counters of the user and event read-through caches (this worker only).
+    """
+    return cache.cache_stats()
+
+@app.get("/metrics/dynamodb" , tags=["Analytics"])
+def get_dynamodb_metrics():
     """
-    Get user engagement analytics.
+    DynamoDB API calls made by this worker since it started, in total and per operation.
     """
-    return crud.user_engagement_analytics(db)
+    return metrics.dynamodb_calls.snapshot()
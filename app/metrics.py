@@ -0,0 +1,39 @@
+"""
+metrics.py
+Per-process count of DynamoDB API calls by operation, collected with a
+botocore event hook on the shared sync and async clients. Served by
+GET /metrics/dynamodb; the benchmark suite reads it before and after each
+scenario to report DynamoDB calls per request.
+"""
+
+import threading
+from collections import Counter
+
+
+class CallCounter:
+    """
+    botocore 'before-call' handler counting calls per operation. Retries of a
+    call are not counted again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def __call__(self, model=None, **kwargs):
+        with self._lock:
+            self._counts[model.name] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {'total': sum(self._counts.values()), 'operations': dict(sorted(self._counts.items()))}
+
+
+dynamodb_calls = CallCounter()
+
+
+def instrument(client):
+    """
+    Count the calls made through a (boto3 or aiobotocore) DynamoDB client.
+    """
+    client.meta.events.register('before-call.dynamodb', dynamodb_calls)
@@ -0,0 +1,45 @@
+"""
+migrate_email_logs.py
+One-shot migration that copies the legacy email_logs table (keyed by a random
+id) into email_log_entries (keyed by user_id + ts, with job/day indexes and a
+TTL), so logs can be queried instead of scanned.
+
+Run once after deploying the email_log_entries table (safe to re-run):
+    python -m app.migrate_email_logs
+Logs already past EMAIL_LOG_TTL_DAYS are not copied.
+"""
+
+import time
+
+from .batching import parallel_batch_write
+from .database import get_dynamodb_resource
+from .scanner import iter_scan_pages
+from .service import EMAIL_LOGS_TABLE, email_log_keys
+
+LEGACY_EMAIL_LOGS_TABLE = 'email_logs'
+
+
+def convert_log(item: dict) -> dict:
+    """
+    The email_log_entries item for a legacy email_logs item.
+    """
+    return {**item, **email_log_keys(item['id'], float(item['timestamp']))}
+
+
+def migrate_email_logs(db, now: float = None) -> int:
+    """
+    Copy every unexpired legacy log, one scan page at a time. Returns the number copied.
+    """
+    now = time.time() if now is None else now
+    copied = 0
+    for page in iter_scan_pages(db.Table(LEGACY_EMAIL_LOGS_TABLE)):
+        items = [convert_log(item) for item in page.get('Items', []) if 'user_id' in item and 'timestamp' in item]
+        items = [item for item in items if item['expires_at'] > now]
+        parallel_batch_write(db, EMAIL_LOGS_TABLE, items)
+        copied += len(items)
+    return copied
+
+
+if __name__ == '__main__':
+    copied = migrate_email_logs(get_dynamodb_resource())
+    print(f"Migrated {copied} email logs.")
@@ -0,0 +1,46 @@
+"""
+migrate_event_slugs.py
+One-shot migration that claims the slugs of existing events in the
+event_slugs table, so events created before slugs were unique cannot be
+given a duplicate by new writes.
+
+Run once after deploying the event_slugs table (safe to re-run):
+    python -m app.migrate_event_slugs
+When several existing events share a slug, the first one scanned keeps it;
+the others are reported so they can be renamed.
+"""
+
+from .batching import parallel_map
+from .database import get_dynamodb_resource
+from .scanner import iter_scan_pages
+from .service import SlugTaken, claim_slug
+
+
+def migrate_event_slugs(db) -> dict:
+    """
+    Claim every event's slug, one scan page at a time.
+    Returns {'claimed': n, 'duplicates': [{'id', 'slug'}]}.
+    """
+    claimed, duplicates = 0, []
+
+    def claim(item):
+        try:
+            return claim_slug(db, item['slug'], item['id'])
+        except SlugTaken:
+            return None
+
+    for page in iter_scan_pages(db.Table('events'), ProjectionExpression='id, slug'):
+        items = [item for item in page.get('Items', []) if item.get('slug')]
+        for item, result in zip(items, parallel_map(claim, items)):
+            if result is None:
+                duplicates.append({'id': item['id'], 'slug': item['slug']})
+            else:
+                claimed += result
+    return {'claimed': claimed, 'duplicates': duplicates}
+
+
+if __name__ == '__main__':
+    result = migrate_event_slugs(get_dynamodb_resource())
+    print(f"Claimed {result['claimed']} event slugs.")
+    for duplicate in result['duplicates']:
+        print(f"Duplicate slug {duplicate['slug']!r} on event {duplicate['id']}")
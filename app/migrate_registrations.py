@@ -0,0 +1,121 @@
+"""
+migrate_registrations.py
+One-shot migration that copies the legacy events.attendees and
+users.events_attended lists into the registrations table.
+
+Run once after deploying the registrations table (safe to re-run):
+    python -m app.migrate_registrations
+Add --drop-lists to remove the copied lists from events and users afterwards.
+The copied registrations are added to each event's capacity counter.
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from .database import get_dynamodb_resource, DYNAMODB_MAX_POOL_CONNECTIONS
+from .scanner import scan_table
+from .service import REGISTRATIONS_TABLE, EVENT_COUNTERS_TABLE
+
+
+LEGACY_LISTS = (('events', 'attendees'), ('users', 'events_attended'))
+
+
+def legacy_items(db, table_name: str, attr: str, items=None) -> list:
+    """
+    The items of `table_name` that still have the legacy list `attr`: the
+    given items (to migrate only those), else every such item in the table.
+    """
+    if items is not None:
+        return [item for item in items if attr in item]
+    return scan_table(
+        db.Table(table_name), ProjectionExpression=f'id, {attr}', FilterExpression=f'attribute_exists({attr})'
+    )
+
+
+def legacy_registrations(db, events=None, users=None) -> set:
+    """
+    Every (event_id, user_id) pair found in either side's list.
+    """
+    pairs = set()
+    for event in legacy_items(db, 'events', 'attendees', events):
+        pairs.update((event['id'], user_id) for user_id in event['attendees'])
+    for user in legacy_items(db, 'users', 'events_attended', users):
+        pairs.update((event_id, user['id']) for event_id in user['events_attended'])
+    return pairs
+
+
+def copy_registration(table, event_id: str, user_id: str) -> bool:
+    """
+    Insert one registration unless it already exists (a registration made
+    through the new path keeps its registered_at). Returns True if inserted.
+    """
+    try:
+        table.put_item(
+            Item={'event_id': event_id, 'user_id': user_id},
+            ConditionExpression='attribute_not_exists(event_id)'
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def count_copied(db, event_id: str, copied: int):
+    """
+    Add an event's copied registrations to its capacity counter (shard 0),
+    creating the counter if no registration through the new path has yet.
+    Registrations that were already there are counted already.
+    """
+    db.Table(EVENT_COUNTERS_TABLE).update_item(
+        Key={'event_id': event_id, 'shard': 0},
+        UpdateExpression='ADD registered :n',
+        ExpressionAttributeValues={':n': copied}
+    )
+
+
+def drop_lists(db, events=None, users=None) -> int:
+    """
+    Remove the migrated attendees / events_attended lists (of the given
+    items only, if any), bumping each item's version so If-Match with an
+    ETag from before the migration fails. Returns the number of items changed.
+    """
+    dropped = 0
+    for (table_name, attr), given in zip(LEGACY_LISTS, (events, users)):
+        table = db.Table(table_name)
+        items = legacy_items(db, table_name, attr, given)
+        with ThreadPoolExecutor(max_workers=DYNAMODB_MAX_POOL_CONNECTIONS) as pool:
+            list(pool.map(lambda item: table.update_item(
+                Key={'id': item['id']},
+                UpdateExpression=f'REMOVE {attr} ADD version :one',
+                ExpressionAttributeValues={':one': 1}
+            ), items))
+        dropped += len(items)
+    return dropped
+
+
+def migrate_registrations(db, drop: bool = False, events=None, users=None) -> int:
+    """
+    Copy every legacy registration in parallel, or only those in the lists of
+    the given event / user items. Returns the number inserted.
+    """
+    table = db.Table(REGISTRATIONS_TABLE)
+    pairs = list(legacy_registrations(db, events, users))
+    with ThreadPoolExecutor(max_workers=DYNAMODB_MAX_POOL_CONNECTIONS) as pool:
+        inserted = list(pool.map(lambda pair: copy_registration(table, *pair), pairs))
+        per_event = Counter(event_id for (event_id, _), copied in zip(pairs, inserted) if copied)
+        list(pool.map(lambda entry: count_copied(db, *entry), per_event.items()))
+    if drop:
+        drop_lists(db, events, users)
+    return sum(inserted)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--drop-lists', action='store_true', help='remove the legacy lists after copying')
+    args = parser.parse_args()
+    inserted = migrate_registrations(get_dynamodb_resource(), drop=args.drop_lists)
+    print(f"Migrated {inserted} registrations.")
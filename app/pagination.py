@@ -0,0 +1,104 @@
+"""
+pagination.py
+Opaque cursor pagination on top of DynamoDB's ExclusiveStartKey, and NDJSON
+streaming helpers for list endpoints.
+"""
+
+import base64
+import json
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a pagination cursor cannot be decoded.
+    """
+
+
+def json_default(value):
+    """
+    JSON encoder fallback for values returned by DynamoDB (Decimal, set).
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, set):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content as compact JSON bytes, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default)
+    return json.dumps(content, default=json_default, separators=(',', ':')).encode()
+
+
+def encode_cursor(last_key: Optional[dict]) -> Optional[str]:
+    """
+    Encode a LastEvaluatedKey as an opaque, URL-safe cursor string.
+    """
+    if not last_key:
+        return None
+    raw = json.dumps(last_key, default=json_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """
+    Decode a cursor produced by encode_cursor back into an ExclusiveStartKey.
+    Raises InvalidCursor for malformed cursors.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(raw, parse_float=Decimal, parse_int=Decimal)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+    if not isinstance(key, dict):
+        raise InvalidCursor('Invalid cursor')
+    return key
+
+
+def scan_page(table, limit: int, cursor: Optional[str] = None, **scan_kwargs) -> Tuple[list, Optional[str]]:
+    """
+    Read one page of a table scan. Returns (items, next_cursor); next_cursor is
+    None once the table is exhausted. As with DynamoDB's Limit, a page may hold
+    fewer than `limit` items when a FilterExpression is applied.
+    """
+    start_key = decode_cursor(cursor)
+    if start_key:
+        scan_kwargs['ExclusiveStartKey'] = start_key
+    response = table.scan(Limit=limit, **scan_kwargs)
+    return response.get('Items', []), encode_cursor(response.get('LastEvaluatedKey'))
+
+
+def query_page(table, limit: int, cursor: Optional[str] = None, **query_kwargs) -> Tuple[list, Optional[str]]:
+    """
+    Read one page of a Query. Returns (items, next_cursor) like scan_page.
+    """
+    start_key = decode_cursor(cursor)
+    if start_key:
+        query_kwargs['ExclusiveStartKey'] = start_key
+    response = table.query(Limit=limit, **query_kwargs)
+    return response.get('Items', []), encode_cursor(response.get('LastEvaluatedKey'))
+
+
+def ndjson_stream(pages: Iterable[list], transform: Optional[Callable] = None) -> Iterator[bytes]:
+    """
+    Serialize items as newline-delimited JSON, emitting one chunk per scan page
+    so rows reach the client as soon as each page arrives.
+    """
+    for items in pages:
+        if transform is not None:
+            items = [transform(item) for item in items]
+        if items:
+            yield b''.join(dumps(item) + b'\n' for item in items)
@@ -0,0 +1,126 @@
+"""
+query_planner.py
+Chooses how filter_users reads the users table: a Query against the most
+selective secondary index available, or a (segmented) Scan when no indexed
+predicate is present. Remaining predicates (including the numeric
+hosted/attended counters) are pushed down as FilterExpressions.
+"""
+
+import logging
+import os
+from typing import Callable, Optional
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from .scanner import query_table, scan_table
+
+logger = logging.getLogger("event_crm")
+
+# Secondary indexes on the users table (attribute -> index name), see init_dynamodb.py
+USER_INDEXES = {
+    'company': 'company-index',
+    'job_title': 'job_title-index',
+    'city': 'city-index',
+    'state': 'state-index',
+}
+
+# Indexed attributes ordered from most to least selective (a company or a job title
+# narrows the result far more than a state). Override with USER_INDEX_PRIORITY=a,b,c.
+USER_INDEX_PRIORITY = [
+    name.strip()
+    for name in os.getenv("USER_INDEX_PRIORITY", "company,job_title,city,state").split(",")
+    if name.strip() in USER_INDEXES
+]
+
+
+def _equality_filters(equals: dict):
+    for attr, value in equals.items():
+        yield attr, Attr(attr).eq(value)
+
+
+def _range_filters(ranges: dict):
+    """
+    Conditions on the maintained events_hosted_count / events_attended_count
+    attributes. A missing counter means zero, so a non-negative upper bound
+    also accepts items without the attribute.
+    """
+    for (attr, bound), value in ranges.items():
+        counter = f"{attr}_count"
+        if bound == 'min' and value > 0:
+            yield f"{attr}_min", Attr(counter).gte(value)
+        elif bound == 'max' and value >= 0:
+            yield f"{attr}_max", Attr(counter).not_exists() | Attr(counter).lte(value)
+        elif bound == 'max':
+            yield f"{attr}_max", Attr(counter).lte(value)
+
+
+def plan_user_filter(equals: dict, ranges: dict) -> dict:
+    """
+    Build a plan for the given predicates.
+
+    equals: attribute -> required value for the equality filters that are set.
+    ranges: (attribute, 'min'|'max') -> bound for the relationship-count filters that are set.
+    """
+    index_attr = next((attr for attr in USER_INDEX_PRIORITY if attr in equals), None)
+    filters = []
+    condition = None
+    remaining = {attr: value for attr, value in equals.items() if attr != index_attr}
+    for name, cond in list(_equality_filters(remaining)) + list(_range_filters(ranges)):
+        filters.append(name)
+        condition = cond if condition is None else condition & cond
+    plan = {
+        'operation': 'Query' if index_attr else 'Scan',
+        'index': USER_INDEXES.get(index_attr),
+        'key_condition': {index_attr: equals[index_attr]} if index_attr else None,
+        'filters': filters,
+        '_condition': condition,
+    }
+    return plan
+
+
+def execute_user_plan(
+    table,
+    plan: dict,
+    limit: Optional[int] = None,
+    predicate: Optional[Callable[[dict], bool]] = None
+):
+    """
+    Run a plan built by plan_user_filter. Returns (items, explain) where explain
+    reports the index used and how many items were read versus returned.
+    """
+    stats = {}
+    kwargs = {}
+    if plan['_condition'] is not None:
+        kwargs['FilterExpression'] = plan['_condition']
+    explain = {key: value for key, value in plan.items() if not key.startswith('_')}
+    items = None
+    if plan['index']:
+        attr, value = next(iter(plan['key_condition'].items()))
+        try:
+            items = query_table(
+                table,
+                limit=limit,
+                predicate=predicate,
+                stats=stats,
+                IndexName=plan['index'],
+                KeyConditionExpression=Key(attr).eq(value),
+                **kwargs
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('ValidationException', 'ResourceNotFoundException'):
+                raise
+            # Index not provisioned (yet): keep answering, just without it
+            logger.warning(f"Index {plan['index']} unavailable, falling back to scan: {e}")
+            condition = Attr(attr).eq(value)
+            if 'FilterExpression' in kwargs:
+                condition = condition & kwargs['FilterExpression']
+            kwargs['FilterExpression'] = condition
+            explain.update(operation='Scan', index=None, fallback=f"{plan['index']} unavailable")
+            stats = {}
+    if items is None:
+        items = scan_table(table, limit=limit, predicate=predicate, stats=stats, **kwargs)
+    explain['items_read'] = stats.get('scanned_count', 0)
+    explain['items_matched'] = len(items)
+    explain['pages'] = stats.get('pages', 0)
+    return items, explain
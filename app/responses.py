@@ -0,0 +1,34 @@
+"""
+responses.py
+Fast JSON responses.
+
+ORJSONResponse is the application's default response class: orjson encodes
+DynamoDB items directly, converting Decimals through pagination.json_default
+instead of the stdlib encoder. shaped_response serves large lists of users or
+events as rows projected onto the output schema (see schemas.ResponseShape),
+skipping the per-row pydantic validation FastAPI's response_model would do.
+"""
+
+from typing import Any, List
+
+from fastapi.responses import JSONResponse
+
+from .pagination import dumps
+from .schemas import ResponseShape
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson, accepting Decimal and set values.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def shaped_response(shape: ResponseShape, items: List[dict], **kwargs) -> ORJSONResponse:
+    """
+    Return items as a JSON list shaped like the route's response_model.
+    Returning a Response bypasses FastAPI's own response validation.
+    """
+    return ORJSONResponse(shape.rows(items), **kwargs)
@@ -0,0 +1,151 @@
+"""
+scanner.py
+Shared scan engine for DynamoDB tables: follows LastEvaluatedKey pagination to
+completion and can split a table into parallel Segment/TotalSegments workers.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional
+
+from .database import DYNAMODB_MAX_POOL_CONNECTIONS
+
+SCAN_SEGMENTS = int(os.getenv("SCAN_SEGMENTS", 4))
+SCAN_MAX_WORKERS = int(os.getenv("SCAN_MAX_WORKERS", DYNAMODB_MAX_POOL_CONNECTIONS))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """
+    Returns the thread pool shared by all segmented scans in this process.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=SCAN_MAX_WORKERS, thread_name_prefix="scan")
+    return _executor
+
+
+def _record(stats: Optional[dict], response: dict):
+    """
+    Accumulate read diagnostics (pages, items read, items returned) into stats.
+    """
+    if stats is not None:
+        stats['pages'] = stats.get('pages', 0) + 1
+        stats['scanned_count'] = stats.get('scanned_count', 0) + response.get('ScannedCount', 0)
+        stats['count'] = stats.get('count', 0) + response.get('Count', 0)
+
+
+def iter_scan_pages(table, stats: Optional[dict] = None, **scan_kwargs) -> Iterator[dict]:
+    """
+    Yield raw scan responses page by page until LastEvaluatedKey is exhausted.
+    """
+    while True:
+        response = table.scan(**scan_kwargs)
+        _record(stats, response)
+        yield response
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        scan_kwargs['ExclusiveStartKey'] = last_key
+
+
+def iter_query_pages(table, stats: Optional[dict] = None, **query_kwargs) -> Iterator[dict]:
+    """
+    Yield raw query responses page by page until LastEvaluatedKey is exhausted.
+    """
+    while True:
+        response = table.query(**query_kwargs)
+        _record(stats, response)
+        yield response
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        query_kwargs['ExclusiveStartKey'] = last_key
+
+
+def query_table(
+    table,
+    limit: Optional[int] = None,
+    predicate: Optional[Callable[[dict], bool]] = None,
+    stats: Optional[dict] = None,
+    **query_kwargs
+) -> List[dict]:
+    """
+    Run a Query to completion (or until `limit` matching items are collected).
+    """
+    items = []
+    for page in iter_query_pages(table, stats=stats, **query_kwargs):
+        page_items = page.get('Items', [])
+        if predicate is not None:
+            page_items = [item for item in page_items if predicate(item)]
+        items.extend(page_items)
+        if limit is not None and len(items) >= limit:
+            return items[:limit]
+    return items
+
+
+def iter_scan(table, **scan_kwargs) -> Iterator[dict]:
+    """
+    Yield every item of a (serial) scan, following pagination.
+    """
+    for page in iter_scan_pages(table, **scan_kwargs):
+        yield from page.get('Items', [])
+
+
+def scan_table(
+    table,
+    segments: Optional[int] = None,
+    limit: Optional[int] = None,
+    predicate: Optional[Callable[[dict], bool]] = None,
+    stats: Optional[dict] = None,
+    **scan_kwargs
+) -> List[dict]:
+    """
+    Scan a whole table and return the matching items.
+
+    segments: number of parallel Segment/TotalSegments workers (default SCAN_SEGMENTS).
+    limit: return at most this many matching items, stopping each segment early.
+    predicate: optional in-memory filter applied to each item.
+    stats: optional dict that receives pages / scanned_count / count totals.
+    Any other keyword arguments (FilterExpression, ProjectionExpression, ...) are
+    passed through to every scan call.
+    """
+    segments = max(1, segments or SCAN_SEGMENTS)
+    results = [[] for _ in range(segments)]
+    segment_stats = [{} for _ in range(segments)]
+
+    def scan_segment(segment):
+        kwargs = dict(scan_kwargs)
+        if segments > 1:
+            kwargs['Segment'] = segment
+            kwargs['TotalSegments'] = segments
+        for page in iter_scan_pages(table, stats=segment_stats[segment], **kwargs):
+            items = page.get('Items', [])
+            if predicate is not None:
+                items = [item for item in items if predicate(item)]
+            results[segment].extend(items)
+            # Each segment stops on its own first `limit` matches, so truncating the
+            # segment-ordered concatenation gives the same page on every call.
+            if limit is not None and len(results[segment]) >= limit:
+                return
+
+    if segments == 1:
+        scan_segment(0)
+    else:
+        futures = [_get_executor().submit(scan_segment, segment) for segment in range(segments)]
+        for future in futures:
+            future.result()
+
+    if stats is not None:
+        for segment_stat in segment_stats:
+            for key, value in segment_stat.items():
+                stats[key] = stats.get(key, 0) + value
+    items = [item for segment_items in results for item in segment_items]
+    if limit is not None:
+        items = items[:limit]
+    return items
@@ -4,8 +4,8 @@ schemas.py
 Pydantic models for request and response validation for users, events, and filters.
 """
 
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Optional, Type
 
 class EventCreate(BaseModel):
     """
@@ -36,6 +36,7 @@ class EventOut(BaseModel):
     owner: str
     hosts: List[str]
     attendees: List[str] = []
+    version: int = 0
 
 class UserCreate(BaseModel):
     """
@@ -60,12 +61,178 @@ class UserOut(BaseModel):
     firstName: str
     lastName: str
     email: str
-    company: Optional[str]
-    job_title: Optional[str]
-    city: Optional[str]
-    state: Optional[str]
+    company: Optional[str] = None
+    job_title: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
     events_hosted: List[str]
     events_attended: List[str]
+    events_hosted_count: int = 0
+    events_attended_count: int = 0
+    version: int = 0
+
+class EventExpanded(EventOut):
+    """
+    Schema for an event with its attendees and/or hosts resolved into users
+    (only the lists named in `expand` are filled). Expanded attendees are
+    capped per event; attendees_truncated says whether some were left out.
+    """
+    attendee_users: List[UserOut] = []
+    host_users: List[UserOut] = []
+    attendees_truncated: bool = False
+
+class UserPatch(BaseModel):
+    """
+    Schema for a partial user update: only the fields sent are changed,
+    and null removes an optional field.
+    """
+    firstName: Optional[str] = None
+    lastName: Optional[str] = None
+    email: Optional[str] = None
+    phoneNumber: Optional[str] = None
+    avatar: Optional[str] = None
+    gender: Optional[str] = None
+    job_title: Optional[str] = None
+    company: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+
+class EventPatch(BaseModel):
+    """
+    Schema for a partial event update: only the fields sent are changed,
+    and null removes an optional field.
+    """
+    slug: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    startAt: Optional[str] = None
+    endAt: Optional[str] = None
+    venue: Optional[str] = None
+    maxCapacity: Optional[int] = None
+    owner: Optional[str] = None
+    hosts: Optional[List[str]] = None
+
+class UserPatchItem(BaseModel):
+    """
+    Schema for one edit in a batch user PATCH.
+    """
+    id: str
+    changes: UserPatch
+    if_match: Optional[int] = None
+
+class EventPatchItem(BaseModel):
+    """
+    Schema for one edit in a batch event PATCH.
+    """
+    id: str
+    changes: EventPatch
+    if_match: Optional[int] = None
+
+class PatchFailure(BaseModel):
+    """
+    Schema for an edit of a batch PATCH that was not applied.
+    """
+    id: str
+    status: int
+    error: str
+
+class UserPatchResult(BaseModel):
+    """
+    Schema for the outcome of a batch user PATCH.
+    """
+    items: List[UserOut]
+    failed: List[PatchFailure] = []
+
+class UserPage(BaseModel):
+    """
+    Schema for one cursor-paginated page of users.
+    """
+    items: List[UserOut]
+    next_cursor: Optional[str] = None
+
+class EventPage(BaseModel):
+    """
+    Schema for one cursor-paginated page of events.
+    """
+    items: List[EventOut]
+    next_cursor: Optional[str] = None
+
+class EventExpandedPage(BaseModel):
+    """
+    Schema for one cursor-paginated page of expanded events.
+    """
+    items: List[EventExpanded]
+    next_cursor: Optional[str] = None
+
+class EventPatchResult(BaseModel):
+    """
+    Schema for the outcome of a batch event PATCH.
+    """
+    items: List[EventOut]
+    failed: List[PatchFailure] = []
+
+class Registration(BaseModel):
+    """
+    Schema for one user's registration for one event.
+    """
+    event_id: str
+    user_id: str
+    registered_at: Optional[int] = None
+
+class RegistrationPage(BaseModel):
+    """
+    Schema for one cursor-paginated page of registrations.
+    """
+    items: List[Registration]
+    next_cursor: Optional[str] = None
+
+class IdList(BaseModel):
+    """
+    Schema for fetching many users or events by id.
+    """
+    ids: List[str]
+
+class UserBatch(BaseModel):
+    """
+    Schema for users fetched by id, plus the ids that were not found.
+    """
+    items: List[UserOut]
+    missing: List[str] = []
+
+class EventSearchHit(BaseModel):
+    """
+    Schema for one event search result (the indexed fields and the match score).
+    """
+    id: str
+    slug: str
+    title: str
+    venue: Optional[str] = None
+    startAt: str
+    endAt: str
+    score: float
+
+class EventBatch(BaseModel):
+    """
+    Schema for events fetched by id, plus the ids that were not found.
+    """
+    items: List[EventOut]
+    missing: List[str] = []
+
+class BulkImportResult(BaseModel):
+    """
+    Schema for the summary of a bulk import.
+    """
+    created: int
+    failed: int
+    errors: List[dict] = []
+
+class UserFilterExplain(BaseModel):
+    """
+    Schema for filtered users together with the executed query plan.
+    """
+    users: List[UserOut]
+    explain: dict
+    next_cursor: Optional[str] = None
 
 class UserFilter(BaseModel):
     """
@@ -75,10 +242,36 @@ class UserFilter(BaseModel):
     job_title: Optional[str]
     city: Optional[str]
     state: Optional[str]
-    events_hosted_min: Optional[int] = None
-    events_hosted_max: Optional[int] = None
-    events_attended_min: Optional[int] = None
-    events_attended_max: Optional[int] = None
+    events_hosted_min: Optional[int] = Field(None, ge=0)
+    events_hosted_max: Optional[int] = Field(None, ge=0)
+    events_attended_min: Optional[int] = Field(None, ge=0)
+    events_attended_max: Optional[int] = Field(None, ge=0)
     sort_by: Optional[str]
+    sort_order: str = 'asc'
     skip: int = 0
     limit: int = 10
+
+class ResponseShape:
+    """
+    The fields and defaults of a flat output schema, used to turn many
+    DynamoDB items into response rows without building a model per row.
+    Items were validated when written, so rows are only projected onto the
+    schema's fields; a list with an item missing a required field is
+    validated in one TypeAdapter call instead (raising as the model would).
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.adapter = TypeAdapter(List[model])
+        self.fields = list(model.model_fields)
+        self.required = frozenset(name for name, field in model.model_fields.items() if field.is_required())
+        self.defaults = {name: field.default for name, field in model.model_fields.items() if not field.is_required()}
+
+    def rows(self, items: List[dict]) -> List[dict]:
+        if not all(self.required <= item.keys() for item in items):
+            return self.adapter.dump_python(self.adapter.validate_python(items), mode='json')
+        fields, defaults = self.fields, self.defaults
+        return [{name: item.get(name, defaults.get(name)) for name in fields} for item in items]
+
+USER_SHAPE = ResponseShape(UserOut)
+EVENT_SHAPE = ResponseShape(EventOut)
+EXPANDED_EVENT_SHAPE = ResponseShape(EventExpanded)
@@ -0,0 +1,229 @@
+"""
+search_index.py
+In-process full-text index of events for GET /events/search.
+
+Titles, venues and descriptions are tokenized (case- and accent-insensitive,
+so "ha noi" finds "Hà Nội") into an inverted index of term -> {event: weighted
+term frequency}. Queries are ranked with BM25, a title match counting more than
+a venue match and a venue match more than a description match; the last query
+word also matches as a prefix, for search-as-you-type.
+
+The index keeps only the fields it searches and returns, so it is loaded with
+a projected parallel scan: at startup, on the first search, and again when it
+is older than SEARCH_INDEX_REFRESH_SECONDS. In between, create/update/delete
+of events keep it current. Like the user index, each worker process holds its
+own copy, so writes made by other processes are seen after the next reload.
+"""
+
+import bisect
+import heapq
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional
+
+from .scanner import scan_table
+
+SEARCH_INDEX_REFRESH_SECONDS = float(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", 300))
+# Vocabulary terms a prefix may expand to (the most frequent first)
+SEARCH_MAX_PREFIX_TERMS = int(os.getenv("SEARCH_MAX_PREFIX_TERMS", 50))
+
+# Field weights: a term's frequency in the title counts three times
+FIELD_WEIGHTS = {'title': 3.0, 'venue': 1.5, 'description': 1.0}
+# Fields kept per event and returned with each hit
+STORED_FIELDS = ('id', 'slug', 'title', 'venue', 'startAt', 'endAt')
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Lower-cased words with accents removed ("Đà Nẵng" -> ["da", "nang"]).
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text.casefold().replace('đ', 'd'))
+    return _TOKEN.findall(''.join(char for char in text if not unicodedata.combining(char)))
+
+
+class EventSearchIndex:
+    """
+    Inverted index with BM25 ranking over event items.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rows: List[Optional[dict]] = []
+        self._terms: List[Dict[str, float]] = []
+        self._lengths: List[float] = []
+        self._positions: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._total_length = 0.0
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _unlink(self, position: int):
+        for term in self._terms[position]:
+            postings = self._postings[term]
+            del postings[position]
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+        self._total_length -= self._lengths[position]
+        self._rows[position] = None
+        self._terms[position] = {}
+        self._lengths[position] = 0.0
+
+    def put(self, item: dict):
+        """
+        Insert or replace an event item.
+        """
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(item.get(field)):
+                terms[token] = terms.get(token, 0.0) + weight
+        with self._lock:
+            position = self._positions.get(item['id'])
+            if position is not None:
+                self._unlink(position)
+            elif self._free:
+                position = self._free.pop()
+            else:
+                position = len(self._rows)
+                self._rows.append(None)
+                self._terms.append({})
+                self._lengths.append(0.0)
+            self._positions[item['id']] = position
+            self._rows[position] = {field: item.get(field) for field in STORED_FIELDS}
+            self._terms[position] = terms
+            self._lengths[position] = sum(terms.values())
+            self._total_length += self._lengths[position]
+            for term, frequency in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._vocabulary = None
+                postings[position] = frequency
+
+    def remove(self, event_id: str):
+        """
+        Drop an event from the index (no-op if absent).
+        """
+        with self._lock:
+            position = self._positions.pop(event_id, None)
+            if position is not None:
+                self._unlink(position)
+                self._free.append(position)
+
+    def _expand(self, prefix: str) -> List[str]:
+        """
+        Vocabulary terms starting with prefix, the most frequent first.
+        """
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '\uffff')
+        terms = self._vocabulary[start:end]
+        if len(terms) > SEARCH_MAX_PREFIX_TERMS:
+            terms = heapq.nlargest(SEARCH_MAX_PREFIX_TERMS, terms, key=lambda term: len(self._postings[term]))
+        return terms
+
+    def _term_scores(self, term: str, average_length: float) -> Dict[int, float]:
+        postings = self._postings.get(term)
+        if not postings:
+            return {}
+        documents = len(self._positions)
+        idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+        return {
+            position: idf * frequency * (BM25_K1 + 1) / (
+                frequency + BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[position] / average_length)
+            )
+            for position, frequency in postings.items()
+        }
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> List[dict]:
+        """
+        The best `limit` events for the query, each with its score. Events
+        matching more (or rarer) query words rank higher; with prefix=True the
+        last word also matches longer words ("conf" -> "conference").
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            if not tokens or not self._positions:
+                return []
+            average_length = (self._total_length / len(self._positions)) or 1.0
+            scores: Dict[int, float] = {}
+            for number, token in enumerate(tokens):
+                if prefix and number == len(tokens) - 1:
+                    # The best-scoring completion counts, so a prefix matching
+                    # many words does not outweigh the other query words
+                    token_scores: Dict[int, float] = {}
+                    for term in self._expand(token):
+                        for position, score in self._term_scores(term, average_length).items():
+                            if score > token_scores.get(position, 0.0):
+                                token_scores[position] = score
+                else:
+                    token_scores = self._term_scores(token, average_length)
+                for position, score in token_scores.items():
+                    scores[position] = scores.get(position, 0.0) + score
+            best = heapq.nlargest(limit, scores.items(), key=lambda hit: (hit[1], -hit[0]))
+            return [{**self._rows[position], 'score': round(score, 4)} for position, score in best]
+
+
+_index: Optional[EventSearchIndex] = None
+_loaded_at = 0.0
+_load_lock = threading.Lock()
+
+
+def load_search_index(db) -> EventSearchIndex:
+    """
+    Build the index from a projected, parallel segmented scan of the events table and publish it.
+    """
+    global _index, _loaded_at
+    fields = tuple(dict.fromkeys(STORED_FIELDS + tuple(FIELD_WEIGHTS)))
+    names = {f'#s{position}': name for position, name in enumerate(fields)}
+    index = EventSearchIndex()
+    for item in scan_table(db.Table('events'), ProjectionExpression=', '.join(names), ExpressionAttributeNames=names):
+        index.put(item)
+    _index, _loaded_at = index, time.monotonic()
+    return index
+
+
+def get_search_index(db) -> EventSearchIndex:
+    """
+    The process-wide index, loaded on first use and reloaded once it is older
+    than SEARCH_INDEX_REFRESH_SECONDS (one caller reloads while the others keep
+    searching the current index).
+    """
+    stale = _index is None or time.monotonic() - _loaded_at >= SEARCH_INDEX_REFRESH_SECONDS
+    if stale and _load_lock.acquire(blocking=_index is None):
+        try:
+            if _index is None or time.monotonic() - _loaded_at >= SEARCH_INDEX_REFRESH_SECONDS:
+                return load_search_index(db)
+        finally:
+            _load_lock.release()
+    return _index
+
+
+def index_event(item: dict):
+    """
+    Hook for event writes: add or replace the event if the index is loaded.
+    """
+    if _index is not None:
+        _index.put(item)
+
+
+def unindex_event(event_id: str):
+    """
+    Hook for event deletes.
+    """
+    if _index is not None:
+        _index.remove(event_id)
@@ -6,9 +6,26 @@ Business logic for user, event, registration, filtering, analytics, and email lo
 
 import logging
 from .models import User, Event
-from .schemas import UserFilter, UserCreate, UserOut
+from .schemas import UserFilter, UserCreate, USER_SHAPE
+from .scanner import scan_table, iter_query_pages, iter_scan_pages
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, scan_page, query_page
+from .query_planner import plan_user_filter, execute_user_plan
+from .user_index import get_user_index
+from .sorting import parse_sort, select_page
+from .batching import TRANSACT_WRITE_LIMIT, BatchWriter, batch_get, parallel_map, transact_write
+from .cache import user_cache, event_cache
+from .analytics import engagement, record_engagement
+from .search_index import get_search_index, index_event, unindex_event
 from typing import List, Optional
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+import heapq
+import itertools
+import os
+import random
+import time
 import uuid
+from datetime import datetime, timedelta, timezone
 
 # Configure logging
 logger = logging.getLogger("event_crm")
@@ -20,37 +37,111 @@ if not logger.hasHandlers():
     logger.addHandler(handler)
 
 
+def _without_nulls(item: dict) -> dict:
+    """
+    Drop None-valued attributes so indexed attributes are simply absent (sparse
+    GSIs reject NULL key values) instead of being stored as NULL.
+    """
+    return {key: value for key, value in item.items() if value is not None}
+
+class PreconditionFailed(Exception):
+    """
+    Raised when a conditional write's expected version (If-Match) is not the current one.
+    """
+
+def _version_condition(if_match):
+    """
+    Write arguments that make a put/delete conditional on the stored version.
+    """
+    if if_match is None:
+        return {}
+    if if_match == 0:
+        return {'ConditionExpression': 'attribute_exists(id) AND attribute_not_exists(version)'}
+    return {'ConditionExpression': 'version = :expected', 'ExpressionAttributeValues': {':expected': if_match}}
+
+def _versioned_put(table, item, if_match=None, max_attempts=5):
+    """
+    Replace an item, setting version to the stored version + 1.
+
+    With if_match (the version the client last read), the put only succeeds
+    if that is still the stored version; otherwise PreconditionFailed is raised.
+    Without it, the current version is read first and the put retried if a
+    concurrent write got in between. Items without a version count as version 0.
+    Returns the replaced item (None if there was none).
+    """
+    key = {'id': item['id']}
+    for _ in range(max_attempts):
+        if if_match is not None:
+            expected = if_match
+        else:
+            current = table.get_item(Key=key, ProjectionExpression='version').get('Item')
+            expected = None if current is None else int(current.get('version', 0))
+        if expected is None:
+            condition = {'ConditionExpression': 'attribute_not_exists(id)'}
+        else:
+            condition = _version_condition(expected)
+        item['version'] = (expected or 0) + 1
+        try:
+            return table.put_item(Item=item, ReturnValues='ALL_OLD', **condition).get('Attributes')
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            if if_match is not None:
+                raise PreconditionFailed('Version does not match If-Match')
+    raise PreconditionFailed('Item kept changing during the update')
+
 def get_user(db, user_id):
     """
     Retrieve a user by user_id from the users table.
     """
     table = db.Table('users')
-    response = table.get_item(Key={'id': user_id})
-    item = response.get('Item')
+    item = user_cache.get(user_id, lambda key: table.get_item(Key={'id': key}).get('Item'))
     if not item:
         raise Exception('User not found')
-    item['events_hosted'] = item.get('events_hosted', [])
-    item['events_attended'] = item.get('events_attended', [])
-    return UserOut(**item)
+    return _user_out(item)
 
-def update_user(db, user_id, user: UserCreate):
+def update_user(db, user_id, user: UserCreate, if_match=None):
     """
     Update a user's information by user_id.
+    With if_match, only if the stored version still equals it (else PreconditionFailed).
     """
     table = db.Table('users')
     user_dict = user.dict()
     user_dict['id'] = user_id
     user_dict['events_hosted'] = []
     user_dict['events_attended'] = []
-    table.put_item(Item=user_dict)
-    return UserOut(**user_dict)
+    user_dict['events_hosted_count'] = 0
+    user_dict['events_attended_count'] = 0
+    item = _without_nulls(user_dict)
+    _versioned_put(table, item, if_match)
+    user_dict['version'] = item['version']
+    user_cache.invalidate(user_id)
+    index = get_user_index()
+    if index is not None:
+        index.put(user_dict)
+    return user_dict
+
+def _conditional_delete(table, key, if_match):
+    """
+    Delete an item (with if_match, only at that version). Returns the deleted item, if any.
+    """
+    try:
+        return table.delete_item(Key=key, ReturnValues='ALL_OLD', **_version_condition(if_match)).get('Attributes')
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        raise PreconditionFailed('Version does not match If-Match')
 
-def delete_user(db, user_id):
+def delete_user(db, user_id, if_match=None):
     """
-    Delete a user by user_id.
+    Delete a user by user_id (with if_match, only at that version).
     """
     table = db.Table('users')
-    table.delete_item(Key={'id': user_id})
+    _conditional_delete(table, {'id': user_id}, if_match)
+    user_cache.invalidate(user_id)
+    index = get_user_index()
+    if index is not None:
+        index.remove(user_id)
     return {"status": "deleted"}
 
 def get_event(db, event_id):
@@ -58,83 +149,523 @@ def get_event(db, event_id):
     Retrieve an event by event_id from the events table.
     """
     table = db.Table('events')
-    response = table.get_item(Key={'id': event_id})
-    item = response.get('Item')
+    item = event_cache.get(event_id, lambda key: table.get_item(Key={'id': key}).get('Item'))
     if not item:
         raise Exception('Event not found')
     item['hosts'] = item.get('hosts', [])
     item['attendees'] = item.get('attendees', [])
     return item
 
-def update_event(db, event_id, event):
+def update_event(db, event_id, event, if_match=None):
     """
     Update an event's information by event_id.
+    With if_match, only if the stored version still equals it (else PreconditionFailed).
     """
     table = db.Table('events')
     event_dict = event.dict()
     event_dict['id'] = event_id
     event_dict['attendees'] = []
-    table.put_item(Item=event_dict)
+    event_dict.update(event_start_keys(event_id, event_dict['startAt']))
+    claimed = claim_slug(db, event_dict['slug'], event_id)
+    try:
+        old = _versioned_put(table, event_dict, if_match)
+    except Exception:
+        if claimed:
+            release_slug(db, event_dict['slug'], event_id)
+        raise
+    if old and old.get('slug') != event_dict['slug']:
+        release_slug(db, old.get('slug'), event_id)
+    event_cache.invalidate(event_id)
+    index_event(event_dict)
     return event_dict
 
-def delete_event(db, event_id):
+def delete_event(db, event_id, if_match=None):
     """
-    Delete an event by event_id.
+    Delete an event by event_id (with if_match, only at that version).
     """
     table = db.Table('events')
-    table.delete_item(Key={'id': event_id})
+    old = _conditional_delete(table, {'id': event_id}, if_match)
+    if old:
+        release_slug(db, old.get('slug'), event_id)
+    event_cache.invalidate(event_id)
+    unindex_event(event_id)
     return {"status": "deleted"}
 
+# Slugs are unique: each one is claimed by an item {slug, event_id} in this
+# table (conditional writes), and events are looked up by slug through a GSI
+EVENT_SLUGS_TABLE = 'event_slugs'
+EVENTS_BY_SLUG_INDEX = 'slug-index'
+
+class SlugTaken(Exception):
+    """
+    Raised when an event's slug is already used by another event.
+    """
+
+def claim_slug(db, slug, event_id) -> bool:
+    """
+    Reserve slug for event_id. Returns False if the event already held it,
+    True if it was newly claimed; raises SlugTaken if another event holds it.
+    """
+    try:
+        old = db.Table(EVENT_SLUGS_TABLE).put_item(
+            Item={'slug': slug, 'event_id': event_id},
+            ConditionExpression='attribute_not_exists(slug) OR event_id = :id',
+            ExpressionAttributeValues={':id': event_id},
+            ReturnValues='ALL_OLD'
+        ).get('Attributes')
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        raise SlugTaken(f"Slug '{slug}' is already used by another event")
+    return old is None
+
+def release_slug(db, slug, event_id):
+    """
+    Free slug if event_id holds it (claims of other events are left alone).
+    """
+    if not slug:
+        return
+    try:
+        db.Table(EVENT_SLUGS_TABLE).delete_item(
+            Key={'slug': slug},
+            ConditionExpression='event_id = :id',
+            ExpressionAttributeValues={':id': event_id}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+def get_event_by_slug(db, slug):
+    """
+    Retrieve an event by slug (one Query on the slug index).
+    """
+    items = db.Table('events').query(
+        IndexName=EVENTS_BY_SLUG_INDEX,
+        KeyConditionExpression=Key('slug').eq(slug)
+    )['Items']
+    if not items:
+        raise NotFound('Event not found')
+    return _event_out(items[0])
+
+def search_events(db, q, limit, prefix=True):
+    """
+    Full-text search of event titles, venues and descriptions (see search_index.py).
+    """
+    return get_search_index(db).search(q, limit, prefix)
+
+# Fields a PATCH may not remove: they are required on create
+USER_REQUIRED_FIELDS = ('firstName', 'lastName', 'email')
+EVENT_REQUIRED_FIELDS = ('slug', 'title', 'startAt', 'endAt', 'maxCapacity', 'owner')
+
+def patch_update(key, changes: dict, if_match=None, required=()):
+    """
+    update_item arguments that apply only the supplied fields: non-null values
+    are SET, nulls are REMOVEd (so sparse GSIs never see NULL keys), every
+    other attribute is left as stored, and version is incremented. The item
+    must exist and, with if_match, still be at that version.
+    """
+    cleared = [name for name, value in changes.items() if value is None]
+    invalid = [name for name in cleared if name in required]
+    if invalid:
+        raise ValueError(f"Cannot remove required field(s): {', '.join(invalid)}")
+    names, values, assignments = {}, {':one': 1}, []
+    for position, (name, value) in enumerate(changes.items()):
+        names[f'#f{position}'] = name
+        if value is not None:
+            values[f':v{position}'] = value
+            assignments.append(f'#f{position} = :v{position}')
+    expression = []
+    if assignments:
+        expression.append('SET ' + ', '.join(assignments))
+    placeholders = {name: placeholder for placeholder, name in names.items()}
+    if cleared:
+        expression.append('REMOVE ' + ', '.join(placeholders[name] for name in cleared))
+    expression.append('ADD version :one')
+    condition = 'attribute_exists(id)'
+    if if_match is not None:
+        condition += ' AND ' + ('attribute_not_exists(version)' if if_match == 0 else 'version = :expected')
+        if if_match != 0:
+            values[':expected'] = if_match
+    update = {
+        'Key': key,
+        'UpdateExpression': ' '.join(expression),
+        'ConditionExpression': condition,
+        'ExpressionAttributeValues': values,
+        'ReturnValues': 'ALL_OLD',
+        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+    }
+    if names:
+        # DynamoDB rejects an empty map (an empty PATCH only bumps the version)
+        update['ExpressionAttributeNames'] = names
+    return update
+
+def _apply_patch(table, item_id, changes: dict, if_match, required, label):
+    """
+    Run a partial update. Returns (old item, new item); raises NotFound or PreconditionFailed.
+    """
+    try:
+        old = table.update_item(**patch_update({'id': item_id}, changes, if_match, required))['Attributes']
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        if if_match is None or not e.response.get('Item'):
+            raise NotFound(f'{label} not found')
+        raise PreconditionFailed('Version does not match If-Match')
+    new = {name: value for name, value in old.items() if name not in changes}
+    new.update((name, value) for name, value in changes.items() if value is not None)
+    new['version'] = int(old.get('version', 0)) + 1
+    return old, new
+
+def patch_user(db, user_id, changes: dict, if_match=None):
+    """
+    Update only the given user fields (see patch_update); relationship lists
+    and counters are left untouched. Raises NotFound / PreconditionFailed.
+    """
+    _, user = _apply_patch(db.Table('users'), user_id, changes, if_match, USER_REQUIRED_FIELDS, 'User')
+    user_cache.invalidate(user_id)
+    index = get_user_index()
+    if index is not None:
+        index.put(user)
+    return _user_out(user)
+
+def patch_event(db, event_id, changes: dict, if_match=None):
+    """
+    Update only the given event fields (see patch_update). Owners and hosts
+    added by the patch get the event appended to their events_hosted list.
+    """
+    if changes.get('startAt') is not None:
+        changes = {**changes, **(event_start_keys(event_id, changes['startAt']) or {'start_bucket': None, 'start_key': None})}
+    claimed = changes.get('slug') is not None and claim_slug(db, changes['slug'], event_id)
+    try:
+        old, event = _apply_patch(db.Table('events'), event_id, changes, if_match, EVENT_REQUIRED_FIELDS, 'Event')
+    except Exception:
+        if claimed:
+            release_slug(db, changes['slug'], event_id)
+        raise
+    if old.get('slug') != event.get('slug'):
+        release_slug(db, old.get('slug'), event_id)
+    event_cache.invalidate(event_id)
+    index_event(event)
+    if 'owner' in changes or 'hosts' in changes:
+        before = set([old.get('owner')] + old.get('hosts', []))
+        added = [host_id for host_id in dict.fromkeys([event['owner']] + event.get('hosts', [])) if host_id not in before]
+        parallel_map(lambda host_id: add_hosted_events(db, host_id, [event_id]), added)
+    return _event_out(event)
+
+def _patch_many(patch_fn, db, patches):
+    """
+    Apply many independent patches concurrently. Each one succeeds or fails on
+    its own; failures are reported by id instead of aborting the batch.
+    """
+    def apply(patch):
+        try:
+            return {'id': patch['id'], 'item': patch_fn(db, patch['id'], patch['changes'], patch.get('if_match'))}
+        except NotFound as e:
+            return {'id': patch['id'], 'status': 404, 'error': str(e)}
+        except PreconditionFailed as e:
+            return {'id': patch['id'], 'status': 412, 'error': str(e)}
+        except ValueError as e:
+            return {'id': patch['id'], 'status': 400, 'error': str(e)}
+        except SlugTaken as e:
+            return {'id': patch['id'], 'status': 409, 'error': str(e)}
+    results = parallel_map(apply, patches)
+    return {
+        'items': [result['item'] for result in results if 'item' in result],
+        'failed': [result for result in results if 'item' not in result]
+    }
+
+def patch_users(db, patches):
+    """
+    Batch PATCH: [{'id', 'changes', 'if_match'?}] -> {'items': [...], 'failed': [...]}.
+    """
+    return _patch_many(patch_user, db, patches)
+
+def patch_events(db, patches):
+    """
+    Batch PATCH of events; see patch_users.
+    """
+    return _patch_many(patch_event, db, patches)
+
+# Email logs are keyed by user_id + ts ("<epoch ms, 13 digits>#<log id>"), with
+# indexes by campaign (job_id, sparse) and by UTC day, and expire via DynamoDB TTL
+EMAIL_LOGS_TABLE = 'email_log_entries'
+EMAIL_LOGS_BY_JOB_INDEX = 'job_id-index'
+EMAIL_LOGS_BY_DAY_INDEX = 'day-index'
+EMAIL_LOG_TTL_DAYS = int(os.getenv("EMAIL_LOG_TTL_DAYS", 90))
+SECONDS_PER_DAY = 86400
+
+def email_log_keys(log_id, timestamp: float) -> dict:
+    """
+    The key, index and TTL attributes of an email log written at `timestamp` (epoch seconds).
+    """
+    return {
+        'ts': f'{int(timestamp * 1000):013d}#{log_id}',
+        'day': time.strftime('%Y-%m-%d', time.gmtime(timestamp)),
+        'expires_at': int(timestamp) + EMAIL_LOG_TTL_DAYS * SECONDS_PER_DAY
+    }
+
+def _ts_between(since=None, until=None):
+    """
+    Sort-key bounds covering epoch seconds since..until, both inclusive.
+    """
+    lower = f'{int(since) * 1000:013d}' if since is not None else '0'
+    upper = f'{(int(until) + 1) * 1000 - 1:013d}~' if until is not None else '~'
+    return Key('ts').between(lower, upper)
+
 def get_email_logs(db):
     """
     Retrieve all email logs from the email_logs table.
     """
-    table = db.Table('email_logs')
-    response = table.scan()
-    return response.get('Items', [])
+    table = db.Table(EMAIL_LOGS_TABLE)
+    return scan_table(table)
+
+def get_email_logs_page(db, limit, cursor=None):
+    """
+    Retrieve one cursor-paginated page of email logs.
+    """
+    items, next_cursor = scan_page(db.Table(EMAIL_LOGS_TABLE), limit, cursor)
+    return {'items': items, 'next_cursor': next_cursor}
+
+def iter_email_log_pages(db):
+    """
+    Yield email logs page by page for streaming exports.
+    """
+    for page in iter_scan_pages(db.Table(EMAIL_LOGS_TABLE)):
+        yield page.get('Items', [])
+
+def _query_email_log_days(table, limit, cursor, since, until, query_kwargs):
+    """
+    Page through the day index from until's day back to since's day. The
+    cursor is the day index's LastEvaluatedKey, or just {'day'} when a page
+    ends exactly at a day boundary.
+    """
+    until = int(time.time()) if until is None else int(until)
+    # Older logs have expired (TTL deletion can lag by up to two days)
+    oldest = until - (EMAIL_LOG_TTL_DAYS + 2) * SECONDS_PER_DAY
+    since = oldest if since is None else max(int(since), oldest)
+    days = []
+    day_start = until - until % SECONDS_PER_DAY
+    while day_start + SECONDS_PER_DAY > since:
+        days.append(time.strftime('%Y-%m-%d', time.gmtime(day_start)))
+        day_start -= SECONDS_PER_DAY
+    start_key = decode_cursor(cursor)
+    if start_key:
+        if start_key.get('day') not in days:
+            raise InvalidCursor('Invalid cursor')
+        days = days[days.index(start_key['day']):]
+        if 'ts' not in start_key:
+            start_key = None
+    items = []
+    for position, day in enumerate(days):
+        kwargs = dict(query_kwargs)
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+            start_key = None
+        response = table.query(
+            IndexName=EMAIL_LOGS_BY_DAY_INDEX,
+            KeyConditionExpression=Key('day').eq(day) & _ts_between(since, until),
+            Limit=limit - len(items),
+            **kwargs
+        )
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' in response:
+            return items, encode_cursor(response['LastEvaluatedKey'])
+        if len(items) >= limit:
+            following = days[position + 1:]
+            return items, encode_cursor({'day': following[0]}) if following else None
+    return items, None
+
+def query_email_logs(db, limit, cursor=None, user_id=None, job_id=None, status=None, since=None, until=None):
+    """
+    Retrieve one page of email logs, newest first, filtered by user, campaign
+    (job_id), status and/or time range (epoch seconds, inclusive).
+
+    A user or campaign is a Query on the table or its job index; a time range
+    alone queries the day index one day at a time. status is applied as a
+    FilterExpression, so (as with any DynamoDB Limit) a page may hold fewer
+    than `limit` items while next_cursor is still set.
+    """
+    table = db.Table(EMAIL_LOGS_TABLE)
+    filters = []
+    if status:
+        filters.append(Attr('status').eq(status))
+    if user_id and job_id:
+        filters.append(Attr('job_id').eq(job_id))
+    query_kwargs = {'ScanIndexForward': False}
+    if filters:
+        condition = filters[0]
+        for extra in filters[1:]:
+            condition &= extra
+        query_kwargs['FilterExpression'] = condition
+    if user_id or job_id:
+        if user_id:
+            key_condition = Key('user_id').eq(user_id)
+        else:
+            key_condition = Key('job_id').eq(job_id)
+            query_kwargs['IndexName'] = EMAIL_LOGS_BY_JOB_INDEX
+        if since is not None or until is not None:
+            key_condition &= _ts_between(since, until)
+        items, next_cursor = query_page(table, limit, cursor, KeyConditionExpression=key_condition, **query_kwargs)
+    elif since is not None or until is not None:
+        items, next_cursor = _query_email_log_days(table, limit, cursor, since, until, query_kwargs)
+    else:
+        scan_kwargs = {'FilterExpression': query_kwargs['FilterExpression']} if filters else {}
+        items, next_cursor = scan_page(table, limit, cursor, **scan_kwargs)
+    return {'items': items, 'next_cursor': next_cursor}
+
+def email_job_outcomes(db, job_id) -> dict:
+    """
+    {user_id: status} of the emails already logged for a campaign, read from
+    the job index (eventually consistent, like every GSI read).
+    """
+    outcomes = {}
+    pages = iter_query_pages(
+        db.Table(EMAIL_LOGS_TABLE),
+        IndexName=EMAIL_LOGS_BY_JOB_INDEX,
+        KeyConditionExpression=Key('job_id').eq(job_id),
+        ProjectionExpression='user_id, #s',
+        ExpressionAttributeNames={'#s': 'status'}
+    )
+    for page in pages:
+        for item in page.get('Items', []):
+            outcomes[item['user_id']] = item['status']
+    return outcomes
+
+def _user_out(item):
+    """
+    Default the relationship lists on a DynamoDB user item. Items are returned
+    as dicts and validated once, against the route's response model.
+    """
+    item['events_hosted'] = item.get('events_hosted', [])
+    item['events_attended'] = item.get('events_attended', [])
+    return item
+
+def get_users_page(db, limit, cursor=None):
+    """
+    Retrieve one cursor-paginated page of users.
+    """
+    items, next_cursor = scan_page(db.Table('users'), limit, cursor)
+    return {'items': [_user_out(item) for item in items], 'next_cursor': next_cursor}
+
+def iter_user_pages(db):
+    """
+    Yield users page by page (as plain dicts) for streaming exports.
+    """
+    for page in iter_scan_pages(db.Table('users')):
+        yield USER_SHAPE.rows([_user_out(item) for item in page.get('Items', [])])
+
+def get_users_by_ids(db, ids):
+    """
+    Fetch many users by id with BatchGetItem. Returns (users, missing_ids),
+    users in the order their ids were requested.
+    """
+    found = batch_get(db, 'users', ids)
+    users = [_user_out(found[user_id]) for user_id in dict.fromkeys(ids) if user_id in found]
+    return users, [user_id for user_id in dict.fromkeys(ids) if user_id not in found]
 
 def get_all_users(db):
     """
     Retrieve all users from the users table.
     """
     table = db.Table('users')
-    response = table.scan()
-    items = response.get('Items', [])
-    # Convert DynamoDB items to UserOut
-    users = []
-    for item in items:
-        # Ensure events_hosted and events_attended are lists
-        item['events_hosted'] = item.get('events_hosted', [])
-        item['events_attended'] = item.get('events_attended', [])
-        users.append(UserOut(**item))
-    return users
+    return [_user_out(item) for item in scan_table(table)]
 
-def create_event(db, event):
+def new_event_item(event):
     """
-    Create a new event and update the events_hosted list for the owner and hosts.
+    Build the DynamoDB item for a newly created event.
     """
-    import uuid
-    table = db.Table('events')
-    event_id = str(uuid.uuid4())
     event_dict = event.dict()
-    event_dict['id'] = event_id
+    event_dict['id'] = str(uuid.uuid4())
     event_dict['attendees'] = []
-    table.put_item(Item=event_dict)
-    # Update events_hosted for the owner
-    user_table = db.Table('users')
-    owner_id = event.owner
-    user_table.update_item(
-        Key={'id': owner_id},
-        UpdateExpression='SET events_hosted = list_append(if_not_exists(events_hosted, :empty), :e)',
-        ExpressionAttributeValues={':e': [event_id], ':empty': []}
-    )
-    # Update events_hosted for each host
-    for host_id in event.hosts:
-        user_table.update_item(
-            Key={'id': host_id},
-            UpdateExpression='SET events_hosted = list_append(if_not_exists(events_hosted, :empty), :e)',
-            ExpressionAttributeValues={':e': [event_id], ':empty': []}
-        )
+    event_dict['version'] = 1
+    event_dict.update(event_start_keys(event_dict['id'], event_dict['startAt']))
+    return event_dict
+
+def _hosted_update(host_id, event_ids):
+    """
+    Update appending event_ids to a user's events_hosted list and bumping events_hosted_count.
+    """
+    return {
+        'Key': {'id': host_id},
+        'UpdateExpression': 'SET events_hosted = list_append(if_not_exists(events_hosted, :empty), :e) ADD events_hosted_count :n, version :one',
+        'ExpressionAttributeValues': {':e': list(event_ids), ':empty': [], ':n': len(event_ids), ':one': 1}
+    }
+
+def add_hosted_events(db, host_id, event_ids):
+    """
+    Append event_ids to a user's events_hosted list and bump events_hosted_count.
+    """
+    db.Table('users').update_item(**_hosted_update(host_id, event_ids))
+    user_cache.invalidate(host_id)
+    record_engagement(host_id, 'events_hosted', len(event_ids))
+    index = get_user_index()
+    if index is not None:
+        for event_id in event_ids:
+            index.append_relation(host_id, 'events_hosted', event_id)
+
+def create_event_actions(event):
+    """
+    The new event item, its deduplicated owner/host ids and the
+    TransactWriteItems actions that create it: the event put, the claim of
+    its slug and the host updates.
+    """
+    event_dict = new_event_item(event)
+    host_ids = list(dict.fromkeys([event.owner] + event.hosts))
+    actions = [
+        {'Put': {'TableName': 'events', 'Item': event_dict}},
+        {'Put': {
+            'TableName': EVENT_SLUGS_TABLE,
+            'Item': {'slug': event_dict['slug'], 'event_id': event_dict['id']},
+            'ConditionExpression': 'attribute_not_exists(slug)'
+        }},
+    ]
+    actions += [{'Update': {'TableName': 'users', **_hosted_update(host_id, [event_dict['id']])}} for host_id in host_ids]
+    return event_dict, host_ids, actions
+
+def creation_error(error: ClientError, slug) -> Exception:
+    """
+    The exception for a failed create_event transaction: SlugTaken when the
+    slug claim's condition failed, otherwise the error itself.
+    """
+    reasons = [reason.get('Code') for reason in error.response.get('CancellationReasons', [])]
+    if error.response['Error']['Code'] == 'TransactionCanceledException' and reasons[1:2] == ['ConditionalCheckFailed']:
+        return SlugTaken(f"Slug '{slug}' is already used by another event")
+    return error
+
+def _index_hosted(event_dict, host_ids):
+    """
+    Keep the caches, user index and search index in step with a new event
+    and its host updates.
+    """
+    event_id = event_dict['id']
+    index_event(event_dict)
+    event_cache.invalidate(event_id)
+    user_cache.invalidate(*host_ids)
+    for host_id in host_ids:
+        record_engagement(host_id, 'events_hosted')
+    index = get_user_index()
+    if index is not None:
+        for host_id in host_ids:
+            index.append_relation(host_id, 'events_hosted', event_id)
+
+def create_event(db, event):
+    """
+    Create a new event and update the events_hosted list (and events_hosted_count)
+    for the owner and hosts (each user once, even if the owner is also a host).
+
+    The event put, its slug claim and the host updates go in a single
+    TransactWriteItems call, so they are applied together or not at all; a
+    slug already in use raises SlugTaken. Events with more than 98 hosts exceed
+    one transaction: the first 100 actions are applied first, then the rest
+    in concurrent 100-action chunks.
+    """
+    event_dict, host_ids, actions = create_event_actions(event)
+    try:
+        transact_write(db, actions[:TRANSACT_WRITE_LIMIT])
+    except ClientError as e:
+        raise creation_error(e, event_dict['slug'])
+    transact_write(db, actions[TRANSACT_WRITE_LIMIT:])
+    _index_hosted(event_dict, host_ids)
     return event_dict
 
 def list_events(db):
@@ -142,106 +673,503 @@ def list_events(db):
     Retrieve all events from the events table.
     """
     table = db.Table('events')
-    response = table.scan()
-    items = response.get('Items', [])
-    return items
+    return [_event_out(item) for item in scan_table(table)]
+
+def _event_out(item):
+    """
+    Default the relationship lists on a DynamoDB event item.
+    """
+    item['hosts'] = item.get('hosts', [])
+    item['attendees'] = item.get('attendees', [])
+    return item
+
+def get_events_page(db, limit, cursor=None):
+    """
+    Retrieve one cursor-paginated page of events.
+    """
+    items, next_cursor = scan_page(db.Table('events'), limit, cursor)
+    return {'items': [_event_out(item) for item in items], 'next_cursor': next_cursor}
+
+def iter_event_pages(db):
+    """
+    Yield events page by page for streaming exports.
+    """
+    for page in iter_scan_pages(db.Table('events')):
+        yield [_event_out(item) for item in page.get('Items', [])]
+
+# Events are indexed by start time: start_bucket is the UTC month of startAt
+# ("2025-01") and start_key its normalized ISO-8601 form plus the event id, so
+# a time range is one Query per month, each returning events in start order
+EVENTS_BY_START_INDEX = 'start_bucket-index'
+EVENT_RANGE_MAX_DAYS = int(os.getenv("EVENT_RANGE_MAX_DAYS", 366))
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+def normalize_start(value) -> Optional[str]:
+    """
+    A timestamp as UTC ISO-8601 ("2025-01-01T10:00:00Z"), or None if it cannot
+    be parsed. A date alone means midnight; a time without offset means UTC.
+    """
+    try:
+        moment = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime(ISO_FORMAT)
+
+def event_start_keys(event_id, start_at) -> dict:
+    """
+    start_bucket / start_key attributes for an event (empty if startAt cannot
+    be parsed; such events are left out of time-range queries).
+    """
+    start = normalize_start(start_at)
+    if start is None:
+        return {}
+    return {'start_bucket': start[:7], 'start_key': f'{start}#{event_id}'}
+
+def _start_buckets(start: str, end: str) -> List[str]:
+    """
+    The months ("YYYY-MM") from start's to end's, inclusive.
+    """
+    year, month = int(start[:4]), int(start[5:7])
+    buckets = []
+    while f'{year:04d}-{month:02d}' <= end[:7]:
+        buckets.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return buckets
+
+def _start_range(start_from, start_to):
+    """
+    Normalized (start, end) of a time-range query. Without start_from the range
+    starts now; without start_to it spans EVENT_RANGE_MAX_DAYS. Raises ValueError.
+    """
+    start = normalize_start(start_from) if start_from else datetime.now(timezone.utc).strftime(ISO_FORMAT)
+    if start is None:
+        raise ValueError(f"Invalid 'from' timestamp: {start_from}")
+    latest = (datetime.strptime(start, ISO_FORMAT) + timedelta(days=EVENT_RANGE_MAX_DAYS)).strftime(ISO_FORMAT)
+    end = normalize_start(start_to) if start_to else latest
+    if end is None:
+        raise ValueError(f"Invalid 'to' timestamp: {start_to}")
+    if end < start:
+        raise ValueError("'to' is before 'from'")
+    if end > latest:
+        raise ValueError(f'Time ranges are limited to {EVENT_RANGE_MAX_DAYS} days')
+    return start, end
+
+def query_events_by_start(db, start_from=None, start_to=None, limit=100, cursor=None):
+    """
+    One page of the events starting between start_from and start_to
+    (inclusive), ordered by start time.
+
+    Each month of the range is a bounded Query on the start index (at most
+    limit + 1 items per call); the months are queried in parallel and their
+    already-ordered results combined with a streaming k-way merge (heapq.merge),
+    which stops reading once the page is full. The cursor holds the last
+    event's start_key, so the next page resumes inside its month.
+    Raises ValueError for an invalid range and InvalidCursor for a bad cursor.
+    """
+    start, end = _start_range(start_from, start_to)
+    after = decode_cursor(cursor)
+    if after is not None and not isinstance(after.get('start_key'), str):
+        raise InvalidCursor('Invalid cursor')
+    buckets = _start_buckets(start, end)
+    if after is not None:
+        buckets = [bucket for bucket in buckets if bucket >= after['start_key'][:7]]
+    table = db.Table('events')
+
+    def query(bucket, start_key=None):
+        kwargs = {}
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        return table.query(
+            IndexName=EVENTS_BY_START_INDEX,
+            KeyConditionExpression=Key('start_bucket').eq(bucket) & Key('start_key').between(start, end + '#\uffff'),
+            Limit=limit + 1,
+            **kwargs
+        )
+
+    def first_page(bucket):
+        if after is not None and bucket == after['start_key'][:7]:
+            event_id = after['start_key'].split('#', 1)[-1]
+            return query(bucket, {'id': event_id, 'start_bucket': bucket, 'start_key': after['start_key']})
+        return query(bucket)
+
+    def items(bucket, response):
+        while True:
+            yield from response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                return
+            response = query(bucket, response['LastEvaluatedKey'])
+
+    streams = [items(bucket, response) for bucket, response in zip(buckets, parallel_map(first_page, buckets))]
+    page = list(itertools.islice(heapq.merge(*streams, key=lambda item: item['start_key']), limit + 1))
+    next_cursor = encode_cursor({'start_key': page[limit - 1]['start_key']}) if len(page) > limit else None
+    return {'items': [_event_out(item) for item in page[:limit]], 'next_cursor': next_cursor}
+
+def get_events_by_ids(db, ids):
+    """
+    Fetch many events by id with BatchGetItem. Returns (events, missing_ids),
+    events in the order their ids were requested.
+    """
+    found = batch_get(db, 'events', ids)
+    events = [_event_out(found[event_id]) for event_id in dict.fromkeys(ids) if event_id in found]
+    return events, [event_id for event_id in dict.fromkeys(ids) if event_id not in found]
+
+REGISTRATIONS_TABLE = 'registrations'
+REGISTRATIONS_BY_USER_INDEX = 'user_id-index'
+EVENT_COUNTERS_TABLE = 'event_counters'
+# Split each event's registration counter over this many items so concurrent
+# registrations for one hot event do not all write the same key
+REGISTRATION_COUNTER_SHARDS = int(os.getenv("REGISTRATION_COUNTER_SHARDS", 1))
+REGISTRATION_MAX_ATTEMPTS = int(os.getenv("REGISTRATION_MAX_ATTEMPTS", 10))
+
+class NotFound(LookupError):
+    """
+    Raised when a referenced user or event does not exist.
+    """
+
+class EventFull(Exception):
+    """
+    Raised when an event has reached its maxCapacity.
+    """
+
+def shard_capacities(max_capacity, shards):
+    """
+    Split max_capacity over the counter shards (the first shards take the remainder).
+    """
+    base, extra = divmod(int(max_capacity), shards)
+    return [base + (1 if shard < extra else 0) for shard in range(shards)]
+
+def registration_transaction(event_id, user_id, shard, capacity):
+    """
+    TransactWriteItems actions registering a user on one counter shard:
+    0. put the registration unless it exists (a repeated registration must
+       not count twice),
+    1. increment the shard's counter only while it is below its `capacity`
+       (so the event cannot be overbooked),
+    2. bump the user's events_attended_count and version, only if the user
+       exists (no registrations for unknown users).
+    All three apply or none does. A TransactionCanceledException lists one
+    CancellationReason per action in this order; registration_outcome maps
+    a ConditionalCheckFailed on 0 / 2 / 1 to already registered / user
+    missing / shard full, and anything else to a conflict worth retrying.
+    """
+    return [
+        {'Put': {
+            'TableName': REGISTRATIONS_TABLE,
+            'Item': {'event_id': event_id, 'user_id': user_id, 'registered_at': int(time.time())},
+            'ConditionExpression': 'attribute_not_exists(event_id)'
+        }},
+        {'Update': {
+            'TableName': EVENT_COUNTERS_TABLE,
+            'Key': {'event_id': event_id, 'shard': shard},
+            'UpdateExpression': 'ADD registered :one',
+            'ConditionExpression': 'attribute_not_exists(registered) OR registered < :cap',
+            'ExpressionAttributeValues': {':one': 1, ':cap': capacity}
+        }},
+        {'Update': {
+            'TableName': 'users',
+            'Key': {'id': user_id},
+            'UpdateExpression': 'ADD events_attended_count :one, version :one',
+            'ConditionExpression': 'attribute_exists(id)',
+            'ExpressionAttributeValues': {':one': 1}
+        }},
+    ]
+
+def registration_outcome(error: ClientError) -> str:
+    """
+    Classify a failed registration transaction: 'already_registered',
+    'user_missing', 'shard_full' or 'conflict' (retry). Other errors are re-raised.
+    """
+    if error.response['Error']['Code'] != 'TransactionCanceledException':
+        raise error
+    reasons = [reason.get('Code') for reason in error.response.get('CancellationReasons', [])]
+    if reasons and reasons[0] == 'ConditionalCheckFailed':
+        return 'already_registered'
+    if len(reasons) > 2 and reasons[2] == 'ConditionalCheckFailed':
+        return 'user_missing'
+    if len(reasons) > 1 and reasons[1] == 'ConditionalCheckFailed':
+        return 'shard_full'
+    return 'conflict'
+
+def registration_shards(event, shards=None):
+    """
+    (capacity per shard, shards to try in random order) for an event item.
+    """
+    if event is None:
+        raise NotFound('Event not found')
+    shards = shards or REGISTRATION_COUNTER_SHARDS
+    capacities = shard_capacities(event['maxCapacity'], shards)
+    candidates = [shard for shard in range(shards) if capacities[shard] > 0]
+    random.shuffle(candidates)
+    return capacities, candidates
+
+def registration_backoff(event_id, attempt):
+    """
+    Seconds to wait before retry `attempt` of a conflicting registration.
+    """
+    if attempt >= REGISTRATION_MAX_ATTEMPTS:
+        raise RuntimeError(f'Registration for event {event_id} kept conflicting')
+    return 0.01 * (2 ** min(attempt, 6)) * random.uniform(0.5, 1.5)
+
+def register_event(db, event_id, user_id, shards=None):
+    """
+    Register a user for an event, enforcing the event's maxCapacity.
+
+    One TransactWriteItems call writes the registration (conditional put, so
+    repeated calls are idempotent), increments a capacity counter shard only
+    while it is below its share of maxCapacity, and bumps the user's
+    events_attended_count, so the three never disagree. Shards are tried in
+    random order; the event is full once every shard is.
+    Raises NotFound for an unknown event or user and EventFull when full.
+    """
+    event = db.Table('events').get_item(Key={'id': event_id}, ProjectionExpression='maxCapacity').get('Item')
+    capacities, candidates = registration_shards(event, shards)
+    client = db.meta.client
+    attempt = 0
+    while candidates:
+        shard = candidates[0]
+        try:
+            client.transact_write_items(TransactItems=registration_transaction(event_id, user_id, shard, capacities[shard]))
+            break
+        except ClientError as e:
+            outcome = registration_outcome(e)
+        if outcome == 'already_registered':
+            return {'event_id': event_id, 'user_id': user_id, 'status': 'already_registered'}
+        if outcome == 'user_missing':
+            raise NotFound('User not found')
+        if outcome == 'shard_full':
+            candidates.pop(0)  # this shard is full, try the next one
+            continue
+        # Conflict with a concurrent transaction on the same items: back off and retry
+        attempt += 1
+        time.sleep(registration_backoff(event_id, attempt))
+    else:
+        raise EventFull('Event is full')
+    user_cache.invalidate(user_id)
+    event_cache.invalidate(event_id)
+    index = get_user_index()
+    if index is not None:
+        index.append_relation(user_id, 'events_attended')
+    record_engagement(user_id, 'events_attended')
+    return {'event_id': event_id, 'user_id': user_id, 'status': 'registered'}
+
+def get_event_capacity(db, event_id):
+    """
+    maxCapacity, registrations so far (summed over the counter shards) and seats left.
+    """
+    event = db.Table('events').get_item(Key={'id': event_id}, ProjectionExpression='maxCapacity').get('Item')
+    if event is None:
+        raise NotFound('Event not found')
+    shards = db.Table(EVENT_COUNTERS_TABLE).query(KeyConditionExpression=Key('event_id').eq(event_id))['Items']
+    registered = sum(int(shard.get('registered', 0)) for shard in shards)
+    max_capacity = int(event['maxCapacity'])
+    return {'event_id': event_id, 'maxCapacity': max_capacity, 'registered': registered,
+            'remaining': max(max_capacity - registered, 0)}
 
-def register_event(db, event_id, user_id):
+def get_event_attendees_page(db, event_id, limit, cursor=None):
     """
-    Register a user for an event. Adds user to event's attendees and event to user's events_attended.
+    Retrieve one page of an event's registrations.
     """
-    event_table = db.Table('events')
-    user_table = db.Table('users')
-    # add user to event's attendees
-    event_table.update_item(
-        Key={'id': event_id},
-        UpdateExpression='SET attendees = list_append(if_not_exists(attendees, :empty), :u)',
-        ExpressionAttributeValues={':u': [user_id], ':empty': []}
+    items, next_cursor = query_page(
+        db.Table(REGISTRATIONS_TABLE), limit, cursor,
+        KeyConditionExpression=Key('event_id').eq(event_id)
     )
-    # add event to user's events_attended
-    user_table.update_item(
-        Key={'id': user_id},
-        UpdateExpression='SET events_attended = list_append(if_not_exists(events_attended, :empty), :e)',
-        ExpressionAttributeValues={':e': [event_id], ':empty': []}
+    return {'items': items, 'next_cursor': next_cursor}
+
+def get_user_events_page(db, user_id, limit, cursor=None):
+    """
+    Retrieve one page of a user's registrations (reverse index).
+    """
+    items, next_cursor = query_page(
+        db.Table(REGISTRATIONS_TABLE), limit, cursor,
+        IndexName=REGISTRATIONS_BY_USER_INDEX,
+        KeyConditionExpression=Key('user_id').eq(user_id)
     )
-    return {'event_id': event_id, 'user_id': user_id, 'status': 'registered'}
+    return {'items': items, 'next_cursor': next_cursor}
 
-def user_engagement_analytics(db):
+EXPANDABLE_EVENT_FIELDS = ('attendees', 'hosts')
+EXPAND_ATTENDEES_LIMIT = int(os.getenv("EXPAND_ATTENDEES_LIMIT", 100))
+# BatchGetItem projection of the UserOut fields (placeholders avoid reserved words)
+USER_OUT_NAMES = {f'#u{position}': name for position, name in enumerate(USER_SHAPE.fields)}
+USER_OUT_PROJECTION = ', '.join(USER_OUT_NAMES)
+
+def get_event_attendee_ids(db, event_id, legacy=(), limit=None):
     """
-    Generate analytics for user engagement (number of events hosted/attended).
+    Ids of the users registered for an event (registration pages in order),
+    plus any not yet migrated from the legacy attendees list; at most `limit`
+    ids when given. Returns (ids, truncated).
     """
-    user_table = db.Table('users')
-    response = user_table.scan()
-    items = response.get('Items', [])
-    result = []
-    for item in items:
-        result.append({
-            'user_id': item['id'],
-            'firstName': item.get('firstName'),
-            'lastName': item.get('lastName'),
-            'events_hosted': len(item.get('events_hosted', [])),
-            'events_attended': len(item.get('events_attended', []))
-        })
-    return result
+    table = db.Table(REGISTRATIONS_TABLE)
+    kwargs = {'KeyConditionExpression': Key('event_id').eq(event_id), 'ProjectionExpression': 'user_id'}
+    user_ids = dict.fromkeys(legacy)
+    while limit is None or len(user_ids) <= limit:
+        if limit is not None:
+            # One id past the limit tells a full list from a truncated one
+            kwargs['Limit'] = limit + 1 - len(user_ids)
+        response = table.query(**kwargs)
+        user_ids.update(dict.fromkeys(item['user_id'] for item in response.get('Items', [])))
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    user_ids = list(user_ids)
+    if limit is not None and len(user_ids) > limit:
+        return user_ids[:limit], True
+    return user_ids, False
 
-def create_user(db, user: UserCreate):
+def expand_events(db, events, expand):
     """
-    Create a new user in the users table.
+    Resolve the attendees and/or hosts of events into users, added as
+    attendee_users / host_users. The user ids of all the events are loaded
+    together, like a dataloader: de-duplicated, fetched with parallel 100-key
+    BatchGetItem calls and projected to the UserOut fields. Attendees are
+    capped at EXPAND_ATTENDEES_LIMIT per event (attendees_truncated is set
+    when there are more; GET /events/{id}/attendees pages through them all).
+    """
+    if 'attendees' in expand:
+        attendee_ids = parallel_map(
+            lambda event: get_event_attendee_ids(db, event['id'], event.get('attendees', []), EXPAND_ATTENDEES_LIMIT),
+            events
+        )
+        for event, (user_ids, truncated) in zip(events, attendee_ids):
+            event['attendees'] = user_ids
+            event['attendees_truncated'] = truncated
+    wanted = [field for field in EXPANDABLE_EVENT_FIELDS if field in expand]
+    user_ids = [user_id for event in events for field in wanted for user_id in event.get(field, [])]
+    users = batch_get(db, 'users', user_ids, projection=USER_OUT_PROJECTION, names=USER_OUT_NAMES)
+    for user in users.values():
+        _user_out(user)
+    for event in events:
+        for field in wanted:
+            event[f'{field[:-1]}_users'] = [users[user_id] for user_id in event.get(field, []) if user_id in users]
+    return events
+
+def user_engagement_analytics(db, refresh=False):
+    """
+    Engagement summary (rollups, distributions, top users) from the analytics
+    snapshot; see analytics.py for how it is kept up to date. refresh=True
+    rescans the users table first.
+    """
+    return engagement.refresh(db) if refresh else engagement.snapshot(db)
+
+def get_user_engagement_page(db, limit, cursor=None):
+    """
+    One cursor-paginated page of per-user engagement rows (hosted/attended counts).
+    """
+    # Only the maintained counters are read, never the (unbounded) id lists
+    items, next_cursor = scan_page(
+        db.Table('users'), limit, cursor,
+        ProjectionExpression='id, firstName, lastName, events_hosted_count, events_attended_count'
+    )
+    rows = [{
+        'user_id': item['id'],
+        'firstName': item.get('firstName'),
+        'lastName': item.get('lastName'),
+        'events_hosted': int(item.get('events_hosted_count', 0)),
+        'events_attended': int(item.get('events_attended_count', 0))
+    } for item in items]
+    return {'items': rows, 'next_cursor': next_cursor}
+
+def new_user_item(user: UserCreate):
+    """
+    Build the DynamoDB item for a newly created user.
     """
-    user_id = str(uuid.uuid4())
     user_dict = user.dict()
-    user_dict["id"] = user_id
+    user_dict["id"] = str(uuid.uuid4())
     user_dict["events_hosted"] = []
     user_dict["events_attended"] = []
+    user_dict["events_hosted_count"] = 0
+    user_dict["events_attended_count"] = 0
+    user_dict["version"] = 1
+    return user_dict
+
+def create_user(db, user: UserCreate):
+    """
+    Create a new user in the users table.
+    """
+    user_dict = new_user_item(user)
     table = db.Table('users')
-    table.put_item(Item=user_dict)
-    return UserOut(**user_dict)
+    table.put_item(Item=_without_nulls(user_dict))
+    user_cache.invalidate(user_dict['id'])
+    index = get_user_index()
+    if index is not None:
+        index.put(user_dict)
+    return user_dict
 
-def filter_users(db, company, job_title, city, state, events_hosted_min, events_hosted_max, events_attended_min, events_attended_max, skip, limit, sort_by):
+def filter_users(db, company, job_title, city, state, events_hosted_min, events_hosted_max, events_attended_min, events_attended_max, skip, limit, sort_by, sort_order='asc', after=None):
     """
     Filter users by company, job title, city, state, number of events hosted/attended, with sorting and pagination.
     """
+    return filter_users_explain(
+        db, company, job_title, city, state,
+        events_hosted_min, events_hosted_max, events_attended_min, events_attended_max,
+        skip, limit, sort_by, sort_order, after
+    )['users']
+
+def filter_users_explain(db, company, job_title, city, state, events_hosted_min, events_hosted_max, events_attended_min, events_attended_max, skip, limit, sort_by, sort_order='asc', after=None):
+    """
+    Same as filter_users, but also returns the query plan that was executed
+    (which index was used, how many items were read versus returned) and the
+    keyset cursor for the next page.
+
+    sort_by accepts several comma-separated fields, "-" for descending, and the
+    derived fields events_hosted / events_attended (sorted by count). `after` is
+    the next_cursor of the previous page (keyset pagination).
+    """
     table = db.Table('users')
-    response = table.scan()
-    items = response.get('Items', [])
-    users = []
-    for item in items:
+    equals = {
+        attr: value
+        for attr, value in (('company', company), ('job_title', job_title), ('city', city), ('state', state))
+        if value
+    }
+    ranges = {
+        key: value
+        for key, value in (
+            (('events_hosted', 'min'), events_hosted_min),
+            (('events_hosted', 'max'), events_hosted_max),
+            (('events_attended', 'min'), events_attended_min),
+            (('events_attended', 'max'), events_attended_max),
+        )
+        if value is not None
+    }
+    index = get_user_index()
+    if index is not None:
+        users = index.filter(equals, ranges)
+        explain = {
+            'operation': 'UserIndex',
+            'index': 'in-memory',
+            'key_condition': None,
+            'filters': list(equals) + [f"{attr}_{bound}" for attr, bound in ranges],
+            'items_read': 0,
+            'items_matched': len(users),
+            'pages': 0,
+        }
+    else:
+        plan = plan_user_filter(equals, ranges)
+        # Every predicate is pushed down to DynamoDB. Without sorting any skip+limit
+        # matches form a valid page, so the read can stop early.
+        users, explain = execute_user_plan(table, plan, limit=None if sort_by or after else skip + limit)
+    for item in users:
         item['events_hosted'] = item.get('events_hosted', [])
         item['events_attended'] = item.get('events_attended', [])
-        # Filtering
-        if company and item.get('company') != company:
-            continue
-        if job_title and item.get('job_title') != job_title:
-            continue
-        if city and item.get('city') != city:
-            continue
-        if state and item.get('state') != state:
-            continue
-        if events_hosted_min is not None and len(item['events_hosted']) < events_hosted_min:
-            continue
-        if events_hosted_max is not None and len(item['events_hosted']) > events_hosted_max:
-            continue
-        if events_attended_min is not None and len(item['events_attended']) < events_attended_min:
-            continue
-        if events_attended_max is not None and len(item['events_attended']) > events_attended_max:
-            continue
-        users.append(item)
-    # Sorting
-    if sort_by:
-        users.sort(key=lambda x: x.get(sort_by, ''))
-    # Pagination
-    users = users[skip:skip+limit]
-    return [UserOut(**u) for u in users]
+    next_cursor = None
+    if sort_by or after:
+        # Sorting: bounded top-k over typed keys, optionally seeking past a cursor
+        users, next_cursor = select_page(users, parse_sort(sort_by, sort_order), skip, limit, after)
+    else:
+        # Pagination
+        users = users[skip:skip+limit]
+    explain['items_returned'] = len(users)
+    return {'users': users, 'explain': explain, 'next_cursor': next_cursor}
 
-def send_emails_to_users(db, filter: UserFilter):
+EMAIL_SUBJECT = "Notification from Event CRM"
+EMAIL_BODY = "You have matched a filter query in the Event Management CRM system."
+
+def find_email_recipients(db, filter: UserFilter):
     """
-    Find users matching the filter and send real emails to them, logging the result.
+    Resolve the users an email campaign is sent to.
     """
-    from app.email_utils import send_email
-    results = []
-    email_log_table = db.Table('email_logs')
-    import time
-    users = filter_users(
+    return filter_users(
         db,
         filter.company,
         filter.job_title,
@@ -253,26 +1181,45 @@ def send_emails_to_users(db, filter: UserFilter):
         filter.events_attended_max,
         filter.skip,
         filter.limit,
-        filter.sort_by
+        filter.sort_by,
+        filter.sort_order
     )
-    for user in users:
-        status = "sent"
-        if not send_email(user.email, "Notification from Event CRM", "You have matched a filter query in the Event Management CRM system."):
-            status = "failed"
-            logger.error(f"Failed to send email to {user.email}")
-        else:
-            logger.info(f"Email sent to {user.email}")
-        log_item = {
-            "id": str(uuid.uuid4()),
-            "user_id": user.id,
-            "email": user.email,
-            "status": status,
-            "timestamp": int(time.time())
-        }
-        email_log_table.put_item(Item=log_item)
-        results.append({
-            "user_id": user.id,
-            "email": user.email,
-            "status": status
-        })
+
+def email_log_item(user, status, job_id=None):
+    """
+    Build the email_logs record for the outcome of one email.
+    Records are written in batches (see batching.BatchWriter).
+    """
+    now = time.time()
+    log_item = {
+        "id": str(uuid.uuid4()),
+        "user_id": user['id'],
+        "email": user['email'],
+        "status": status,
+        "timestamp": int(now)
+    }
+    log_item.update(email_log_keys(log_item["id"], now))
+    if job_id:
+        log_item["job_id"] = job_id
+    return log_item
+
+def send_emails_to_users(db, filter: UserFilter):
+    """
+    Find users matching the filter and send real emails to them, logging the result.
+    Runs synchronously; the /send-emails endpoint queues an EmailJob instead (see jobs.py).
+    """
+    from app.email_utils import send_emails
+    results = []
+    users = find_email_recipients(db, filter)
+    # One batch over the pooled SMTP sessions instead of a connection per email
+    sent = send_emails([user['email'] for user in users], EMAIL_SUBJECT, EMAIL_BODY)
+    with BatchWriter(db, EMAIL_LOGS_TABLE) as log_writer:
+        for user, ok in zip(users, sent):
+            status = "sent" if ok else "failed"
+            log_writer.add(email_log_item(user, status))
+            results.append({
+                "user_id": user['id'],
+                "email": user['email'],
+                "status": status
+            })
     return {"results": results, "count": len(results)}
@@ -0,0 +1,155 @@
+"""
+sorting.py
+Typed, multi-key sorting with bounded top-k selection and keyset ("seek")
+pagination for filtered user lists.
+"""
+
+import heapq
+from decimal import Decimal
+from functools import total_ordering
+from typing import List, Optional, Tuple
+
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+
+# Sort fields computed from the item rather than read as-is
+DERIVED_SORT_FIELDS = {
+    'events_hosted': lambda item: item.get('events_hosted_count', len(item.get('events_hosted') or [])),
+    'events_attended': lambda item: item.get('events_attended_count', len(item.get('events_attended') or [])),
+}
+
+
+@total_ordering
+class _Descending:
+    """
+    Wraps a sort key component so that it orders in reverse.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def parse_sort(sort_by: Optional[str], sort_order: str = 'asc') -> List[Tuple[str, bool]]:
+    """
+    Parse `sort_by` ("company,-events_hosted") into [(field, descending), ...].
+    A leading "-" flips the direction of one field; sort_order="desc" flips the
+    default for every field. The user id is always appended as a tie-breaker so
+    the order is total, which keyset pagination relies on.
+    """
+    default_desc = sort_order == 'desc'
+    keys = []
+    for name in (sort_by or '').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        descending = default_desc
+        if name.startswith('-'):
+            name, descending = name[1:], not default_desc
+        keys.append((name, descending))
+    if not any(name == 'id' for name, _ in keys):
+        keys.append(('id', default_desc))
+    return keys
+
+
+def sort_values(item: dict, keys: List[Tuple[str, bool]]) -> list:
+    """
+    The raw values an item is sorted by (numbers normalised to int/float).
+    """
+    values = []
+    for name, _ in keys:
+        derive = DERIVED_SORT_FIELDS.get(name)
+        value = derive(item) if derive else item.get(name)
+        if isinstance(value, Decimal):
+            value = int(value) if value == value.to_integral_value() else float(value)
+        values.append(value)
+    return values
+
+
+def _typed(value):
+    """
+    Comparable form of one value: numbers before strings before anything else,
+    so mixed types never raise TypeError. Missing values are handled by the caller.
+    """
+    if isinstance(value, bool):
+        return (2, str(value))
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    return (2, str(value))
+
+
+def key_for_values(values: list, keys: List[Tuple[str, bool]]) -> tuple:
+    """
+    Build the comparison key for a list of sort values. Missing values sort
+    last in either direction.
+    """
+    key = []
+    for value, (_, descending) in zip(values, keys):
+        if value is None:
+            key.append((1,))
+        elif descending:
+            key.append((0, _Descending(_typed(value))))
+        else:
+            key.append((0, _typed(value)))
+    return tuple(key)
+
+
+def encode_after(item: dict, keys: List[Tuple[str, bool]]) -> str:
+    """
+    Keyset cursor pointing just after `item` in the given order.
+    """
+    return encode_cursor({'v': sort_values(item, keys)})
+
+
+def decode_after(cursor: str, keys: List[Tuple[str, bool]]) -> tuple:
+    """
+    Decode a keyset cursor into a comparison key. Raises InvalidCursor if the
+    cursor does not fit the requested sort.
+    """
+    values = decode_cursor(cursor).get('v')
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursor('Cursor does not match the requested sort')
+    values = [
+        (int(v) if v == v.to_integral_value() else float(v)) if isinstance(v, Decimal) else v
+        for v in values
+    ]
+    return key_for_values(values, keys)
+
+
+def select_page(
+    items: List[dict],
+    keys: List[Tuple[str, bool]],
+    skip: int,
+    limit: int,
+    after: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Return (page, next_after) for `items` ordered by `keys`.
+
+    Only the first skip+limit items in order are needed, so a bounded heap
+    (O(n log k)) is used instead of sorting everything. With `after`, items up
+    to and including the cursor position are dropped first, so deep pages cost
+    the same as the first one. next_after is None on the last page.
+    """
+    decorated = [
+        (key_for_values(sort_values(item, keys), keys), position, item)
+        for position, item in enumerate(items)
+    ]
+    if after:
+        boundary = decode_after(after, keys)
+        decorated = [entry for entry in decorated if entry[0] > boundary]
+    wanted = skip + limit
+    if wanted < len(decorated):
+        ordered = heapq.nsmallest(wanted, decorated)
+    else:
+        ordered = sorted(decorated)
+    page = [item for _, _, item in ordered[skip:wanted]]
+    next_after = encode_after(page[-1], keys) if page and len(decorated) > wanted else None
+    return page, next_after
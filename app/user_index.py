@@ -0,0 +1,190 @@
+"""
+user_index.py
+Optional in-process index of the users table for filter_users.
+
+Categorical attributes (company, job_title, city, state) are interned to integer
+ids and kept as columns plus inverted posting lists; hosted/attended counts are
+array-backed columns. A filter becomes a posting-list intersection followed by
+vectorized range masks, instead of a table read per request.
+
+The index is loaded once at startup (USER_INDEX_ENABLED=true) and kept current by
+the write functions in service.py. Each worker process holds its own copy, so
+writes made by other processes are only seen after a reload.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .scanner import scan_table
+
+USER_INDEX_ENABLED = os.getenv("USER_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+
+CATEGORICAL_ATTRIBUTES = ('company', 'job_title', 'city', 'state')
+COUNT_ATTRIBUTES = ('events_hosted', 'events_attended')
+
+_MISSING = -1
+
+
+class UserIndex:
+    """
+    Columnar, inverted index over user items.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.RLock()
+        self._rows: List[Optional[dict]] = []
+        self._positions: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._capacity = capacity
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._counts = {attr: np.zeros(capacity, dtype=np.int32) for attr in COUNT_ATTRIBUTES}
+        self._codes = {attr: np.full(capacity, _MISSING, dtype=np.int32) for attr in CATEGORICAL_ATTRIBUTES}
+        self._interned: Dict[str, int] = {}
+        self._postings = {attr: {} for attr in CATEGORICAL_ATTRIBUTES}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        self._alive = np.resize(self._alive, capacity)
+        self._alive[self._capacity:] = False
+        for attr in COUNT_ATTRIBUTES:
+            column = np.zeros(capacity, dtype=np.int32)
+            column[:self._capacity] = self._counts[attr]
+            self._counts[attr] = column
+        for attr in CATEGORICAL_ATTRIBUTES:
+            column = np.full(capacity, _MISSING, dtype=np.int32)
+            column[:self._capacity] = self._codes[attr]
+            self._codes[attr] = column
+        self._capacity = capacity
+
+    def _intern(self, value: str) -> int:
+        code = self._interned.get(value)
+        if code is None:
+            code = self._interned[value] = len(self._interned)
+        return code
+
+    def _unlink(self, position: int):
+        for attr in CATEGORICAL_ATTRIBUTES:
+            code = int(self._codes[attr][position])
+            if code != _MISSING:
+                self._postings[attr][code].discard(position)
+            self._codes[attr][position] = _MISSING
+
+    def put(self, item: dict):
+        """
+        Insert or replace a user item.
+        """
+        row = dict(item)
+        for attr in COUNT_ATTRIBUTES:
+            row[attr] = list(row.get(attr) or [])
+        with self._lock:
+            position = self._positions.get(row['id'])
+            if position is None:
+                if self._free:
+                    position = self._free.pop()
+                else:
+                    position = len(self._rows)
+                    if position >= self._capacity:
+                        self._grow()
+                    self._rows.append(None)
+                self._positions[row['id']] = position
+            else:
+                self._unlink(position)
+            self._rows[position] = row
+            self._alive[position] = True
+            for attr in COUNT_ATTRIBUTES:
+                self._counts[attr][position] = int(row.get(f"{attr}_count", len(row[attr])))
+            for attr in CATEGORICAL_ATTRIBUTES:
+                value = row.get(attr)
+                if value is None:
+                    continue
+                code = self._intern(value)
+                self._codes[attr][position] = code
+                self._postings[attr].setdefault(code, set()).add(position)
+
+    def remove(self, user_id: str):
+        """
+        Remove a user; its slot is reused by a later insert.
+        """
+        with self._lock:
+            position = self._positions.pop(user_id, None)
+            if position is None:
+                return
+            self._unlink(position)
+            self._alive[position] = False
+            for attr in COUNT_ATTRIBUTES:
+                self._counts[attr][position] = 0
+            self._rows[position] = None
+            self._free.append(position)
+
+    def append_relation(self, user_id: str, attr: str, event_id: Optional[str] = None):
+        """
+        Record an event in a user's events_hosted / events_attended list, or
+        only bump the count when event_id is None (registrations are kept in
+        their own table, not on the user).
+        Unknown users are ignored (they are picked up by the next reload).
+        """
+        with self._lock:
+            position = self._positions.get(user_id)
+            if position is None:
+                return
+            row = self._rows[position]
+            if event_id is not None:
+                row[attr].append(event_id)
+            self._counts[attr][position] += 1
+            row[f"{attr}_count"] = int(self._counts[attr][position])
+
+    def filter(self, equals: dict, ranges: dict) -> List[dict]:
+        """
+        Return the rows matching every equality predicate (attribute -> value)
+        and count bound ((attribute, 'min'|'max') -> value), in insertion order.
+        """
+        with self._lock:
+            size = len(self._rows)
+            mask = self._alive[:size].copy()
+            postings = []
+            for attr, value in equals.items():
+                code = self._interned.get(value)
+                posting = self._postings[attr].get(code) if code is not None else None
+                if not posting:
+                    return []
+                postings.append(posting)
+            if postings:
+                postings.sort(key=len)
+                candidates = set.intersection(*postings) if len(postings) > 1 else postings[0]
+                selected = np.zeros(size, dtype=bool)
+                selected[np.fromiter(candidates, dtype=np.int64, count=len(candidates))] = True
+                mask &= selected
+            for (attr, bound), value in ranges.items():
+                column = self._counts[attr][:size]
+                mask &= (column >= value) if bound == 'min' else (column <= value)
+            return [dict(self._rows[position]) for position in np.flatnonzero(mask)]
+
+
+_index: Optional[UserIndex] = None
+
+
+def get_user_index() -> Optional[UserIndex]:
+    """
+    Returns the loaded process-wide index, or None when disabled or not loaded yet.
+    """
+    return _index
+
+
+def load_user_index(db) -> UserIndex:
+    """
+    Build the index from a full (segmented) scan of the users table and publish it.
+    """
+    global _index
+    index = UserIndex()
+    for item in scan_table(db.Table('users')):
+        # Skip placeholder items created by host/attendee updates for unknown user ids
+        if 'email' in item:
+            index.put(item)
+    _index = index
+    return index
@@ -0,0 +1,100 @@
+"""
+bench_async.py
+Load test of the sync API (app.main, threadpool-bound) against async mode
+(app.async_main, aioboto3). Each app runs in its own uvicorn worker and is hit
+with GET /users/{id} at increasing numbers of concurrent clients; the sync
+app's throughput flattens and its latency grows once the clients outnumber
+THREADPOOL_SIZE, which is its concurrency ceiling.
+
+Run against DynamoDB Local (tables created with `python -m app.init_dynamodb`);
+moto's server handles requests one at a time and becomes the bottleneck:
+    python -m benchmarks.bench_async --concurrency 20,100,500,1000 --requests 5000
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from app import database
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(app_path):
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', app_path, '--port', str(port), '--log-level', 'warning', '--backlog', '4096'],
+        env=dict(os.environ)
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/docs', timeout=1)
+            return process, f'http://127.0.0.1:{port}'
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'{app_path} did not start')
+
+
+async def _load(base_url, path, requests, concurrency):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
+                    errors.append(e)
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000 if latencies else float('nan')
+    p50 = statistics.median(latencies) * 1000 if latencies else float('nan')
+    return len(latencies) / elapsed, p50, p99, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', default='20,100,500,1000')
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    user_id = str(uuid.uuid4())
+    database.get_dynamodb_resource().Table('users').put_item(Item={
+        'id': user_id, 'firstName': 'Load', 'lastName': 'Test', 'email': 'load@example.com'
+    })
+    print(f"{'mode':<6} {'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode, app_path in (('sync', 'app.main:app'), ('async', 'app.async_main:app')):
+        process, base_url = _start_server(app_path)
+        try:
+            for concurrency in (int(value) for value in args.concurrency.split(',')):
+                rate, p50, p99, errors = asyncio.run(_load(base_url, f'/users/{user_id}', args.requests, concurrency))
+                print(f"{mode:<6} {concurrency:>8} {rate:>9.1f} {p50:>8.1f} {p99:>8.1f} {errors:>7}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
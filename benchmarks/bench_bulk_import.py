@@ -0,0 +1,65 @@
+"""
+bench_bulk_import.py
+Compares rows/sec of importing users one POST /users at a time against a single
+streamed NDJSON upload to POST /users/bulk.
+
+Run against DynamoDB Local (tables created with `python -m app.init_dynamodb`):
+    python -m benchmarks.bench_bulk_import --rows 2000 --concurrency 40
+"""
+
+import argparse
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def _rows(count, tag):
+    return [
+        {'firstName': 'Bulk', 'lastName': str(i), 'email': f'{tag}-{i}@example.com', 'company': tag}
+        for i in range(count)
+    ]
+
+
+def _single_row(client, rows, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda row: client.post('/users', json=row).raise_for_status(), rows))
+    return len(rows) / (time.perf_counter() - start)
+
+
+def _bulk(client, rows):
+    def body():
+        for row in rows:
+            yield (json.dumps(row) + '\n').encode()
+
+    start = time.perf_counter()
+    response = client.post('/users/bulk', content=body(), headers={'Content-Type': 'application/x-ndjson'})
+    response.raise_for_status()
+    assert response.json()['created'] == len(rows)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=40)
+    args = parser.parse_args()
+
+    tag = f'bench-{uuid.uuid4().hex[:8]}'
+    with TestClient(app) as client:
+        single = _single_row(client, _rows(args.rows, tag + '-single'), args.concurrency)
+        bulk = _bulk(client, _rows(args.rows, tag + '-bulk'))
+
+    print(f"rows={args.rows} concurrency={args.concurrency}")
+    print(f"POST /users (one row per request): {single:10.1f} rows/s")
+    print(f"POST /users/bulk (NDJSON stream):  {bulk:10.1f} rows/s")
+    print(f"speedup: {bulk / single:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
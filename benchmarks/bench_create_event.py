@@ -0,0 +1,67 @@
+"""
+bench_create_event.py
+Latency of create_event per number of hosts: the previous serial fan-out (one
+put_item, then one update_item per owner/host) against the transactional
+fan-out now used by service.create_event.
+
+Run against DynamoDB Local (tables created with `python -m app.init_dynamodb`):
+    python -m benchmarks.bench_create_event --hosts 0,5,20,50,150 --repeat 20
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+
+from app import database, service
+from app.schemas import EventCreate
+
+
+def _serial_create_event(db, event):
+    event_dict = service.new_event_item(event)
+    db.Table('events').put_item(Item=event_dict)
+    for host_id in [event.owner] + event.hosts:
+        service.add_hosted_events(db, host_id, [event_dict['id']])
+    return event_dict
+
+
+def _seed_users(db, count):
+    user_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with db.Table('users').batch_writer() as writer:
+        for user_id in user_ids:
+            writer.put_item(Item={'id': user_id, 'firstName': 'Bench', 'lastName': 'Host', 'email': 'bench@example.com'})
+    return user_ids
+
+
+def _median_ms(create, db, event, repeat):
+    timings = []
+    for _ in range(repeat):
+        # Slugs are unique, so every run creates a differently named event
+        run_event = event.model_copy(update={'slug': f'bench-{uuid.uuid4()}'})
+        start = time.perf_counter()
+        create(db, run_event)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hosts', default='0,5,20,50,150')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    db = database.get_dynamodb_resource()
+    print(f"{'hosts':>6} {'serial ms':>10} {'transact ms':>12} {'speedup':>8}")
+    for count in (int(value) for value in args.hosts.split(',')):
+        owner, *hosts = _seed_users(db, count + 1)
+        event = EventCreate(
+            slug='bench', title='Bench', startAt='2025-01-01T10:00:00Z', endAt='2025-01-01T12:00:00Z',
+            maxCapacity=100, owner=owner, hosts=hosts
+        )
+        serial = _median_ms(_serial_create_event, db, event, args.repeat)
+        transact = _median_ms(service.create_event, db, event, args.repeat)
+        print(f"{count:>6} {serial:>10.1f} {transact:>12.1f} {serial / transact:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+bench_db_pool.py
+Compares requests/sec of a per-request boto3 resource (old get_db behaviour)
+against the shared, pooled resource returned by database.get_dynamodb_resource().
+
+Run against DynamoDB Local (tables created with `python -m app.init_dynamodb`):
+    python -m benchmarks.bench_db_pool --requests 2000 --concurrency 40
+"""
+
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app import database
+
+
+def _seed_user(db):
+    user_id = str(uuid.uuid4())
+    db.Table('users').put_item(Item={
+        'id': user_id,
+        'firstName': 'Bench',
+        'lastName': 'User',
+        'email': 'bench@example.com',
+    })
+    return user_id
+
+
+def _run(get_db, user_id, requests, concurrency):
+    def one_request(_):
+        db = get_db()
+        db.Table('users').get_item(Key={'id': user_id})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=database.THREADPOOL_SIZE)
+    args = parser.parse_args()
+
+    user_id = _seed_user(database.get_dynamodb_resource())
+    # Open the shared pool once so both runs measure steady state.
+    database.warm_up(args.concurrency)
+
+    per_request = _run(database.create_dynamodb_resource, user_id, args.requests, args.concurrency)
+    pooled = _run(database.get_dynamodb_resource, user_id, args.requests, args.concurrency)
+
+    print(f"requests={args.requests} concurrency={args.concurrency}")
+    print(f"per-request resource: {per_request:10.1f} req/s")
+    print(f"shared pooled resource: {pooled:8.1f} req/s")
+    print(f"speedup: {pooled / per_request:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
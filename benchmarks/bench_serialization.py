@@ -0,0 +1,103 @@
+"""
+bench_serialization.py
+Time to serve GET /users/all for a large users table, excluding DynamoDB:
+the scan is replaced by in-memory items so only validation and JSON encoding
+are measured.
+
+  - before: service builds UserOut(**item) for every row, FastAPI validates the
+    list again against response_model and encodes it with the stdlib JSONResponse
+  - after:  service returns dicts, the route projects them onto UserOut's
+    fields (schemas.ResponseShape) and orjson writes the JSON
+
+No database needed:
+    python -m benchmarks.bench_serialization --users 10000 --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import time
+from decimal import Decimal
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import dependencies, main, service
+from app.schemas import UserOut
+
+
+def _items(count):
+    # Shaped like scan results: Decimal numbers and attributes outside UserOut
+    return [{
+        'id': f'user-{n}',
+        'firstName': 'Bench',
+        'lastName': f'User {n}',
+        'email': f'bench{n}@example.com',
+        'phoneNumber': '+84 000 000',
+        'company': 'BenchCo',
+        'job_title': 'Engineer',
+        'city': 'Hanoi',
+        'state': 'HN',
+        'events_hosted': [f'event-{n}-{k}' for k in range(3)],
+        'events_attended': [f'event-{k}' for k in range(5)],
+        'events_hosted_count': Decimal(3),
+        'events_attended_count': Decimal(5),
+        'version': Decimal(2),
+    } for n in range(count)]
+
+
+def _before_app(items):
+    app = FastAPI()
+
+    @app.get("/users/all", response_model=List[UserOut])
+    def get_all_users():
+        users = []
+        for item in items:
+            item = dict(item)
+            item['events_hosted'] = item.get('events_hosted', [])
+            item['events_attended'] = item.get('events_attended', [])
+            users.append(UserOut(**item))
+        return users
+
+    return app
+
+
+def _time(client, repeat):
+    client.get("/users/all")  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get("/users/all")
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return statistics.median(timings), response.content
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    items = _items(args.users)
+    before, before_body = _time(TestClient(_before_app(items)), args.repeat)
+
+    service_get_all_users = service.get_all_users
+    service.get_all_users = lambda db: [service._user_out(dict(item)) for item in items]
+    main.app.dependency_overrides[dependencies.get_db] = lambda: None
+    try:
+        after, after_body = _time(TestClient(main.app), args.repeat)
+    finally:
+        service.get_all_users = service_get_all_users
+        main.app.dependency_overrides.clear()
+
+    assert json.loads(before_body) == json.loads(after_body), "responses differ"
+    print(f"users={args.users} (median of {args.repeat})")
+    print(f"before: {before * 1000:8.1f} ms  ({len(before_body)} bytes)")
+    print(f"after:  {after * 1000:8.1f} ms  ({len(after_body)} bytes)")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main_()
@@ -0,0 +1,72 @@
+"""
+bench_smtp.py
+Throughput of one SMTP connection per message (the old send_email) versus the
+pooled sender in email_utils, against a local aiosmtpd sink.
+
+    pip install aiosmtpd
+    python -m benchmarks.bench_smtp --messages 2000 --pool-size 4
+"""
+
+import argparse
+import smtplib
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiosmtpd.controller import Controller
+
+from app.email_utils import SMTPPool, build_message
+
+SENDER = "bench@example.com"
+
+
+class _Sink:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _send_unpooled(host, port, to_email):
+    msg = build_message(to_email, "Bench", "Body", SENDER)
+    with smtplib.SMTP(host, port) as server:
+        server.sendmail(SENDER, to_email, msg.as_string())
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--pool-size', type=int, default=4)
+    args = parser.parse_args()
+
+    controller = Controller(_Sink(), hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    recipients = [f"user{i}@example.com" for i in range(args.messages)]
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.pool_size) as pool:
+            list(pool.map(lambda to: _send_unpooled("127.0.0.1", controller.port, to), recipients))
+        unpooled = args.messages / (time.perf_counter() - start)
+
+        smtp_pool = SMTPPool("127.0.0.1", controller.port, sender=SENDER, size=args.pool_size, starttls=False)
+        start = time.perf_counter()
+        results = smtp_pool.send_batch(recipients, "Bench", "Body")
+        pooled = args.messages / (time.perf_counter() - start)
+        smtp_pool.close()
+        assert all(results)
+    finally:
+        controller.stop()
+
+    print(f"messages={args.messages} concurrency={args.pool_size}")
+    print(f"connection per message: {unpooled:8.1f} msg/s")
+    print(f"pooled sessions:        {pooled:8.1f} msg/s ({smtp_pool.sessions_opened} sessions opened)")
+    print(f"speedup: {pooled / unpooled:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
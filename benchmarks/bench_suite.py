@@ -0,0 +1,536 @@
+"""
+bench_suite.py
+Reproducible load benchmark of every endpoint in app/main.py.
+
+`run`:
+  1. starts a DynamoDB stand-in (moto's server, in process) or uses DynamoDB
+     Local / AWS given with --endpoint-url, and creates the tables;
+  2. seeds a dataset derived from --seed: --users users spread over
+     --companies companies, --events events with --attendees registrations
+     each, plus scratch users/events for the update and delete scenarios;
+  3. starts a local SMTP sink (aiosmtpd) and the API in a uvicorn worker
+     (--mode sync or async) pointed at both;
+  4. runs every scenario with --concurrency clients and records throughput,
+     p50/p95/p99 latency, errors and DynamoDB calls per request (the server's
+     GET /metrics/dynamodb, counted by botocore hooks, read before and after);
+  5. writes the results and the run parameters as JSON (--out).
+`compare` prints the change between two result files and exits with 1 when a
+scenario regressed by more than --threshold percent, or makes more DynamoDB
+calls per request.
+
+    pip install httpx aiosmtpd "moto[server]"
+    python -m benchmarks.bench_suite run --users 1000 --events 20 --attendees 200 --out base.json
+    python -m benchmarks.bench_suite run --endpoint-url http://localhost:8001 --users 1000000 \\
+        --events 200 --attendees 5000 --requests 2000 --concurrency 50 --out big.json
+    python -m benchmarks.bench_suite compare base.json new.json --threshold 10
+
+moto serves one request at a time and becomes the bottleneck under load, so
+compare runs made on the same backend and machine, and use DynamoDB Local for
+datasets beyond ~100k users (--skip-seed reuses a dataset already loaded
+with the same parameters).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+
+# Seeded events start within a year of this date (fixed, so runs are comparable)
+EPOCH = '2030-01-01'
+BATCH_PATCH_SIZE = 10
+BULK_USERS_PER_REQUEST = 100
+BULK_EVENTS_PER_REQUEST = 20
+JOB_TIMEOUT_SECONDS = 600
+
+FIRST_NAMES = ('An', 'Binh', 'Chi', 'Dung', 'Giang', 'Hoa', 'Khanh', 'Linh', 'Minh', 'Nam')
+JOB_TITLES = ('Engineer', 'Designer', 'Manager', 'Analyst', 'Sales', 'Marketing', 'Support', 'Director')
+CITIES = (('Hanoi', 'HN'), ('Ho Chi Minh City', 'HCM'), ('Da Nang', 'DN'), ('Hue', 'TTH'), ('Can Tho', 'CT'))
+TOPICS = ('Python', 'Cloud', 'Data', 'Design', 'Startup', 'Security', 'Mobile', 'AI', 'DevOps', 'Product')
+FORMATS = ('Meetup', 'Conference', 'Workshop', 'Summit', 'Hackathon', 'Webinar')
+
+
+@dataclass
+class Context:
+    """
+    Ids of the seeded data that scenarios build their requests from.
+    """
+    run_id: str
+    companies: List[str]
+    users: List[str]
+    events: List[str]
+    slugs: List[str]
+    scratch_users: List[str]
+    scratch_events: List[str]
+    job_ids: List[str] = field(default_factory=list)
+
+
+class Scenario(NamedTuple):
+    """
+    One endpoint under load. `route` is the method and path as declared in
+    app.main; `request(ctx, i)` returns the path and httpx arguments of the
+    i-th request. Heavy scenarios (full exports, email campaigns) run
+    --heavy-requests times instead of --requests.
+    """
+    name: str
+    route: str
+    request: Callable
+    heavy: bool = False
+
+
+def _user_body(ctx, i, prefix='new'):
+    return {'firstName': 'Bench', 'lastName': f'{prefix} {i}', 'email': f'{prefix}{i}.{ctx.run_id}@example.com',
+            'company': ctx.companies[i % len(ctx.companies)], 'city': CITIES[i % len(CITIES)][0]}
+
+
+def _event_body(ctx, i, slug):
+    return {'slug': slug, 'title': f'{TOPICS[i % len(TOPICS)]} {FORMATS[i % len(FORMATS)]} {i}',
+            'startAt': f'{EPOCH}T10:00:00Z', 'endAt': f'{EPOCH}T12:00:00Z', 'maxCapacity': 100,
+            'owner': ctx.users[i % len(ctx.users)]}
+
+
+def _ndjson(rows):
+    return {'content': '\n'.join(json.dumps(row) for row in rows),
+            'headers': {'Content-Type': 'application/x-ndjson'}}
+
+
+def _pick(items, i):
+    return items[i % len(items)]
+
+
+def _batch(items, i, size):
+    return [items[(i * size + k) % len(items)] for k in range(size)]
+
+
+def _filter(ctx, i):
+    return {'company': _pick(ctx.companies, i), 'job_title': None, 'city': None, 'state': None, 'sort_by': None}
+
+
+# In run order: reads, then writes, then deletes, then email campaigns
+SCENARIOS = [
+    Scenario('get_user', 'GET /users/{user_id}', lambda ctx, i: (f'/users/{_pick(ctx.users, i * 7919)}', {})),
+    Scenario('users_page', 'GET /users/all', lambda ctx, i: ('/users/all', {'params': {'limit': 100}})),
+    Scenario('filter_users', 'GET /users', lambda ctx, i: ('/users', {'params': {'company': _pick(ctx.companies, i), 'limit': 100}})),
+    Scenario('users_batch_get', 'POST /users/batch-get', lambda ctx, i: ('/users/batch-get', {'json': {'ids': _batch(ctx.users, i, 100)}})),
+    Scenario('user_events', 'GET /users/{user_id}/events', lambda ctx, i: (f'/users/{_pick(ctx.users, i * 7919)}/events', {})),
+    Scenario('get_event', 'GET /events/{event_id}', lambda ctx, i: (f'/events/{_pick(ctx.events, i)}', {})),
+    Scenario('get_event_expanded', 'GET /events/{event_id}', lambda ctx, i: (f'/events/{_pick(ctx.events, i)}', {'params': {'expand': 'hosts'}})),
+    Scenario('event_by_slug', 'GET /events/by-slug/{slug}', lambda ctx, i: (f'/events/by-slug/{_pick(ctx.slugs, i)}', {})),
+    Scenario('events_page', 'GET /events', lambda ctx, i: ('/events', {'params': {'limit': 100}})),
+    Scenario('events_all_page', 'GET /events/all', lambda ctx, i: ('/events/all', {'params': {'limit': 100}})),
+    Scenario('events_in_month', 'GET /events', lambda ctx, i: ('/events', {'params': {'from': EPOCH, 'to': '2030-01-31T23:59:59Z', 'limit': 100}})),
+    Scenario('search_events', 'GET /events/search', lambda ctx, i: ('/events/search', {'params': {'q': f'{_pick(TOPICS, i)} {_pick(FORMATS, i)[:4]}'}})),
+    Scenario('events_batch_get', 'POST /events/batch-get', lambda ctx, i: ('/events/batch-get', {'json': {'ids': _batch(ctx.events, i, 20)}})),
+    Scenario('event_attendees', 'GET /events/{event_id}/attendees', lambda ctx, i: (f'/events/{_pick(ctx.events, i)}/attendees', {'params': {'limit': 100}})),
+    Scenario('event_capacity', 'GET /events/{event_id}/capacity', lambda ctx, i: (f'/events/{_pick(ctx.events, i)}/capacity', {})),
+    Scenario('engagement', 'GET /analytics/user-engagement', lambda ctx, i: ('/analytics/user-engagement', {})),
+    Scenario('engagement_users', 'GET /analytics/user-engagement/users', lambda ctx, i: ('/analytics/user-engagement/users', {'params': {'limit': 100}})),
+    Scenario('cache_stats', 'GET /cache/stats', lambda ctx, i: ('/cache/stats', {})),
+    Scenario('dynamodb_metrics', 'GET /metrics/dynamodb', lambda ctx, i: ('/metrics/dynamodb', {})),
+    Scenario('users_export', 'GET /users/export', lambda ctx, i: ('/users/export', {}), heavy=True),
+    Scenario('events_export', 'GET /events/export', lambda ctx, i: ('/events/export', {}), heavy=True),
+
+    Scenario('create_user', 'POST /users', lambda ctx, i: ('/users', {'json': _user_body(ctx, i)})),
+    Scenario('bulk_users', 'POST /users/bulk', lambda ctx, i: ('/users/bulk', _ndjson(
+        [_user_body(ctx, i * BULK_USERS_PER_REQUEST + k, 'bulk') for k in range(BULK_USERS_PER_REQUEST)]))),
+    Scenario('put_user', 'PUT /users/{user_id}', lambda ctx, i: (f'/users/{ctx.scratch_users[i]}', {'json': _user_body(ctx, i, 'put')})),
+    Scenario('patch_user', 'PATCH /users/{user_id}', lambda ctx, i: (f'/users/{ctx.scratch_users[i]}', {'json': {'lastName': f'Patched {i}'}})),
+    Scenario('patch_users_batch', 'PATCH /users/batch', lambda ctx, i: ('/users/batch', {'json': [
+        {'id': user_id, 'changes': {'city': 'Hue'}} for user_id in _batch(ctx.scratch_users, i, BATCH_PATCH_SIZE)]})),
+    Scenario('register', 'POST /users/{user_id}/events/{event_id}/register', lambda ctx, i: (
+        f'/users/{_pick(ctx.users, i)}/events/{_pick(ctx.scratch_events, i)}/register', {})),
+    Scenario('create_event', 'POST /events', lambda ctx, i: ('/events', {'json': _event_body(ctx, i, f'bench-new-{ctx.run_id}-{i}')})),
+    Scenario('bulk_events', 'POST /events/bulk', lambda ctx, i: ('/events/bulk', _ndjson([
+        _event_body(ctx, n, f'bench-bulk-{ctx.run_id}-{n}')
+        for n in range(i * BULK_EVENTS_PER_REQUEST, (i + 1) * BULK_EVENTS_PER_REQUEST)]))),
+    Scenario('put_event', 'PUT /events/{event_id}', lambda ctx, i: (
+        f'/events/{ctx.scratch_events[i]}', {'json': _event_body(ctx, i, f'bench-scratch-{ctx.scratch_events[i]}')})),
+    Scenario('patch_event', 'PATCH /events/{event_id}', lambda ctx, i: (f'/events/{ctx.scratch_events[i]}', {'json': {'venue': f'Hall {i}'}})),
+    Scenario('patch_events_batch', 'PATCH /events/batch', lambda ctx, i: ('/events/batch', {'json': [
+        {'id': event_id, 'changes': {'maxCapacity': 1000}} for event_id in _batch(ctx.scratch_events, i, BATCH_PATCH_SIZE)]})),
+
+    Scenario('delete_user', 'DELETE /users/{user_id}', lambda ctx, i: (f'/users/{ctx.scratch_users[i]}', {})),
+    Scenario('delete_event', 'DELETE /events/{event_id}', lambda ctx, i: (f'/events/{ctx.scratch_events[i]}', {})),
+
+    Scenario('send_emails', 'POST /send-emails', lambda ctx, i: ('/send-emails', {'json': _filter(ctx, i)}), heavy=True),
+    Scenario('email_job_status', 'GET /send-emails/{job_id}', lambda ctx, i: (f'/send-emails/{_pick(ctx.job_ids, i)}', {})),
+    Scenario('email_logs_page', 'GET /email-logs', lambda ctx, i: ('/email-logs', {'params': {'limit': 100}})),
+    Scenario('email_logs_by_job', 'GET /email-logs', lambda ctx, i: ('/email-logs', {'params': {'job_id': _pick(ctx.job_ids, i), 'limit': 100}})),
+]
+# Need the jobs started by send_emails
+JOB_SCENARIOS = ('email_job_status', 'email_logs_by_job')
+
+
+def _method(scenario: Scenario) -> str:
+    return scenario.route.split(' ', 1)[0]
+
+
+def uncovered_routes(app) -> List[str]:
+    """
+    Routes of the app ("METHOD /path") that no scenario exercises.
+    """
+    from fastapi.routing import APIRoute
+
+    covered = {scenario.route for scenario in SCENARIOS}
+    routes = [f'{method} {route.path}' for route in app.routes if isinstance(route, APIRoute) for method in sorted(route.methods)]
+    return [route for route in routes if route not in covered]
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)]
+
+
+# --- Backends ---------------------------------------------------------------
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class SMTPSink:
+    """
+    Local SMTP server that accepts and counts every message.
+    """
+
+    def __init__(self):
+        self.messages = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += len(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def _start_moto():
+    """
+    moto's server in a background thread, serving one request at a time
+    (moto's DynamoDB backend is not safe for concurrent transactions).
+    """
+    from moto.server import DomainDispatcherApplication, create_backend_app
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, DomainDispatcherApplication(create_backend_app), threaded=False)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+# --- Seeding ----------------------------------------------------------------
+
+def _user_item(user_id, n, rng, companies):
+    city, state = rng.choice(CITIES)
+    return {
+        'id': user_id, 'firstName': rng.choice(FIRST_NAMES), 'lastName': f'User {n}',
+        'email': f'{user_id}@example.com', 'company': rng.choice(companies), 'job_title': rng.choice(JOB_TITLES),
+        'city': city, 'state': state, 'events_hosted': [], 'events_attended': [],
+        'events_hosted_count': 0, 'events_attended_count': 0, 'version': 1,
+    }
+
+
+def _event_item(event_id, n, rng, owner, capacity):
+    from app import service
+
+    start = time.strftime('%Y-%m-%dT%H:00:00Z', time.gmtime(
+        time.mktime(time.strptime(EPOCH, '%Y-%m-%d')) + rng.randrange(365 * 24) * 3600))
+    topic, event_format = rng.choice(TOPICS), rng.choice(FORMATS)
+    item = {
+        'id': event_id, 'slug': f'bench-{event_id}', 'title': f'{topic} {event_format} #{n}',
+        'description': f'A {event_format.lower()} about {topic} and {rng.choice(TOPICS)}',
+        'startAt': start, 'endAt': start, 'venue': f'{rng.choice(CITIES)[0]} Hall {rng.randrange(20)}',
+        'maxCapacity': capacity, 'owner': owner, 'hosts': [], 'attendees': [], 'version': 1,
+    }
+    item.update(service.event_start_keys(event_id, start))
+    return item
+
+
+def seed(db, args, requests: int) -> Context:
+    """
+    Write the dataset for --seed (unless --skip-seed) and fresh scratch items.
+    """
+    from app import service
+    from app.batching import parallel_batch_write
+
+    rng = random.Random(args.seed)
+    companies = [f'Company {n}' for n in range(args.companies)]
+    user_ids = [f'bench-user-{n:07d}' for n in range(args.users)]
+    event_ids = [f'bench-event-{n:05d}' for n in range(args.events)]
+    scratch = max(requests, 1) * BATCH_PATCH_SIZE
+    scratch_users = [f'bench-scratch-user-{n:06d}' for n in range(scratch)]
+    scratch_events = [f'bench-scratch-event-{n:06d}' for n in range(scratch)]
+    context = Context(uuid.uuid4().hex[:8], companies, user_ids, event_ids, [f'bench-{event_id}' for event_id in event_ids],
+                      scratch_users, scratch_events)
+
+    start = time.perf_counter()
+    if not args.skip_seed:
+        users = [_user_item(user_id, n, rng, companies) for n, user_id in enumerate(user_ids)]
+        events, registrations, counters = [], [], []
+        for n, event_id in enumerate(event_ids):
+            owner = rng.randrange(len(users))
+            events.append(_event_item(event_id, n, rng, user_ids[owner], args.attendees * 2 + requests))
+            users[owner]['events_hosted'].append(event_id)
+            users[owner]['events_hosted_count'] += 1
+            attendees = rng.sample(range(len(users)), min(args.attendees, len(users)))
+            for position in attendees:
+                users[position]['events_attended_count'] += 1
+                registrations.append({'event_id': event_id, 'user_id': user_ids[position], 'registered_at': 0})
+            counters.append({'event_id': event_id, 'shard': 0, 'registered': len(attendees)})
+        parallel_batch_write(db, 'users', users)
+        parallel_batch_write(db, 'events', events)
+        parallel_batch_write(db, service.EVENT_SLUGS_TABLE, [{'slug': e['slug'], 'event_id': e['id']} for e in events])
+        parallel_batch_write(db, service.REGISTRATIONS_TABLE, registrations)
+        parallel_batch_write(db, service.EVENT_COUNTERS_TABLE, counters)
+    parallel_batch_write(db, 'users', [_user_item(user_id, n, rng, companies) for n, user_id in enumerate(scratch_users)])
+    scratch_items = [_event_item(event_id, n, rng, user_ids[0], requests * 2) for n, event_id in enumerate(scratch_events)]
+    for item in scratch_items:
+        item['slug'] = f'bench-scratch-{item["id"]}'
+    parallel_batch_write(db, 'events', scratch_items)
+    parallel_batch_write(db, service.EVENT_SLUGS_TABLE, [{'slug': e['slug'], 'event_id': e['id']} for e in scratch_items])
+    print(f"seeded in {time.perf_counter() - start:.1f}s: {args.users} users, {args.events} events x "
+          f"{args.attendees} attendees, {scratch} scratch users/events", flush=True)
+    return context
+
+
+# --- Load -------------------------------------------------------------------
+
+async def _load(base_url, method, requests, concurrency):
+    """
+    Send the prepared requests from `concurrency` clients. Returns
+    (elapsed seconds, sorted latencies in ms, {status: count} of failures, responses).
+    """
+    latencies, failures, bodies = [], {}, []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        pending = iter(requests)
+
+        async def worker():
+            for path, kwargs in pending:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    await response.aread()
+                except httpx.HTTPError as e:
+                    failures[type(e).__name__] = failures.get(type(e).__name__, 0) + 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    failures[str(response.status_code)] = failures.get(str(response.status_code), 0) + 1
+                else:
+                    bodies.append(response)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, sorted(latencies), failures, bodies
+
+
+def _wait_for_jobs(base_url, job_ids):
+    deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+    for job_id in job_ids:
+        while time.monotonic() < deadline:
+            job = httpx.get(f'{base_url}/send-emails/{job_id}', timeout=30).json()
+            if job.get('status') in ('completed', 'failed'):
+                break
+            time.sleep(0.2)
+
+
+def run_scenario(base_url, scenario: Scenario, ctx: Context, count: int, concurrency: int, sink: SMTPSink) -> dict:
+    """
+    Run one scenario and summarize it.
+    """
+    requests = [scenario.request(ctx, i) for i in range(count)]
+    before = httpx.get(f'{base_url}/metrics/dynamodb', timeout=30).json()
+    messages = sink.messages
+    elapsed, latencies, failures, responses = asyncio.run(_load(base_url, _method(scenario), requests, concurrency))
+    if scenario.name == 'send_emails':
+        ctx.job_ids += [response.json()['id'] for response in responses]
+        _wait_for_jobs(base_url, ctx.job_ids)
+    after = httpx.get(f'{base_url}/metrics/dynamodb', timeout=30).json()
+    operations = {
+        name: calls - before['operations'].get(name, 0)
+        for name, calls in after['operations'].items() if calls - before['operations'].get(name, 0)
+    }
+    result = {
+        'route': scenario.route,
+        'requests': count,
+        'concurrency': concurrency,
+        'errors': sum(failures.values()),
+        'failures': failures,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else float('nan'),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'dynamodb_calls_per_request': round((after['total'] - before['total']) / count, 2),
+        'dynamodb_operations': operations,
+    }
+    if scenario.name == 'send_emails':
+        result['emails_delivered'] = sink.messages - messages
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    from aiosmtpd.controller import Controller
+
+    moto_server = None
+    endpoint_url = args.endpoint_url
+    if endpoint_url is None:
+        moto_server, endpoint_url = _start_moto()
+    sink = SMTPSink()
+    controller = Controller(sink, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    os.environ.update({
+        'DYNAMODB_LOCAL_URL': endpoint_url,
+        'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+        'SMTP_HOST': '127.0.0.1', 'SMTP_PORT': str(controller.port), 'SMTP_STARTTLS': 'false',
+        'SENDER_EMAIL': 'bench@example.com', 'EMAIL_RATE_LIMIT': '0',
+    })
+    os.environ.pop('SMTP_USER', None)
+    process = None
+    try:
+        subprocess.run([sys.executable, '-m', 'app.init_dynamodb'], check=True, stdout=subprocess.DEVNULL)
+        # app modules read the DynamoDB endpoint from the environment at import
+        from app import database, main
+        from benchmarks.bench_async import _start_server
+
+        missing = uncovered_routes(main.app)
+        if missing:
+            print(f"warning: no scenario for {', '.join(missing)}", file=sys.stderr)
+        selected = [s for s in SCENARIOS if not args.only or s.name in args.only.split(',')]
+        ctx = seed(database.get_dynamodb_resource(), args, args.requests)
+        process, base_url = _start_server('app.async_main:app' if args.mode == 'async' else 'app.main:app')
+
+        results = {}
+        print(f"{'scenario':<20} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ddb/req':>8} {'errors':>7}")
+        for scenario in selected:
+            if scenario.name in JOB_SCENARIOS and not ctx.job_ids:
+                continue
+            count = args.heavy_requests if scenario.heavy else args.requests
+            result = results[scenario.name] = run_scenario(base_url, scenario, ctx, count, args.concurrency, sink)
+            print(f"{scenario.name:<20} {result['throughput_rps']:>9.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                  f"{result['p99_ms']:>8.1f} {result['dynamodb_calls_per_request']:>8.2f} {result['errors']:>7}", flush=True)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        controller.stop()
+        if moto_server is not None:
+            moto_server.shutdown()
+
+    report = {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': 'moto' if args.endpoint_url is None else args.endpoint_url,
+            'mode': args.mode,
+            'dataset': {'seed': args.seed, 'users': args.users, 'companies': args.companies,
+                        'events': args.events, 'attendees': args.attendees},
+            'requests': args.requests,
+            'heavy_requests': args.heavy_requests,
+            'concurrency': args.concurrency,
+        },
+        'scenarios': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.out}")
+    return report
+
+
+# --- Comparison -------------------------------------------------------------
+
+def _change(before, after) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(base: dict, new: dict, threshold: float) -> List[str]:
+    """
+    Print the change per scenario; returns the names of regressed scenarios
+    (throughput down or p95 up by more than threshold percent, or more
+    DynamoDB calls per request).
+    """
+    for key in ('dataset', 'mode', 'backend', 'concurrency'):
+        if base['meta'].get(key) != new['meta'].get(key):
+            print(f"note: {key} differs ({base['meta'].get(key)} vs {new['meta'].get(key)})")
+    print(f"{'scenario':<20} {'req/s':>18} {'p95 ms':>20} {'p99 ms':>20} {'ddb/req':>13}")
+    regressed = []
+    for name, before in base['scenarios'].items():
+        after = new['scenarios'].get(name)
+        if after is None:
+            continue
+        rps, p95, p99 = (_change(before[k], after[k]) for k in ('throughput_rps', 'p95_ms', 'p99_ms'))
+        calls = after['dynamodb_calls_per_request'] - before['dynamodb_calls_per_request']
+        flag = -rps > threshold or p95 > threshold or calls > 0.01
+        if flag:
+            regressed.append(name)
+        print(f"{name:<20} {after['throughput_rps']:>9.1f} ({rps:+6.1f}%) {after['p95_ms']:>10.1f} ({p95:+6.1f}%) "
+              f"{after['p99_ms']:>10.1f} ({p99:+6.1f}%) {after['dynamodb_calls_per_request']:>6.2f} ({calls:+.2f})"
+              f"{'  REGRESSED' if flag else ''}")
+    return regressed
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='seed a dataset and load every endpoint')
+    run_parser.add_argument('--endpoint-url', help='DynamoDB Local/AWS endpoint (default: start moto in process)')
+    run_parser.add_argument('--mode', choices=('sync', 'async'), default='sync')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--users', type=int, default=1000)
+    run_parser.add_argument('--companies', type=int, default=20)
+    run_parser.add_argument('--events', type=int, default=20)
+    run_parser.add_argument('--attendees', type=int, default=200, help='registrations per seeded event')
+    run_parser.add_argument('--skip-seed', action='store_true', help='reuse a dataset seeded with the same parameters')
+    run_parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    run_parser.add_argument('--heavy-requests', type=int, default=3, help='requests per export/email scenario')
+    run_parser.add_argument('--concurrency', type=int, default=10)
+    run_parser.add_argument('--only', help='comma-separated scenario names')
+    run_parser.add_argument('--out', help='write results to this JSON file')
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=10.0, help='percent change counted as a regression')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run(args)
+        return
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    regressed = compare(base, new, args.threshold)
+    if regressed:
+        print(f"regressed: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_()
@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import analytics
+from app.analytics import EngagementAnalytics, EngagementColumns, summarize
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _user(n, company, hosted, attended):
+    return {'id': f'u{n}', 'email': f'u{n}@example.com', 'firstName': 'U', 'lastName': str(n),
+            'company': company, 'events_hosted_count': hosted, 'events_attended_count': attended}
+
+USERS = [_user(0, 'A', 0, 1), _user(1, 'A', 4, 0), _user(2, 'B', 1, 9), _user(3, None, 0, 2)]
+
+def test_summarize_rollups_distributions_and_top_users():
+    summary = summarize(EngagementColumns(USERS), top_n=2)
+    assert summary['users'] == 4
+    assert summary['totals'] == {'events_hosted': 5, 'events_attended': 12}
+    hosted = summary['distributions']['events_hosted']
+    assert hosted['max'] == 4 and hosted['percentiles']['p50'] == 0.5
+    assert [(b['min'], b['max'], b['users']) for b in hosted['histogram']] == [(0, 0, 2), (1, 1, 1), (2, 3, 0), (4, 7, 1)]
+    companies = summary['rollups']['company']
+    assert companies['groups'] == 3
+    assert companies['rows'][0] == {'value': 'A', 'users': 2, 'events_hosted': 4, 'avg_events_hosted': 2.0,
+                                    'events_attended': 1, 'avg_events_attended': 0.5}
+    assert None in [row['value'] for row in companies['rows']]
+    assert [u['user_id'] for u in summary['top_users']['events_attended']] == ['u2', 'u3']
+
+def test_summarize_empty():
+    summary = summarize(EngagementColumns([]))
+    assert summary['users'] == 0 and summary['top_users']['events_hosted'] == []
+    assert summary['distributions']['events_attended']['histogram'] == []
+
+def test_snapshot_refresh_and_incremental_updates(monkeypatch):
+    loads = []
+    monkeypatch.setattr(analytics, 'load_columns', lambda db: loads.append(db) or EngagementColumns(USERS))
+    clock = Clock()
+    store = EngagementAnalytics(clock=clock)
+    assert store.snapshot('db')['totals']['events_attended'] == 12
+    store.record('u0', 'events_attended')
+    store.record('unknown', 'events_attended')  # not loaded yet: left to the next refresh
+    assert store.snapshot('db')['totals']['events_attended'] == 12  # recompute throttled
+    clock.now += analytics.ANALYTICS_RECOMPUTE_SECONDS
+    snapshot = store.snapshot('db')
+    assert snapshot['totals']['events_attended'] == 13 and len(loads) == 1
+    assert store.snapshot('db') is snapshot  # nothing changed: served as is
+    clock.now += analytics.ANALYTICS_REFRESH_SECONDS
+    assert store.snapshot('db')['totals']['events_attended'] == 12 and len(loads) == 2
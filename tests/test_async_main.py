@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import socket
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("aioboto3")
+from app import async_main
+
+def test_async_routes_replace_sync_ones_in_place():
+    paths = [(route.path, route.endpoint.__module__) for route in async_main.app.routes if hasattr(route, "endpoint")]
+    assert ("/users/{user_id}", "app.async_main") in paths
+    # literal paths declared before /users/{user_id} in app.main still win
+    assert paths.index(("/users/export", "app.main")) < paths.index(("/users/{user_id}", "app.async_main"))
+
+def test_async_mode_end_to_end():
+    with TestClient(async_main.app) as client:
+        owner = client.post("/users", json={"firstName": "Async", "lastName": "Owner", "email": "async.owner@example.com"}).json()
+        guest = client.post("/users", json={"firstName": "Async", "lastName": "Guest", "email": "async.guest@example.com"}).json()
+        event = client.post("/events", json={
+            "slug": f"async-event-{uuid.uuid4().hex[:8]}", "title": "Async Event",
+            "startAt": "2023-10-01T10:00:00Z", "endAt": "2023-10-01T12:00:00Z",
+            "maxCapacity": 1, "owner": owner["id"], "hosts": [owner["id"]]
+        }).json()
+        try:
+            assert client.get(f"/users/{owner['id']}").json()["events_hosted_count"] == 1
+            assert client.get(f"/events/{event['id']}").json()["title"] == "Async Event"
+            assert client.post(f"/users/{guest['id']}/events/{event['id']}/register").json()["status"] == "registered"
+            assert client.post(f"/users/{owner['id']}/events/{event['id']}/register").status_code == 409
+            attendees = client.get(f"/events/{event['id']}/attendees").json()["items"]
+            assert [r["user_id"] for r in attendees] == [guest["id"]]
+            expanded = client.get(f"/events/{event['id']}", params={"expand": "attendees"}).json()
+            assert [user["id"] for user in expanded["attendee_users"]] == [guest["id"]]
+            assert client.get(f"/users/{guest['id']}/events", params={"cursor": "!!"}).status_code == 400
+            # sync fallback route
+            assert client.get(f"/events/{event['id']}/capacity").json()["remaining"] == 0
+        finally:
+            client.delete(f"/events/{event['id']}")
+            for user in (owner, guest):
+                client.delete(f"/users/{user['id']}")
+
+def test_async_get_user_written_before_versioning():
+    from app.database import get_dynamodb_resource
+
+    user_id = f"legacy-async-{uuid.uuid4().hex}"
+    users = get_dynamodb_resource().Table("users")
+    users.put_item(Item={"id": user_id, "firstName": "Legacy", "lastName": "Async", "email": "legacy.async@example.com"})
+    try:
+        with TestClient(async_main.app) as client:
+            response = client.get(f"/users/{user_id}")
+        assert response.status_code == 200 and response.headers["ETag"] == '"0"'
+    finally:
+        users.delete_item(Key={"id": user_id})
+
+def test_async_mode_sends_campaigns_over_the_async_smtp_pool(monkeypatch):
+    pytest.importorskip("aiosmtplib")
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    from app import email_utils
+
+    class Sink:
+        recipients = []
+
+        async def handle_DATA(self, server, session, envelope):
+            self.recipients.extend(envelope.rcpt_tos)
+            return "250 OK"
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    controller = controller_module.Controller(Sink(), hostname="127.0.0.1", port=port)
+    controller.start()
+    pool = email_utils.AsyncSMTPPool("127.0.0.1", port, sender="crm@example.com", size=2, starttls=False)
+    monkeypatch.setattr(email_utils, "_async_pool", pool)
+    company = f"AsyncMailCo-{uuid.uuid4().hex[:8]}"
+    try:
+        with TestClient(async_main.app) as client:
+            users = [client.post("/users", json={
+                "firstName": "Async", "lastName": f"Mail {n}", "email": f"mail{n}.{company}@example.com", "company": company
+            }).json() for n in range(3)]
+            emails, user_ids = [user["email"] for user in users], [user["id"] for user in users]
+            job = client.post("/send-emails", json={
+                "company": company, "job_title": None, "city": None, "state": None, "sort_by": None
+            }).json()
+            deadline = time.time() + 10
+            while (job := client.get(f"/send-emails/{job['id']}").json())["status"] not in ("completed", "failed"):
+                assert time.time() < deadline
+                time.sleep(0.05)
+            for user_id in user_ids:
+                client.delete(f"/users/{user_id}")
+        assert (job["status"], job["sent"]) == ("completed", 3)
+        assert sorted(Sink.recipients) == sorted(emails)
+        assert 1 <= pool.sessions_opened <= 2
+    finally:
+        controller.stop()
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import uuid
+from app.database import get_dynamodb_resource
+from app.backfill_counters import backfill_user
+
+db = get_dynamodb_resource()
+table = db.Table('users')
+registrations = db.Table('registrations')
+
+def test_backfill_sets_counts_from_lists():
+    user_id = str(uuid.uuid4())
+    table.put_item(Item={
+        'id': user_id, 'firstName': 'Old', 'lastName': 'User', 'email': 'old@example.com',
+        'events_hosted': ['e1', 'e2'], 'events_attended': ['e3']
+    })
+    assert backfill_user(db, table.get_item(Key={'id': user_id})['Item'])
+    item = table.get_item(Key={'id': user_id})['Item']
+    assert item['events_hosted_count'] == 2
+    assert item['events_attended_count'] == 1
+    # already consistent: nothing to do
+    assert not backfill_user(db, item)
+
+def test_backfill_counts_registrations_after_lists_are_dropped():
+    user_id, event_ids = str(uuid.uuid4()), [str(uuid.uuid4()) for _ in range(2)]
+    # migrated user: the list is gone and the registrations table is the source of truth
+    table.put_item(Item={
+        'id': user_id, 'firstName': 'Old', 'lastName': 'User', 'email': 'old@example.com',
+        'events_hosted_count': 0, 'events_attended_count': 2, 'version': 3
+    })
+    try:
+        for event_id in event_ids:
+            registrations.put_item(Item={'event_id': event_id, 'user_id': user_id})
+        assert not backfill_user(db, table.get_item(Key={'id': user_id})['Item'])
+        assert table.get_item(Key={'id': user_id})['Item']['events_attended_count'] == 2
+    finally:
+        for event_id in event_ids:
+            registrations.delete_item(Key={'event_id': event_id, 'user_id': user_id})
+        table.delete_item(Key={'id': user_id})
+
+def test_backfill_retries_after_concurrent_change():
+    user_id = str(uuid.uuid4())
+    table.put_item(Item={
+        'id': user_id, 'firstName': 'Old', 'lastName': 'User', 'email': 'old@example.com',
+        'events_attended': ['e1']
+    })
+    stale = table.get_item(Key={'id': user_id})['Item']
+    try:
+        # a registration lands between the scan and the backfill
+        registrations.put_item(Item={'event_id': 'e2', 'user_id': user_id})
+        table.update_item(
+            Key={'id': user_id},
+            UpdateExpression='ADD events_attended_count :one, version :one',
+            ExpressionAttributeValues={':one': 1}
+        )
+        assert backfill_user(db, stale)
+        assert table.get_item(Key={'id': user_id})['Item']['events_attended_count'] == 2
+    finally:
+        registrations.delete_item(Key={'event_id': 'e2', 'user_id': user_id})
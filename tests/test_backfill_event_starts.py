@@ -0,0 +1,27 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import uuid
+from app.database import get_dynamodb_resource
+from app.backfill_event_starts import backfill_event
+from app.service import normalize_start
+
+table = get_dynamodb_resource().Table('events')
+
+def test_normalize_start():
+    assert normalize_start('2025-01-01T10:00:00+07:00') == '2025-01-01T03:00:00Z'
+    assert normalize_start('2025-01-01') == '2025-01-01T00:00:00Z'
+    assert normalize_start('next tuesday') is None
+
+def test_backfill_sets_start_keys():
+    event_id = str(uuid.uuid4())
+    table.put_item(Item={
+        'id': event_id, 'slug': event_id, 'title': 'Old', 'description': None, 'venue': None,
+        'startAt': '2030-06-30T23:30:00-02:00', 'endAt': '2030-07-01', 'maxCapacity': 5, 'owner': 'owner', 'hosts': []
+    })
+    assert backfill_event(table, table.get_item(Key={'id': event_id})['Item'])
+    item = table.get_item(Key={'id': event_id})['Item']
+    assert (item['start_bucket'], item['start_key']) == ('2030-07', f'2030-07-01T01:30:00Z#{event_id}')
+    assert item['version'] == 1
+    assert not backfill_event(table, item)
@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from app import batching
+from app.batching import BatchWriter, BatchWriteError, batch_write
+
+class FakeDb:
+    """
+    Records BatchWriteItem calls; leaves the last item of each call unprocessed
+    `throttle` times.
+    """
+    def __init__(self, throttle=0):
+        self.calls = []
+        self.written = []
+        self.throttle = throttle
+
+    def batch_write_item(self, RequestItems):
+        (table, requests), = RequestItems.items()
+        self.calls.append(len(requests))
+        if self.throttle:
+            self.throttle -= 1
+            self.written.extend(r['PutRequest']['Item'] for r in requests[:-1])
+            return {'UnprocessedItems': {table: requests[-1:]}}
+        self.written.extend(r['PutRequest']['Item'] for r in requests)
+        return {'UnprocessedItems': {}}
+
+def test_batch_write_chunks_by_25():
+    db = FakeDb()
+    assert batch_write(db, 'email_logs', [{'id': str(i)} for i in range(60)]) == 3
+    assert db.calls == [25, 25, 10]
+    assert len(db.written) == 60
+
+def test_batch_write_retries_unprocessed(monkeypatch):
+    monkeypatch.setattr(batching.time, 'sleep', lambda _: None)
+    db = FakeDb(throttle=2)
+    batch_write(db, 'email_logs', [{'id': str(i)} for i in range(5)])
+    assert db.calls == [5, 1, 1]
+    assert sorted(i['id'] for i in db.written) == [str(i) for i in range(5)]
+
+def test_batch_write_gives_up(monkeypatch):
+    monkeypatch.setattr(batching.time, 'sleep', lambda _: None)
+    with pytest.raises(BatchWriteError):
+        batch_write(FakeDb(throttle=100), 'email_logs', [{'id': '1'}], max_attempts=3)
+
+def test_batch_writer_flushes_remainder():
+    db = FakeDb()
+    with BatchWriter(db, 'email_logs') as writer:
+        for i in range(30):
+            writer.add({'id': str(i)})
+        assert db.calls == [25]
+    assert db.calls == [25, 5]
+    assert writer.calls == 2
+
+def test_parallel_map_nested_in_pool_tasks_runs_inline():
+    # Every worker busy with a task that maps again: must not wait on the pool
+    outer = range(batching.BATCH_CONCURRENCY * 2)
+    results = batching.parallel_map(lambda n: sum(batching.parallel_map(lambda k: n * k, [1, 2, 3])), list(outer))
+    assert results == [n * 6 for n in outer]
@@ -0,0 +1,26 @@
+from app import main
+from benchmarks import bench_suite
+
+
+def test_every_route_has_a_scenario():
+    assert bench_suite.uncovered_routes(main.app) == []
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+    assert bench_suite.percentile(values, 50) == 50.0
+    assert bench_suite.percentile(values, 99) == 99.0
+    assert bench_suite.percentile([7.0], 95) == 7.0
+
+
+def _report(rps, p95, calls):
+    scenario = {'throughput_rps': rps, 'p95_ms': p95, 'p99_ms': p95, 'dynamodb_calls_per_request': calls}
+    return {'meta': {}, 'scenarios': {'get_user': scenario}}
+
+
+def test_compare_flags_slower_or_chattier_scenarios():
+    base = _report(100.0, 10.0, 1.0)
+    assert bench_suite.compare(base, _report(95.0, 10.5, 1.0), threshold=10) == []
+    assert bench_suite.compare(base, _report(80.0, 10.0, 1.0), threshold=10) == ['get_user']
+    assert bench_suite.compare(base, _report(100.0, 12.0, 1.0), threshold=10) == ['get_user']
+    assert bench_suite.compare(base, _report(100.0, 10.0, 2.0), threshold=10) == ['get_user']
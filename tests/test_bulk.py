@@ -0,0 +1,67 @@
+import asyncio
+import csv
+import io
+import json
+import uuid
+from fastapi.testclient import TestClient
+from app.main import app
+from app.bulk import iter_records
+
+client = TestClient(app)
+
+def _records(chunks, format):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [record async for record in iter_records(stream(), format)]
+
+    return asyncio.run(collect())
+
+def test_iter_records_csv_across_chunks():
+    body = 'firstName,lastName,email,hosts\r\n"Ann, Jr",Lee,ann@example.com,u1;u2\r\n"Multi\nline",Ng,,\r\n'.encode()
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    assert _records(chunks, 'csv') == [
+        {'firstName': 'Ann, Jr', 'lastName': 'Lee', 'email': 'ann@example.com', 'hosts': ['u1', 'u2']},
+        {'firstName': 'Multi\nline', 'lastName': 'Ng'},
+    ]
+
+def test_iter_records_ndjson_reports_bad_lines():
+    records = _records([b'{"a": 1}\n\nnot json\n{"b"', b': "\xc3', b'\xa9"}'], 'ndjson')
+    assert records[0] == {'a': 1}
+    assert isinstance(records[1], ValueError)
+    assert records[2] == {'b': 'é'}
+
+def test_bulk_import_users_ndjson_and_batch_get():
+    company = f"Bulk-{uuid.uuid4()}"
+    rows = [{"firstName": "Bulk", "lastName": str(i), "email": f"bulk{i}@example.com", "company": company} for i in range(60)]
+    rows.insert(10, {"firstName": "NoEmail"})
+    body = '\n'.join(json.dumps(row) for row in rows)
+    response = client.post("/users/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["created"], result["failed"]) == (60, 1)
+    assert result["errors"][0]["row"] == 11
+
+    users = client.get(f"/users?company={company}&limit=100").json()
+    assert len(users) == 60
+    ids = [users[0]["id"], "missing-id", users[1]["id"]]
+    batch = client.post("/users/batch-get", json={"ids": ids}).json()
+    assert [user["id"] for user in batch["items"]] == [ids[0], ids[2]]
+    assert batch["missing"] == ["missing-id"]
+
+def test_bulk_import_events_csv_updates_hosts_and_exports():
+    owner = client.post("/users", json={"firstName": "Own", "lastName": "Er", "email": "owner@example.com"}).json()
+    lines = ["slug,title,startAt,endAt,maxCapacity,owner,hosts"]
+    run = uuid.uuid4().hex[:8]
+    lines += [f"bulk-{run}-{i},Bulk {i},2025-01-01,2025-01-02,10,{owner['id']}," for i in range(3)]
+    response = client.post("/events/bulk?format=csv", content='\n'.join(lines))
+    assert response.json() == {"created": 3, "failed": 0, "errors": []}
+    hosted = client.get(f"/users/{owner['id']}").json()
+    assert hosted["events_hosted_count"] == 3
+
+    export = client.get("/events/export?format=csv")
+    assert export.headers["content-type"].startswith("text/csv")
+    exported = list(csv.DictReader(io.StringIO(export.text)))
+    assert set(hosted["events_hosted"]) <= {row["id"] for row in exported}
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.cache import ReadThroughCache
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction_and_copies():
+    cache = ReadThroughCache('t', maxsize=2, ttl=60)
+    cache.get('a', lambda key: {'id': key})
+    cache.get('b', lambda key: {'id': key})
+    cache.get('a', lambda key: {'id': 'reloaded'})['id'] = 'mutated'  # hit; callers get copies
+    cache.get('c', lambda key: {'id': key})  # evicts b, the least recently used
+    assert cache.get('a', lambda key: None) == {'id': 'a'}
+    assert cache.get('b', lambda key: {'id': 'b2'}) == {'id': 'b2'}
+    assert cache.stats()['evictions'] == 2
+
+def test_ttl_and_negative_caching():
+    clock = Clock()
+    cache = ReadThroughCache('t', ttl=10, negative_ttl=1, clock=clock)
+    calls = []
+    loader = lambda key: calls.append(key)  # always "not found"
+    assert cache.get('x', loader) is None
+    assert cache.get('x', loader) is None and calls == ['x']
+    clock.now = 2
+    cache.get('x', loader)
+    assert calls == ['x', 'x']
+    assert cache.stats()['expirations'] == 1
+
+def test_concurrent_misses_are_coalesced():
+    cache = ReadThroughCache('t', ttl=60)
+    calls = []
+    release = threading.Event()
+
+    def slow_loader(key):
+        calls.append(key)
+        release.wait(5)
+        return {'id': key}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get, 'hot', slow_loader) for _ in range(8)]
+        time.sleep(0.1)
+        release.set()
+        assert all(f.result() == {'id': 'hot'} for f in futures)
+    assert calls == ['hot']
+    assert cache.stats()['coalesced'] == 7
+
+def test_invalidation_during_load_is_not_cached():
+    cache = ReadThroughCache('t', ttl=60)
+
+    def loader(key):
+        cache.invalidate(key)  # a write lands while the stale read is in flight
+        return {'v': 'stale'}
+
+    assert cache.get('k', loader) == {'v': 'stale'}
+    assert cache.get('k', lambda key: {'v': 'fresh'}) == {'v': 'fresh'}
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import uuid
+from app import service
+from app.database import get_dynamodb_resource
+from app.schemas import EventCreate
+
+db = get_dynamodb_resource()
+users = db.Table('users')
+
+def _seed_users(count):
+    user_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with users.batch_writer() as writer:
+        for user_id in user_ids:
+            writer.put_item(Item={'id': user_id, 'firstName': 'Host', 'lastName': 'User', 'email': 'host@example.com'})
+    return user_ids
+
+def _event(owner, hosts):
+    return EventCreate(
+        slug=f'fan-out-{uuid.uuid4()}', title='Fan-out', startAt='2025-01-01T10:00:00Z', endAt='2025-01-01T12:00:00Z',
+        maxCapacity=10, owner=owner, hosts=hosts
+    )
+
+def test_owner_listed_as_host_is_counted_once():
+    owner, host = _seed_users(2)
+    event = service.create_event(db, _event(owner, [owner, host, host]))
+    for user_id in (owner, host):
+        item = users.get_item(Key={'id': user_id})['Item']
+        assert item['events_hosted'] == [event['id']]
+        assert item['events_hosted_count'] == 1
+
+def test_fan_out_beyond_one_transaction():
+    owner, *hosts = _seed_users(150)
+    event = service.create_event(db, _event(owner, hosts))
+    assert db.Table('events').get_item(Key={'id': event['id']})['Item']['hosts'] == hosts
+    for user_id in (owner, hosts[0], hosts[-1]):
+        assert users.get_item(Key={'id': user_id})['Item']['events_hosted_count'] == 1
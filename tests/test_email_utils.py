@@ -2,7 +2,10 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.email_utils import send_email
+import asyncio
+import socket
+import pytest
+from app.email_utils import send_email, SMTPPool, AsyncSMTPPool
 
 def test_send_email_real():
     """
@@ -17,3 +20,90 @@ def test_send_email_real():
 
     
 
+def _local_smtp_server():
+    """
+    Start an aiosmtpd sink on a free local port; returns (controller, handler).
+    """
+    aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+    class Sink:
+        def __init__(self):
+            self.recipients = []
+            self.sessions = 0
+
+        async def handle_EHLO(self, server, session, envelope, hostname, responses):
+            self.sessions += 1
+            session.host_name = hostname
+            return responses
+
+        async def handle_DATA(self, server, session, envelope):
+            self.recipients.extend(envelope.rcpt_tos)
+            return "250 OK"
+
+    sink = Sink()
+    controller = aiosmtpd_controller.Controller(sink, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    return controller, sink
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_pool_reuses_sessions_for_batch():
+    controller, sink = _local_smtp_server()
+    pool = SMTPPool("127.0.0.1", controller.port, sender="crm@example.com", size=2, starttls=False)
+    try:
+        recipients = [f"user{i}@example.com" for i in range(20)]
+        assert pool.send_batch(recipients, "Hello", "Body") == [True] * 20
+        assert sorted(sink.recipients) == sorted(recipients)
+        assert pool.sessions_opened <= 2
+    finally:
+        pool.close()
+        controller.stop()
+
+def test_pool_reconnects_after_server_restart():
+    controller, sink = _local_smtp_server()
+    port = controller.port
+    pool = SMTPPool("127.0.0.1", port, sender="crm@example.com", size=1, starttls=False)
+    try:
+        assert pool.send("a@example.com", "Hello", "Body")
+        controller.stop()
+        controller = type(controller)(sink, hostname="127.0.0.1", port=port)
+        controller.start()
+        assert pool.send("b@example.com", "Hello", "Body")
+        assert sink.recipients == ["a@example.com", "b@example.com"]
+        assert pool.sessions_opened == 2
+    finally:
+        pool.close()
+        controller.stop()
+
+def test_pool_closes_idle_sessions():
+    controller, sink = _local_smtp_server()
+    pool = SMTPPool("127.0.0.1", controller.port, sender="crm@example.com", size=1, starttls=False, idle_timeout=0)
+    try:
+        assert pool.send("a@example.com", "Hello", "Body")
+        pool.close_idle()
+        assert pool.send("b@example.com", "Hello", "Body")
+        assert pool.sessions_opened == 2
+    finally:
+        pool.close()
+        controller.stop()
+
+def test_async_pool_sends_batch_over_few_sessions():
+    pytest.importorskip("aiosmtplib")
+    controller, sink = _local_smtp_server()
+    pool = AsyncSMTPPool("127.0.0.1", controller.port, sender="crm@example.com", size=3, starttls=False)
+
+    async def run():
+        try:
+            return await pool.send_batch([f"async{i}@example.com" for i in range(30)], "Hello", "Body")
+        finally:
+            await pool.close()
+
+    try:
+        assert asyncio.run(run()) == [True] * 30
+        assert len(sink.recipients) == 30
+        assert pool.sessions_opened <= 3
+    finally:
+        controller.stop()
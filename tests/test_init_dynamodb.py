@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import init_dynamodb
+
+
+class FakeClient:
+    """
+    DescribeTable responses for an index that backfills for two polls.
+    """
+    def __init__(self):
+        self.statuses = [('ACTIVE', 'CREATING'), ('UPDATING', 'CREATING'), ('ACTIVE', 'ACTIVE')]
+        self.calls = 0
+
+    def describe_table(self, TableName):
+        table_status, index_status = self.statuses[min(self.calls, len(self.statuses) - 1)]
+        self.calls += 1
+        return {'Table': {'TableStatus': table_status, 'GlobalSecondaryIndexes': [
+            {'IndexName': 'company-index', 'IndexStatus': 'ACTIVE'},
+            {'IndexName': 'city-index', 'IndexStatus': index_status},
+        ]}}
+
+
+def test_wait_for_index_polls_until_index_and_table_are_active():
+    client = FakeClient()
+    init_dynamodb.wait_for_index(client, 'users', 'city-index', poll_seconds=0)
+    assert client.calls == 3
+
+
+class FakeTTLClient:
+    """
+    DescribeTimeToLive / UpdateTimeToLive of a table, recording updates.
+    """
+    def __init__(self, status, attribute_name=None):
+        self.description = {'TimeToLiveStatus': status}
+        if attribute_name:
+            self.description['AttributeName'] = attribute_name
+        self.updates = []
+
+    def describe_time_to_live(self, TableName):
+        return {'TimeToLiveDescription': dict(self.description)}
+
+    def update_time_to_live(self, TableName, TimeToLiveSpecification):
+        self.updates.append((TableName, TimeToLiveSpecification))
+
+
+def test_ensure_ttl_enables_ttl_on_an_existing_table_once():
+    client = FakeTTLClient('DISABLED')
+    assert init_dynamodb.ensure_ttl(client, 'email_log_entries', 'expires_at')
+    assert client.updates == [('email_log_entries', {'Enabled': True, 'AttributeName': 'expires_at'})]
+    for status in ('ENABLED', 'ENABLING'):
+        client = FakeTTLClient(status, 'expires_at')
+        assert not init_dynamodb.ensure_ttl(client, 'email_log_entries', 'expires_at')
+        assert client.updates == []
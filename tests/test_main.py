@@ -1,9 +1,24 @@
+import json
+import time
+import uuid
 import pytest
+from boto3.dynamodb.conditions import ConditionExpressionBuilder
 from fastapi.testclient import TestClient
 from app.main import app
+from app import batching, jobs, query_planner, service
+from app.database import get_dynamodb_resource
+from app.pagination import encode_cursor
+from app.schemas import UserFilter
 
 client = TestClient(app)
 
+# Company of the users shared by the counter, keyset and email job tests
+COUNT_CO = f"CountCo-{uuid.uuid4().hex[:8]}"
+
+def _slug(name):
+    # Slugs are unique across the events table, which outlives a test run
+    return f"{name}-{uuid.uuid4().hex[:8]}"
+
 def test_get_all_users():
     response = client.get("/users/all")
     assert response.status_code == 200
@@ -24,9 +39,329 @@ def test_filter_users():
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+def test_filter_users_uses_company_index():
+    company = f"IndexCo-{uuid.uuid4().hex[:8]}"
+    client.post("/users", json={"firstName": "Idx", "lastName": "A", "email": "idx.a@example.com", "company": company, "city": "Hanoi"})
+    client.post("/users", json={"firstName": "Idx", "lastName": "B", "email": "idx.b@example.com", "company": company, "city": "Hue"})
+    response = client.get("/users", params={"company": company, "city": "Hue", "explain": "true"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [u["lastName"] for u in body["users"]] == ["B"]
+    assert body["explain"]["index"] == "company-index"
+    assert body["explain"]["filters"] == ["city"]
+    assert body["explain"]["items_read"] == 2
+    assert "index=company-index" in response.headers["X-Query-Plan"]
+
+def test_get_all_users_cursor_pagination():
+    for i in range(3):
+        client.post("/users", json={"firstName": "Page", "lastName": str(i), "email": f"page{i}@example.com"})
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/users/all", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(u["id"] for u in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    all_ids = [u["id"] for u in client.get("/users/all").json()]
+    assert sorted(seen) == sorted(all_ids)
+
+def test_counters_maintained_and_filterable():
+    host = client.post("/users", json={"firstName": "Count", "lastName": "Host", "email": "count.host@example.com", "company": COUNT_CO}).json()
+    guest = client.post("/users", json={"firstName": "Count", "lastName": "Guest", "email": "count.guest@example.com", "company": COUNT_CO}).json()
+    event = client.post("/events", json={
+        "slug": _slug("counter-event"), "title": "Counter Event",
+        "startAt": "2023-10-01T10:00:00Z", "endAt": "2023-10-01T12:00:00Z",
+        "maxCapacity": 10, "owner": host["id"]
+    }).json()
+    client.post(f"/users/{guest['id']}/events/{event['id']}/register")
+    assert client.get(f"/users/{host['id']}").json()["events_hosted_count"] == 1
+    assert client.get(f"/users/{guest['id']}").json()["events_attended_count"] == 1
+    hosts = client.get("/users", params={"company": COUNT_CO, "events_hosted_min": 1}).json()
+    assert [u["id"] for u in hosts] == [host["id"]]
+    non_hosts = client.get("/users", params={"company": COUNT_CO, "events_hosted_max": 0}).json()
+    assert [u["id"] for u in non_hosts] == [guest["id"]]
+
+def test_negative_count_bounds_never_match_missing_counters():
+    def expression(value):
+        condition = query_planner.plan_user_filter({}, {('events_hosted', 'max'): value})['_condition']
+        return ConditionExpressionBuilder().build_expression(condition).condition_expression
+    # A missing counter means 0, which satisfies a max of 0 but not of -1
+    assert "attribute_not_exists" in expression(0)
+    assert "attribute_not_exists" not in expression(-1)
+    assert client.get("/users", params={"events_hosted_max": -1}).status_code == 422
+    assert client.get("/users", params={"events_attended_min": -1}).status_code == 422
+
+def test_user_engagement_analytics():
+    host = client.post("/users", json={"firstName": "Stats", "lastName": "Host", "email": "stats.host@example.com", "company": "StatsCo"}).json()
+    before = client.get("/analytics/user-engagement", params={"refresh": True}).json()
+    client.post("/events", json={
+        "slug": _slug("stats-event"), "title": "Stats Event",
+        "startAt": "2023-10-01T10:00:00Z", "endAt": "2023-10-01T12:00:00Z",
+        "maxCapacity": 10, "owner": host["id"]
+    })
+    time.sleep(1.1)  # past ANALYTICS_RECOMPUTE_SECONDS; the write was applied without a rescan
+    after = client.get("/analytics/user-engagement").json()
+    assert after["refreshed_at"] == before["refreshed_at"]
+    assert after["totals"]["events_hosted"] == before["totals"]["events_hosted"] + 1
+    stats_co = next(row for row in after["rollups"]["company"]["rows"] if row["value"] == "StatsCo")
+    assert stats_co["events_hosted"] >= 1
+    page = client.get("/analytics/user-engagement/users", params={"limit": 2}).json()
+    assert len(page["items"]) == 2 and page["next_cursor"]
+    assert set(page["items"][0]) == {"user_id", "firstName", "lastName", "events_hosted", "events_attended"}
+
+def test_registration_is_idempotent_and_queryable():
+    owner = client.post("/users", json={"firstName": "Reg", "lastName": "Owner", "email": "reg.owner@example.com"}).json()
+    guests = [client.post("/users", json={"firstName": "Reg", "lastName": str(i), "email": f"reg{i}@example.com"}).json() for i in range(3)]
+    event = client.post("/events", json={
+        "slug": _slug("registration-event"), "title": "Registration Event",
+        "startAt": "2023-10-01T10:00:00Z", "endAt": "2023-10-01T12:00:00Z",
+        "maxCapacity": 10, "owner": owner["id"]
+    }).json()
+    for guest in guests:
+        assert client.post(f"/users/{guest['id']}/events/{event['id']}/register").json()["status"] == "registered"
+    again = client.post(f"/users/{guests[0]['id']}/events/{event['id']}/register").json()
+    assert again["status"] == "already_registered"
+    assert client.get(f"/users/{guests[0]['id']}").json()["events_attended_count"] == 1
+
+    seen, cursor = [], None
+    while True:
+        page = client.get(f"/events/{event['id']}/attendees", params={"limit": 2, "cursor": cursor}).json()
+        seen += [r["user_id"] for r in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(g["id"] for g in guests)
+    events = client.get(f"/users/{guests[1]['id']}/events").json()
+    assert [r["event_id"] for r in events["items"]] == [event["id"]]
+
+def test_registration_enforces_capacity():
+    owner = client.post("/users", json={"firstName": "Cap", "lastName": "Owner", "email": "cap.owner@example.com"}).json()
+    guests = [client.post("/users", json={"firstName": "Cap", "lastName": str(i), "email": f"cap{i}@example.com"}).json() for i in range(2)]
+    event = client.post("/events", json={
+        "slug": _slug("capacity-event"), "title": "Capacity Event",
+        "startAt": "2023-10-01T10:00:00Z", "endAt": "2023-10-01T12:00:00Z",
+        "maxCapacity": 1, "owner": owner["id"]
+    }).json()
+    assert client.post(f"/users/{guests[0]['id']}/events/{event['id']}/register").status_code == 200
+    assert client.post(f"/users/{guests[1]['id']}/events/{event['id']}/register").status_code == 409
+    assert client.post(f"/users/missing/events/{event['id']}/register").status_code == 404
+    assert client.get(f"/events/{event['id']}/capacity").json()["remaining"] == 0
+
+def test_cached_reads_are_invalidated_by_writes():
+    user = client.post("/users", json={"firstName": "Cache", "lastName": "Me", "email": "cache@example.com"}).json()
+    before = client.get("/cache/stats").json()["users"]
+    assert client.get(f"/users/{user['id']}").json()["lastName"] == "Me"
+    assert client.get(f"/users/{user['id']}").json()["lastName"] == "Me"
+    after = client.get("/cache/stats").json()["users"]
+    assert after["hits"] - before["hits"] == 1
+    client.put(f"/users/{user['id']}", json={"firstName": "Cache", "lastName": "Updated", "email": "cache@example.com"})
+    assert client.get(f"/users/{user['id']}").json()["lastName"] == "Updated"
+
+def test_etag_conditional_get_and_put():
+    user = client.post("/users", json={"firstName": "Etag", "lastName": "One", "email": "etag@example.com"}).json()
+    response = client.get(f"/users/{user['id']}")
+    etag = response.headers["ETag"]
+    assert etag == '"1"'
+    assert client.get(f"/users/{user['id']}", headers={"If-None-Match": etag}).status_code == 304
+    body = {"firstName": "Etag", "lastName": "Two", "email": "etag@example.com"}
+    updated = client.put(f"/users/{user['id']}", json=body, headers={"If-Match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] == '"2"'
+    assert client.put(f"/users/{user['id']}", json=body, headers={"If-Match": etag}).status_code == 412
+    assert client.get(f"/users/{user['id']}", headers={"If-None-Match": etag}).status_code == 200
+    assert client.delete(f"/users/{user['id']}", headers={"If-Match": etag}).status_code == 412
+
+def test_get_user_written_before_versioning():
+    user_id = f"legacy-{uuid.uuid4().hex}"
+    users = get_dynamodb_resource().Table("users")
+    users.put_item(Item={"id": user_id, "firstName": "Legacy", "lastName": "User", "email": "legacy@example.com"})
+    try:
+        response = client.get(f"/users/{user_id}")
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"0"' and response.json()["version"] == 0
+    finally:
+        users.delete_item(Key={"id": user_id})
+
+def test_event_search_and_unique_slugs():
+    run = uuid.uuid4().hex[:8]
+    meetup, summit, other_slug = (f"search-{name}-{run}" for name in ("kotlin-meetup", "kotlin-2024", "other"))
+    owner = client.post("/users", json={"firstName": "Search", "lastName": "Owner", "email": "search@example.com"}).json()
+    body = {"slug": meetup, "title": f"Kotlin Meetup Saigon {run}", "venue": "Hồ Chí Minh",
+            "startAt": "2024-03-01T10:00:00Z", "endAt": "2024-03-01T12:00:00Z", "maxCapacity": 5, "owner": owner["id"]}
+    event = client.post("/events", json=body).json()
+    created = [event["id"]]
+    try:
+        assert client.post("/events", json=body).status_code == 409
+
+        hits = client.get("/events/search", params={"q": f"{run} saigon kotl"}).json()
+        assert hits[0]["id"] == event["id"] and hits[0]["score"] > 0
+        assert client.get("/events/search", params={"q": f"ho chi minh kotlin {run}"}).json()[0]["id"] == event["id"]
+        assert client.get(f"/events/by-slug/{meetup}").json()["id"] == event["id"]
+        assert client.get("/events/by-slug/no-such-slug").status_code == 404
+
+        other = client.post("/events", json={**body, "slug": other_slug, "title": "Other"}).json()
+        created.append(other["id"])
+        assert client.patch(f"/events/{other['id']}", json={"slug": meetup}).status_code == 409
+        renamed = client.put(f"/events/{event['id']}", json={**body, "slug": summit, "title": f"Kotlin Summit {run}"})
+        assert renamed.status_code == 200
+        assert client.get(f"/events/by-slug/{summit}").json()["title"] == f"Kotlin Summit {run}"
+        assert client.get("/events/search", params={"q": f"summit {run}"}).json()[0]["id"] == event["id"]
+        assert client.patch(f"/events/{other['id']}", json={"slug": meetup}).status_code == 200
+        client.delete(f"/events/{event['id']}")
+        assert client.get("/events/search", params={"q": f"summit {run}"}).json() == []
+        again = client.post("/events", json={**body, "slug": summit})
+        assert again.status_code == 200
+        created.append(again.json()["id"])
+    finally:
+        # Deleting releases the slugs
+        for event_id in created:
+            client.delete(f"/events/{event_id}")
+
+def test_events_by_start_time_range():
+    owner = client.post("/users", json={"firstName": "Range", "lastName": "Owner", "email": "range@example.com"}).json()
+    starts = ["2031-03-10T09:00:00Z", "2031-01-31T23:00:00-05:00", "2031-02-01T00:00:00Z", "2031-05-01T00:00:00Z", "2031-02-15"]
+    ids = {}
+    for n, start in enumerate(starts):
+        ids[start] = client.post("/events", json={
+            "slug": f"range-{uuid.uuid4()}", "title": f"Range {n}", "startAt": start, "endAt": start,
+            "maxCapacity": 5, "owner": owner["id"]
+        }).json()["id"]
+    try:
+        client.patch(f"/events/{ids['2031-05-01T00:00:00Z']}", json={"startAt": "2031-03-31T12:00:00Z"})
+
+        seen, cursor = [], None
+        while True:
+            page = client.get("/events", params={"from": "2031-01-01", "to": "2031-03-31T23:59:59Z", "limit": 2, "cursor": cursor}).json()
+            seen += [event["id"] for event in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        order = ["2031-02-01T00:00:00Z", "2031-01-31T23:00:00-05:00", "2031-02-15", "2031-03-10T09:00:00Z", "2031-05-01T00:00:00Z"]
+        assert seen == [ids[start] for start in order]
+    finally:
+        # The range query sees every event in the range, including older runs'
+        for event_id in ids.values():
+            client.delete(f"/events/{event_id}")
+    assert client.get("/events", params={"from": "2031-03-01", "to": "2031-02-01"}).status_code == 400
+    assert client.get("/events", params={"from": "soon"}).status_code == 400
+
+def test_dynamodb_call_metrics():
+    before = client.get("/metrics/dynamodb").json()
+    client.post("/users", json={"firstName": "Metric", "lastName": "User", "email": "metric@example.com"})
+    after = client.get("/metrics/dynamodb").json()
+    assert after["total"] > before["total"]
+    assert after["operations"]["PutItem"] >= before["operations"].get("PutItem", 0) + 1
+
+def test_patch_updates_only_sent_fields():
+    user = client.post("/users", json={"firstName": "Patch", "lastName": "Me", "email": "patch@example.com", "city": "Hue"}).json()
+    event = client.post("/events", json={
+        "slug": _slug("patch-event"), "title": "Patch Event", "startAt": "2024-01-01T10:00:00Z",
+        "endAt": "2024-01-01T12:00:00Z", "maxCapacity": 5, "owner": user["id"]
+    }).json()
+    response = client.patch(f"/users/{user['id']}", json={"lastName": "Patched", "city": None})
+    assert response.status_code == 200
+    patched = response.json()
+    assert (patched["firstName"], patched["lastName"], patched["city"]) == ("Patch", "Patched", None)
+    assert patched["events_hosted"] == [event["id"]] and patched["events_hosted_count"] == 1
+    assert response.headers["ETag"] == '"3"'
+    assert client.patch(f"/users/{user['id']}", json={"email": None}).status_code == 400
+    assert client.patch("/users/missing-user", json={"lastName": "X"}).status_code == 404
+
+    batch = client.patch("/events/batch", json=[
+        {"id": event["id"], "changes": {"title": "Renamed"}, "if_match": 1},
+        {"id": event["id"], "changes": {"title": "Stale"}, "if_match": 1},
+        {"id": "missing-event", "changes": {"title": "Nope"}},
+    ]).json()
+    # The two edits of the same version race: exactly one of them wins
+    assert len(batch["items"]) == 1 and batch["items"][0]["title"] in ("Renamed", "Stale")
+    assert sorted(failure["status"] for failure in batch["failed"]) == [404, 412]
+    assert client.get(f"/events/{event['id']}").json()["maxCapacity"] == 5
+
+def test_empty_patch_sends_no_attribute_names():
+    # DynamoDB (unlike moto) rejects an empty ExpressionAttributeNames map
+    assert "ExpressionAttributeNames" not in service.patch_update({"id": "any"}, {})
+    user = client.post("/users", json={"firstName": "Empty", "lastName": "Patch", "email": "empty.patch@example.com"}).json()
+    response = client.patch(f"/users/{user['id']}", json={})
+    assert response.status_code == 200
+    assert response.json()["lastName"] == "Patch" and response.headers["ETag"] == '"2"'
+
+def test_batch_patch_adding_hosts_does_not_exhaust_the_batch_pool():
+    # Each patch fans out host updates; with >= BATCH_CONCURRENCY patches every
+    # pool worker used to wait on host updates queued behind it
+    run = uuid.uuid4().hex[:8]
+    owner = client.post("/users", json={"firstName": "Pool", "lastName": "Owner", "email": f"pool.{run}@example.com"}).json()["id"]
+    patches = []
+    for n in range(batching.BATCH_CONCURRENCY + 2):
+        event_id = client.post("/events", json={
+            "slug": f"pool-{run}-{n}", "title": "Pool", "startAt": "2024-03-01T10:00:00Z",
+            "endAt": "2024-03-01T12:00:00Z", "maxCapacity": 5, "owner": owner
+        }).json()["id"]
+        hosts = [client.post("/users", json={"firstName": "Pool", "lastName": f"Host {n}.{k}", "email": f"pool{n}.{k}.{run}@example.com"}).json()["id"]
+                 for k in range(2)]
+        patches.append({"id": event_id, "changes": {"hosts": hosts}})
+    batch = client.patch("/events/batch", json=patches).json()
+    assert len(batch["items"]) == len(patches) and batch["failed"] == []
+    for patch in patches:
+        for host_id in patch["changes"]["hosts"]:
+            assert client.get(f"/users/{host_id}").json()["events_hosted"] == [patch["id"]]
+
+def test_expand_event_attendees_and_hosts():
+    host = client.post("/users", json={"firstName": "Expand", "lastName": "Host", "email": "host@example.com"}).json()
+    guest = client.post("/users", json={"firstName": "Expand", "lastName": "Guest", "email": "guest@example.com"}).json()
+    event = client.post("/events", json={
+        "slug": _slug("expand-event"), "title": "Expand Event", "startAt": "2024-02-01T10:00:00Z",
+        "endAt": "2024-02-01T12:00:00Z", "maxCapacity": 5, "owner": host["id"], "hosts": [host["id"]]
+    }).json()
+    client.post(f"/users/{guest['id']}/events/{event['id']}/register")
+    expanded = client.get(f"/events/{event['id']}", params={"expand": "attendees,hosts"}).json()
+    assert expanded["attendees"] == [guest["id"]]
+    assert [user["lastName"] for user in expanded["attendee_users"]] == ["Guest"]
+    assert [user["id"] for user in expanded["host_users"]] == [host["id"]]
+    assert "attendee_users" not in client.get(f"/events/{event['id']}").json()
+    page = client.get("/events", params={"limit": 1000, "expand": "hosts"}).json()
+    listed = next(item for item in page["items"] if item["id"] == event["id"])
+    assert listed["host_users"][0]["email"] == "host@example.com" and listed["attendee_users"] == []
+    assert client.get("/events", params={"expand": "owner"}).status_code == 400
+
+def test_expand_attendees_is_capped_per_event(monkeypatch):
+    monkeypatch.setattr(service, "EXPAND_ATTENDEES_LIMIT", 2)
+    run = uuid.uuid4().hex[:8]
+    guests = [client.post("/users", json={"firstName": "Capped", "lastName": f"Guest {n}", "email": f"capped{n}.{run}@example.com"}).json()["id"]
+              for n in range(3)]
+    event = client.post("/events", json={
+        "slug": _slug("capped-expand"), "title": "Capped Expand", "startAt": "2024-02-02T10:00:00Z",
+        "endAt": "2024-02-02T12:00:00Z", "maxCapacity": 5, "owner": guests[0]
+    }).json()
+    for guest_id in guests:
+        client.post(f"/users/{guest_id}/events/{event['id']}/register")
+    expanded = client.get(f"/events/{event['id']}", params={"expand": "attendees"}).json()
+    assert len(expanded["attendees"]) == 2 and set(expanded["attendees"]) < set(guests)
+    assert [user["id"] for user in expanded["attendee_users"]] == expanded["attendees"]
+    assert expanded["attendees_truncated"] is True
+    monkeypatch.setattr(service, "EXPAND_ATTENDEES_LIMIT", 3)
+    expanded = client.get(f"/events/{event['id']}", params={"expand": "attendees"}).json()
+    assert sorted(expanded["attendees"]) == sorted(guests) and expanded["attendees_truncated"] is False
+
+def test_filter_users_keyset_pagination():
+    first = client.get("/users", params={"company": COUNT_CO, "sort_by": "-events_hosted", "limit": 1})
+    assert first.status_code == 200
+    assert first.json()[0]["lastName"] == "Host"
+    second = client.get("/users", params={
+        "company": COUNT_CO, "sort_by": "-events_hosted", "limit": 1, "after": first.headers["X-Next-Cursor"]
+    })
+    assert second.json()[0]["lastName"] == "Guest"
+    assert "X-Next-Cursor" not in second.headers
+
 def test_create_event():
     data = {
-        "slug": "unit-test-event",
+        "slug": _slug("unit-test-event"),
         "title": "Unit Test Event",
         "startAt": "2023-10-01T10:00:00Z",
         "endAt": "2023-10-01T12:00:00Z",
@@ -36,6 +371,9 @@ def test_create_event():
     response = client.post("/events", json=data)
     assert response.status_code == 200
     assert response.json()["title"] == data["title"]
+    assert client.delete(f"/events/{response.json()['id']}").status_code == 200
+    # Hosting gave the unknown owner a placeholder user without a name or email
+    get_dynamodb_resource().Table("users").delete_item(Key={"id": data["owner"]})
 
 def test_list_events():
     response = client.get("/events")
@@ -44,3 +382,174 @@ def test_list_events():
 
     
 
+def test_invalid_cursor():
+    response = client.get("/events", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_stream_events_ndjson():
+    response = client.get("/events", params={"stream": "true"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == len(client.get("/events").json())
+
+def _wait_for_job(job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/send-emails/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_send_emails_runs_as_background_job():
+    response = client.post("/send-emails", json={
+        "company": COUNT_CO, "job_title": None, "city": None, "state": None, "sort_by": None
+    })
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+    job = _wait_for_job(job["id"])
+    assert job["status"] == "completed"
+    assert job["total"] == 2
+    assert job["sent"] + job["failed"] == job["processed"] == 2
+
+def test_send_emails_job_not_found():
+    assert client.get("/send-emails/does-not-exist").status_code == 404
+
+def test_email_logs_query_by_campaign_user_status_and_time():
+    started = int(time.time())
+    job = client.post("/send-emails", json={
+        "company": COUNT_CO, "job_title": None, "city": None, "state": None, "sort_by": None
+    }).json()
+    _wait_for_job(job["id"])
+    by_job = client.get("/email-logs", params={"job_id": job["id"], "limit": 1})
+    assert by_job.status_code == 200
+    first = by_job.json()
+    assert len(first["items"]) == 1 and first["next_cursor"]
+    second = client.get("/email-logs", params={"job_id": job["id"], "limit": 1, "cursor": first["next_cursor"]}).json()
+    logs = first["items"] + second["items"]
+    assert {log["job_id"] for log in logs} == {job["id"]}
+    assert all(log["expires_at"] > started for log in logs)
+    user_id, status = logs[0]["user_id"], logs[0]["status"]
+    by_user = client.get("/email-logs", params={"user_id": user_id, "status": status, "since": started}).json()["items"]
+    assert job["id"] in {log.get("job_id") for log in by_user}
+    other = "failed" if status == "sent" else "sent"
+    assert job["id"] not in {log.get("job_id") for log in client.get(
+        "/email-logs", params={"user_id": user_id, "status": other, "since": started}).json()["items"]}
+    by_day, cursor = [], None
+    while True:
+        page = client.get("/email-logs", params={"since": started, "limit": 1, **({"cursor": cursor} if cursor else {})}).json()
+        by_day += page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert {log["ts"] for log in logs} <= {log["ts"] for log in by_day}
+    stale = encode_cursor({"day": "1999-01-01"})
+    assert client.get("/email-logs", params={"since": started, "cursor": stale}).status_code == 400
+
+def test_interrupted_job_is_resumed():
+    job_id = str(uuid.uuid4())
+    get_dynamodb_resource().Table("email_jobs").put_item(Item={
+        "id": job_id, "status": "running", "total": 0, "processed": 0, "sent": 0, "failed": 0,
+        "filter": {"company": "NobodyWorksHere", "job_title": None, "city": None, "state": None, "sort_by": None},
+        "created_at": 0, "lease_owner": "crashed-worker", "lease_expires_at": 0,
+    })
+    jobs.get_job_manager().resume()
+    job = _wait_for_job(job_id)
+    assert job["status"] == "completed"
+    assert job["total"] == 0
+
+def test_resumed_job_skips_logged_recipients_with_parallel_senders(monkeypatch):
+    company = f"ResumeCo-{uuid.uuid4().hex[:8]}"
+    users = [client.post("/users", json={
+        "firstName": "Resume", "lastName": f"User {n}", "email": f"resume{n}.{company}@example.com", "company": company
+    }).json() for n in range(6)]
+    job_id = str(uuid.uuid4())
+    db = get_dynamodb_resource()
+    # Parallel senders finished users 1 and 3 (not a prefix) before the crash
+    for user in (users[1], users[3]):
+        db.Table(service.EMAIL_LOGS_TABLE).put_item(Item=service.email_log_item(user, "sent", job_id=job_id))
+    db.Table("email_jobs").put_item(Item={
+        "id": job_id, "status": "running", "total": 6, "processed": 2, "sent": 2, "failed": 0,
+        "filter": {"company": company, "job_title": None, "city": None, "state": None, "sort_by": None},
+        "created_at": 0, "started_at": 0, "lease_owner": "crashed-worker", "lease_expires_at": 0,
+    })
+
+    class RecordingPool:
+        sent = []
+
+        def send(self, to_email, subject, body):
+            self.sent.append(to_email)
+            return True
+
+    monkeypatch.setattr(jobs, "get_smtp_pool", RecordingPool)
+    manager = jobs.EmailJobManager(workers=1, send_concurrency=4, rate_limit=0)
+    manager.resume()
+    deadline = time.time() + 10
+    while (job := manager.get(job_id))["status"] not in ("completed", "failed") and time.time() < deadline:
+        time.sleep(0.05)
+    assert job["status"] == "completed"
+    assert sorted(RecordingPool.sent) == sorted(user["email"] for n, user in enumerate(users) if n not in (1, 3))
+    assert (job["total"], job["processed"], job["sent"]) == (6, 6, 6)
+
+def test_slow_sends_keep_the_job_lease(monkeypatch):
+    company = f"LeaseCo-{uuid.uuid4().hex[:8]}"
+    users = [client.post("/users", json={
+        "firstName": "Lease", "lastName": f"User {n}", "email": f"lease{n}.{company}@example.com", "company": company
+    }).json() for n in range(2)]
+    monkeypatch.setattr(jobs, "EMAIL_JOB_LEASE_SECONDS", 1)
+
+    class SlowPool:
+        sent = []
+
+        def send(self, to_email, subject, body):
+            time.sleep(1.5)  # longer than the lease
+            self.sent.append(to_email)
+            return True
+
+    monkeypatch.setattr(jobs, "get_smtp_pool", SlowPool)
+    manager = jobs.EmailJobManager(workers=1, send_concurrency=1, rate_limit=0)
+    job_id = manager.submit(UserFilter(company=company, job_title=None, city=None, state=None, sort_by=None))["id"]
+    time.sleep(2)
+    other = jobs.EmailJobManager(workers=1, send_concurrency=1, rate_limit=0)
+    other.resume()
+    assert job_id not in other._live
+    deadline = time.time() + 10
+    while (job := manager.get(job_id))["status"] not in ("completed", "failed") and time.time() < deadline:
+        time.sleep(0.05)
+    assert job["status"] == "completed"
+    assert sorted(SlowPool.sent) == sorted(user["email"] for user in users)
+
+def test_job_taken_over_stops_sending(monkeypatch):
+    company = f"TakeoverCo-{uuid.uuid4().hex[:8]}"
+    for n in range(3):
+        client.post("/users", json={
+            "firstName": "Takeover", "lastName": f"User {n}", "email": f"takeover{n}.{company}@example.com", "company": company
+        })
+    monkeypatch.setattr(jobs, "EMAIL_JOB_LEASE_SECONDS", 1)
+    table = get_dynamodb_resource().Table("email_jobs")
+
+    class StolenPool:
+        sent = []
+
+        def send(self, to_email, subject, body):
+            self.sent.append(to_email)
+            # another worker claims the job while the first email is sent
+            table.update_item(Key={"id": job_id}, UpdateExpression="SET lease_owner = :o",
+                              ExpressionAttributeValues={":o": "other-worker"})
+            time.sleep(1)
+            return True
+
+    monkeypatch.setattr(jobs, "get_smtp_pool", StolenPool)
+    manager = jobs.EmailJobManager(workers=1, send_concurrency=1, rate_limit=0)
+    job_id = str(uuid.uuid4())
+    table.put_item(Item={
+        "id": job_id, "status": "queued", "total": 0, "processed": 0, "sent": 0, "failed": 0,
+        "filter": {"company": company, "job_title": None, "city": None, "state": None, "sort_by": None},
+        "created_at": 0, "lease_owner": manager.worker_id, "lease_expires_at": 0,
+    })
+    manager._run(table.get_item(Key={"id": job_id})["Item"])
+    assert len(StolenPool.sent) == 1
+    # the new owner's state is left alone
+    assert table.get_item(Key={"id": job_id})["Item"]["status"] == "running"
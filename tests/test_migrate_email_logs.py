@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import uuid
+from app.database import get_dynamodb_resource
+from app.migrate_email_logs import migrate_email_logs
+from app.service import EMAIL_LOG_TTL_DAYS, query_email_logs
+
+db = get_dynamodb_resource()
+
+def test_migrate_copies_unexpired_logs_into_the_queryable_table():
+    user_id = str(uuid.uuid4())
+    now = int(time.time())
+    expired = now - (EMAIL_LOG_TTL_DAYS + 1) * 86400
+    for log_id, timestamp in (('recent-' + user_id, now - 60), ('expired-' + user_id, expired)):
+        db.Table('email_logs').put_item(Item={
+            'id': log_id, 'user_id': user_id, 'email': 'legacy@example.com', 'status': 'sent', 'timestamp': timestamp
+        })
+
+    assert migrate_email_logs(db) >= 1
+    logs = query_email_logs(db, 10, user_id=user_id)['items']
+    assert [log['id'] for log in logs] == ['recent-' + user_id]
+    assert logs[0]['day'] == time.strftime('%Y-%m-%d', time.gmtime(now - 60))
+    assert logs[0]['expires_at'] == now - 60 + EMAIL_LOG_TTL_DAYS * 86400
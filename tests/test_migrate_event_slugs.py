@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import uuid
+from app.database import get_dynamodb_resource
+from app.migrate_event_slugs import migrate_event_slugs
+from app.service import EVENT_SLUGS_TABLE
+
+db = get_dynamodb_resource()
+
+def test_migrate_claims_existing_slugs_and_reports_duplicates():
+    slug = f'legacy-{uuid.uuid4()}'
+    ids = [str(uuid.uuid4()) for _ in range(2)]
+    for event_id in ids:
+        db.Table('events').put_item(Item={
+            'id': event_id, 'slug': slug, 'title': 'Legacy', 'description': None, 'venue': None,
+            'startAt': '2020-01-01', 'endAt': '2020-01-02', 'maxCapacity': 5, 'owner': 'owner', 'hosts': []
+        })
+
+    result = migrate_event_slugs(db)
+    duplicates = [duplicate for duplicate in result['duplicates'] if duplicate['slug'] == slug]
+    assert len(duplicates) == 1
+    owner = db.Table(EVENT_SLUGS_TABLE).get_item(Key={'slug': slug})['Item']['event_id']
+    assert {owner, duplicates[0]['id']} == set(ids)
+    assert migrate_event_slugs(db)['claimed'] == 0
@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import uuid
+
+import pytest
+from app import service
+from app.database import get_dynamodb_resource
+from app.migrate_registrations import migrate_registrations
+from app.schemas import EventCreate
+
+db = get_dynamodb_resource()
+
+def _event(owner, attendees):
+    event = service.new_event_item(EventCreate(
+        slug=f'legacy-{uuid.uuid4().hex}', title='Legacy', startAt='2024-01-01T10:00:00Z',
+        endAt='2024-01-01T12:00:00Z', maxCapacity=10, owner=owner
+    ))
+    event['attendees'] = attendees
+    return event
+
+@pytest.fixture
+def legacy_event():
+    """
+    Complete event items (so event listings in other tests still validate)
+    with legacy attendees lists: the one to migrate and a bystander that must
+    be left alone; removed with their registrations afterwards.
+    """
+    user_a, user_b = (str(uuid.uuid4()) for _ in range(2))
+    event, bystander = _event(user_b, [user_a]), _event(user_b, [user_b])
+    yield event, bystander, user_a, user_b
+    for event_id in (event['id'], bystander['id']):
+        for user_id in (user_a, user_b):
+            db.Table('registrations').delete_item(Key={'event_id': event_id, 'user_id': user_id})
+        db.Table(service.EVENT_COUNTERS_TABLE).delete_item(Key={'event_id': event_id, 'shard': 0})
+        db.Table('events').delete_item(Key={'id': event_id})
+    db.Table('users').delete_item(Key={'id': user_b})
+
+def _registered(event_id):
+    return db.Table('registrations').query(
+        KeyConditionExpression='event_id = :e', ExpressionAttributeValues={':e': event_id}
+    )['Items']
+
+def test_migrate_copies_both_lists_once(legacy_event):
+    event, bystander, user_a, user_b = legacy_event
+    event_id = event['id']
+    user = {
+        'id': user_b, 'firstName': 'Old', 'lastName': 'User', 'email': 'old@example.com',
+        'events_attended': [event_id]
+    }
+    db.Table('events').put_item(Item=event)
+    db.Table('events').put_item(Item=bystander)
+    db.Table('users').put_item(Item=user)
+    db.Table('registrations').put_item(Item={'event_id': event_id, 'user_id': user_a, 'registered_at': 1})
+
+    # only the given items are migrated, not the rest of the shared database
+    assert migrate_registrations(db, drop=True, events=[event], users=[user]) == 1
+    registrations = _registered(event_id)
+    assert sorted(r['user_id'] for r in registrations) == sorted([user_a, user_b])
+    # the registration made through the new path is not overwritten
+    assert [r['registered_at'] for r in registrations if r['user_id'] == user_a] == [1]
+    migrated_event = db.Table('events').get_item(Key={'id': event_id})['Item']
+    migrated_user = db.Table('users').get_item(Key={'id': user_b})['Item']
+    assert 'attendees' not in migrated_event and 'events_attended' not in migrated_user
+    # ETags from before the migration no longer match
+    assert (migrated_event['version'], migrated_user['version']) == (event.get('version', 0) + 1, 1)
+    assert db.Table('events').get_item(Key={'id': bystander['id']})['Item']['attendees'] == [user_b]
+    assert _registered(bystander['id']) == []
+    # re-running finds nothing new for these items
+    assert migrate_registrations(db, events=[event], users=[user]) == 0
+    assert len(_registered(event_id)) == 2
+
+def test_migrate_adds_copied_registrations_to_an_existing_counter(legacy_event):
+    event, _, user_a, user_b = legacy_event
+    event['attendees'] = [user_a, user_b]
+    db.Table('events').put_item(Item=event)
+    # user_a registered through the new path before the migration ran
+    db.Table('registrations').put_item(Item={'event_id': event['id'], 'user_id': user_a, 'registered_at': 1})
+    counters = db.Table(service.EVENT_COUNTERS_TABLE)
+    counters.put_item(Item={'event_id': event['id'], 'shard': 0, 'registered': 1})
+
+    assert migrate_registrations(db, events=[event], users=[]) == 1
+    assert counters.get_item(Key={'event_id': event['id'], 'shard': 0})['Item']['registered'] == 2
+    migrate_registrations(db, events=[event], users=[])
+    assert service.get_event_capacity(db, event['id'])['registered'] == 2
@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from boto3.dynamodb.conditions import Key
+from app import service
+from app.schemas import EventCreate
+from app.database import get_dynamodb_resource
+
+db = get_dynamodb_resource()
+
+@pytest.fixture
+def seed():
+    """
+    Seed a complete event (so event listings still validate) and its guests;
+    remove them, their registrations and counters afterwards.
+    """
+    seeded = []
+
+    def _seed(capacity, guests):
+        event = service.new_event_item(EventCreate(
+            slug=f'hot-event-{uuid.uuid4().hex}', title='Hot event', startAt='2024-05-01T10:00:00Z',
+            endAt='2024-05-01T12:00:00Z', maxCapacity=capacity, owner='x'
+        ))
+        db.Table('events').put_item(Item=event)
+        user_ids = [str(uuid.uuid4()) for _ in range(guests)]
+        seeded.append((event['id'], user_ids))
+        with db.Table('users').batch_writer() as writer:
+            for user_id in user_ids:
+                writer.put_item(Item={'id': user_id, 'firstName': 'Hot', 'lastName': 'Guest', 'email': 'hot@example.com'})
+        return event['id'], user_ids
+
+    yield _seed
+    for event_id, user_ids in seeded:
+        for table_name, range_key in ((service.REGISTRATIONS_TABLE, 'user_id'), (service.EVENT_COUNTERS_TABLE, 'shard')):
+            table = db.Table(table_name)
+            items = table.query(KeyConditionExpression=Key('event_id').eq(event_id))['Items']
+            with table.batch_writer() as writer:
+                for item in items:
+                    writer.delete_item(Key={'event_id': event_id, range_key: item[range_key]})
+        db.Table('events').delete_item(Key={'id': event_id})
+        with db.Table('users').batch_writer() as writer:
+            for user_id in user_ids:
+                writer.delete_item(Key={'id': user_id})
+
+def _register(event_id, user_id, shards):
+    try:
+        return service.register_event(db, event_id, user_id, shards=shards)['status']
+    except service.EventFull:
+        return 'full'
+
+def _assert_consistent(event_id, statuses, capacity):
+    assert statuses.count('registered') == capacity
+    assert service.get_event_capacity(db, event_id)['registered'] == capacity
+    registrations = db.Table('registrations').query(
+        KeyConditionExpression='event_id = :e', ExpressionAttributeValues={':e': event_id}
+    )['Items']
+    assert len(registrations) == capacity
+    attended = sum(
+        int(db.Table('users').get_item(Key={'id': r['user_id']})['Item']['events_attended_count'])
+        for r in registrations
+    )
+    assert attended == capacity
+
+@pytest.mark.parametrize('shards', [1, 4])
+def test_registrations_stop_at_capacity(seed, shards):
+    event_id, user_ids = seed(capacity=5, guests=8)
+    statuses = [_register(event_id, user_id, shards) for user_id in user_ids + user_ids[:2]]
+    assert statuses.count('already_registered') == 2
+    _assert_consistent(event_id, statuses, 5)
+
+# moto rolls cancelled transactions back by restoring a snapshot of the whole
+# table, which loses concurrent writes; run this one against DynamoDB Local.
+@pytest.mark.skipif(os.getenv('RUN_STRESS_TESTS') != '1', reason='set RUN_STRESS_TESTS=1 (needs DynamoDB Local)')
+@pytest.mark.parametrize('shards', [1, 4])
+def test_concurrent_registrations_never_exceed_capacity(seed, shards):
+    event_id, user_ids = seed(capacity=15, guests=40)
+    # every guest tries twice, concurrently
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        statuses = list(pool.map(lambda user_id: _register(event_id, user_id, shards), user_ids * 2))
+    _assert_consistent(event_id, statuses, 15)
+
+def test_shard_capacities_split_remainder():
+    assert service.shard_capacities(10, 4) == [3, 3, 2, 2]
+    assert sum(service.shard_capacities(7, 3)) == 7
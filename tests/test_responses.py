@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from app.responses import ORJSONResponse
+from app.schemas import USER_SHAPE
+
+
+def _user(**overrides):
+    item = {
+        'id': 'u1', 'firstName': 'Ada', 'lastName': 'Lovelace', 'email': 'ada@example.com',
+        'phoneNumber': '123', 'events_hosted': ['e1'], 'events_attended': [],
+        'events_hosted_count': Decimal(1), 'version': Decimal(3)
+    }
+    item.update(overrides)
+    return item
+
+
+def test_rows_are_projected_onto_the_schema():
+    row, = USER_SHAPE.rows([_user()])
+    assert 'phoneNumber' not in row
+    assert row['company'] is None and row['events_attended_count'] == 0
+    assert ORJSONResponse(row).body.count(b'"version":3') == 1
+
+
+def test_rows_missing_required_fields_are_validated():
+    item = _user()
+    del item['email']
+    with pytest.raises(ValidationError):
+        USER_SHAPE.rows([_user(), item])
@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import uuid
+from app.database import get_dynamodb_resource
+from app.scanner import scan_table
+
+table = get_dynamodb_resource().Table('users')
+marker = str(uuid.uuid4())
+
+def setup_module(module):
+    for i in range(7):
+        table.put_item(Item={
+            'id': f"{marker}-{i}",
+            'firstName': 'Scan',
+            'lastName': str(i),
+            'email': f"scan{i}@example.com",
+            'company': marker,
+            'events_hosted': [],
+            'events_attended': []
+        })
+
+def _ours(item):
+    return item.get('company') == marker
+
+def test_scan_follows_pagination():
+    # Limit=2 forces several pages per segment
+    items = scan_table(table, segments=1, predicate=_ours, Limit=2)
+    assert len(items) == 7
+
+def test_segmented_scan_returns_every_item():
+    items = scan_table(table, segments=3, predicate=_ours, Limit=2)
+    assert sorted(i['id'] for i in items) == sorted(f"{marker}-{i}" for i in range(7))
+
+def test_scan_stops_at_limit():
+    first = scan_table(table, segments=3, predicate=_ours, limit=3, Limit=2)
+    second = scan_table(table, segments=3, predicate=_ours, limit=3, Limit=2)
+    assert len(first) == 3
+    assert [i['id'] for i in first] == [i['id'] for i in second]
@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.search_index import EventSearchIndex, tokenize
+
+def _event(event_id, title, venue=None, description=None):
+    return {'id': event_id, 'slug': event_id, 'title': title, 'venue': venue, 'description': description,
+            'startAt': '2025-01-01T10:00:00Z', 'endAt': '2025-01-01T12:00:00Z', 'maxCapacity': 10}
+
+def _index():
+    index = EventSearchIndex()
+    index.put(_event('py', 'Python Conference', 'Hà Nội', 'Talks about Python and data'))
+    index.put(_event('cook', 'Cooking Class', 'Đà Nẵng', 'Bring your python cookbook'))
+    index.put(_event('run', 'City Marathon', 'Huế'))
+    index.put(_event('jazz', 'Jazz Night', 'Hà Nội Opera House'))
+    return index
+
+def test_tokenize_ignores_case_and_accents():
+    assert tokenize('Đà Nẵng, HÀ NỘI!') == ['da', 'nang', 'ha', 'noi']
+    assert tokenize(None) == []
+
+def test_title_matches_rank_above_description_matches():
+    hits = _index().search('python')
+    assert [hit['id'] for hit in hits] == ['py', 'cook']
+    assert hits[0]['score'] > hits[1]['score']
+    assert set(hits[0]) == {'id', 'slug', 'title', 'venue', 'startAt', 'endAt', 'score'}
+
+def test_accent_insensitive_and_prefix_queries():
+    index = _index()
+    assert {hit['id'] for hit in index.search('ha noi')} == {'py', 'jazz'}
+    assert [hit['id'] for hit in index.search('marath')] == ['run']
+    assert index.search('marath', prefix=False) == []
+    assert [hit['id'] for hit in index.search('noi jaz')][0] == 'jazz'
+
+def test_updates_and_removals():
+    index = _index()
+    index.put(_event('run', 'Trail Run'))
+    assert index.search('marathon') == []
+    assert [hit['title'] for hit in index.search('trail')] == ['Trail Run']
+    index.remove('py')
+    index.remove('missing')
+    assert [hit['id'] for hit in index.search('python')] == ['cook']
+    assert len(index) == 3
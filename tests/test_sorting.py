@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from decimal import Decimal
+from app.sorting import parse_sort, select_page
+
+USERS = [
+    {'id': 'a', 'company': 'ABC', 'events_hosted_count': Decimal(3)},
+    {'id': 'b', 'company': None, 'events_hosted_count': Decimal(1)},
+    {'id': 'c', 'company': 'XYZ', 'events_hosted': ['e1', 'e2']},
+    {'id': 'd', 'company': 7, 'events_hosted_count': Decimal(3)},
+    {'id': 'e'},
+]
+
+def _ids(users):
+    return [u['id'] for u in users]
+
+def test_mixed_and_missing_values_do_not_crash():
+    page, _ = select_page(USERS, parse_sort('company'), 0, 10)
+    # numbers, then strings, then missing values
+    assert _ids(page) == ['d', 'a', 'c', 'b', 'e']
+
+def test_descending_multi_key_on_derived_count():
+    page, _ = select_page(USERS, parse_sort('-events_hosted,company'), 0, 3)
+    assert _ids(page) == ['d', 'a', 'c']
+    page, _ = select_page(USERS, parse_sort('events_hosted', 'desc'), 0, 2)
+    assert _ids(page) == ['d', 'a']
+
+def test_keyset_pages_cover_everything_once():
+    keys = parse_sort('-events_hosted')
+    seen, after = [], None
+    while True:
+        page, after = select_page(USERS, keys, 0, 2, after)
+        seen.extend(_ids(page))
+        if not after:
+            break
+    assert seen == _ids(select_page(USERS, keys, 0, 10)[0])
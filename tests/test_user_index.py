@@ -0,0 +1,36 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.user_index import UserIndex
+
+def _user(user_id, **fields):
+    item = {'id': user_id, 'firstName': 'F', 'lastName': 'L', 'email': f"{user_id}@example.com"}
+    item.update(fields)
+    return item
+
+def _ids(rows):
+    return sorted(row['id'] for row in rows)
+
+def test_filter_intersects_postings_and_ranges():
+    index = UserIndex(capacity=2)
+    index.put(_user('a', company='ABC', city='Hanoi', events_hosted=['e1', 'e2']))
+    index.put(_user('b', company='ABC', city='Hue'))
+    index.put(_user('c', company='XYZ', city='Hanoi', events_hosted=['e3']))
+    assert _ids(index.filter({'company': 'ABC'}, {})) == ['a', 'b']
+    assert _ids(index.filter({'company': 'ABC', 'city': 'Hanoi'}, {})) == ['a']
+    assert _ids(index.filter({'city': 'Hanoi'}, {('events_hosted', 'max'): 1})) == ['c']
+    assert _ids(index.filter({'company': 'Nope'}, {})) == []
+    assert _ids(index.filter({}, {('events_hosted', 'min'): 1})) == ['a', 'c']
+
+def test_updates_are_incremental():
+    index = UserIndex()
+    index.put(_user('a', company='ABC'))
+    index.put(_user('b', company='ABC'))
+    index.put(_user('a', company='XYZ'))
+    index.remove('b')
+    index.append_relation('a', 'events_attended', 'e1')
+    assert _ids(index.filter({'company': 'ABC'}, {})) == []
+    rows = index.filter({'company': 'XYZ'}, {('events_attended', 'min'): 1})
+    assert _ids(rows) == ['a'] and rows[0]['events_attended'] == ['e1']
+    assert len(index) == 1